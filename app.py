@@ -1,4 +1,6 @@
 import streamlit as st
+from src import maintenance
+from src.repo import get_goals, init_db
 from src.utils import ensure_dirs, load_fontawesome, apply_theme_css
 
 st.set_page_config(
@@ -9,6 +11,8 @@ st.set_page_config(
 )
 
 ensure_dirs()
+init_db()
+maintenance.start()  # once per server; later calls are no-ops
 load_fontawesome()
 apply_theme_css()
 
@@ -21,7 +25,8 @@ st.success("This is my space to track the last 100 days of 2025. I’m logging s
 
 st.warning("⚠️ Missing a day isn’t the end of the world, but ghosting the tracker for too long kills the whole point. Consistency beats perfection.")
 
-st.error("❌ My Red Zone:\n- Too much sugar\n- Low productivity\n- Barely any water\n\nThese are the danger signs I need to keep in check every day.")
+goal_lines = "\n".join(f"- {g.name}: {g.describe()}" for g in get_goals()) or "- (none yet — add them on the Dashboard)"
+st.error(f"❌ My Red Zone — missing these goals:\n{goal_lines}\n\nThese are the danger signs I need to keep in check every day.")
 
 
 # Theme CSS injected above for consistent look everywhere
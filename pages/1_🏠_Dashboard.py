@@ -1,23 +1,33 @@
 import streamlit as st
 import pandas as pd
+from dataclasses import replace
 from datetime import date
 
-from src.repo import init_db, to_dataframe
-from src.analytics import add_rolling, composite_score
-from src.charts import kpi_sparkline, time_series, calendar_heatmap
+from src.repo import init_db, to_dataframe, data_version, get_anomalies, get_goals, save_goal, delete_goal, goal_report
+from src.analytics import DEFAULT_SCORE_RULES, METRICS, add_rolling, composite_score
+from src.charts import kpi_sparkline, time_series, calendar_heatmap, goal_matrix
+from src.goals import DAY_SETS, OPS, Goal
 from src.utils import apply_theme_css
+from src import figcache, instrument, maintenance
 
 st.set_page_config(page_title="Dashboard", page_icon="🏠", layout="wide")
+instrument.begin_page("Dashboard")
 init_db()
+maintenance.start()
 apply_theme_css()
 
 st.title("Dashboard")
 
+# Version first: a write landing in between then only makes the cache key stale, never too new.
+version = data_version()
 df = to_dataframe()
 if not df.empty:
     df["date"] = pd.to_datetime(df["date"])  # ensure datetime
     df = add_rolling(df)
-    score = composite_score(df)
+    rules = tuple(st.session_state.get("score_rules", DEFAULT_SCORE_RULES))
+    score = composite_score(df, rules)
+    score.name = "score"
+    flags = get_anomalies()  # maintained on write; no history scan here
 else:
     st.info("No data yet. Use the Calendar or Data page to add your first day.")
 
@@ -27,62 +37,116 @@ if not df.empty:
     # Row 1: Productive hours
     st.markdown("**Productive hours (h) — last 30 days**")
     st.metric("Productive (hours)", f"{latest['productive_hours']:.1f} h")
-    st.plotly_chart(kpi_sparkline(df.tail(30), "productive_hours"), width="stretch")
+    st.plotly_chart(figcache.cached("kpi_sparkline", "productive_hours", version, lambda: kpi_sparkline(df.tail(30), "productive_hours")), width="stretch")
     st.divider()
 
     # Row 2: Water intake in liters
     latest_water_l = float(latest["water_ml"]) / 1000.0
     st.markdown("**Water intake (L) — last 30 days**")
     st.metric("Water (L)", f"{latest_water_l:.2f} L")
-    df_water = df.copy()
-    df_water["water_l"] = df_water["water_ml"] / 1000.0
-    st.plotly_chart(kpi_sparkline(df_water.tail(30), "water_l"), width="stretch")
+    last30 = df.tail(30)
+    st.plotly_chart(figcache.cached(
+        "kpi_sparkline", "water_l", version,
+        lambda: kpi_sparkline(last30.assign(water_l=last30["water_ml"] / 1000.0), "water_l"),
+    ), width="stretch")
     st.divider()
 
     # Row 3: Sugar intake grams
     st.markdown("**Sugar intake (g) — last 30 days**")
     st.metric("Sugar (g)", f"{int(latest['sugar_intake_g'])}")
-    st.plotly_chart(kpi_sparkline(df.tail(30), "sugar_intake_g"), width="stretch")
+    st.plotly_chart(figcache.cached("kpi_sparkline", "sugar_intake_g", version, lambda: kpi_sparkline(df.tail(30), "sugar_intake_g")), width="stretch")
     st.divider()
 
     # Row 4: Fap count
     st.markdown("**Fap count — last 30 days**")
     st.metric("Fap count", f"{int(latest['fap_count'])}")
-    st.plotly_chart(kpi_sparkline(df.tail(30), "fap_count"), width="stretch")
+    st.plotly_chart(figcache.cached("kpi_sparkline", "fap_count", version, lambda: kpi_sparkline(df.tail(30), "fap_count")), width="stretch")
     st.divider()
 
     # Row 5: Weight kg
     st.markdown("**Weight (kg) — last 30 days**")
     weight_val = f"{latest['weight_kg']} kg" if pd.notnull(latest['weight_kg']) else "— kg"
     st.metric("Weight (kg)", weight_val)
-    st.plotly_chart(kpi_sparkline(df.tail(30), "weight_kg"), width="stretch")
+    st.plotly_chart(figcache.cached("kpi_sparkline", "weight_kg", version, lambda: kpi_sparkline(df.tail(30), "weight_kg")), width="stretch")
 
 st.subheader("Calendar heatmap (composite score)")
 if not df.empty:
-    sc = composite_score(df)
-    sc.name = "score"
-    st.plotly_chart(calendar_heatmap(df, sc), width="stretch")
+    st.plotly_chart(figcache.cached(
+        "calendar_heatmap", rules, version, lambda: calendar_heatmap(df, score, flags["date"])
+    ), width="stretch")
+
+    st.subheader("Flagged days")
+    if flags.empty:
+        st.caption("Nothing unusual so far.")
+    else:
+        recent_flags = flags.sort_values("date", ascending=False).head(10).copy()
+        recent_flags["direction"] = ["spike" if s > 0 else "drop" for s in recent_flags["score"]]
+        st.dataframe(recent_flags[["date", "metric", "value", "direction", "score"]].round(2), width="stretch", hide_index=True)
+
+st.subheader("Goals")
+report = goal_report()
+if report.goals and len(report.dates):
+    g1, g2 = st.columns([1, 3])
+    g1.metric("Days in a row, all goals met", report.streak())
+    summary = report.summary()
+    g2.dataframe(
+        summary.assign(hit_rate=(summary["hit_rate"] * 100).round(0)).rename(columns={"hit_rate": "hit rate %"}),
+        width="stretch", hide_index=True,
+    )
+    recent = report.matrix().tail(60)
+    st.plotly_chart(
+        figcache.cached("goal_matrix", tuple(report.goals), version, lambda: goal_matrix(recent)), width="stretch"
+    )
+elif not report.goals:
+    st.caption("No goals yet. Add one below.")
+with st.expander("Manage goals", expanded=False):
+    with st.form("goal_form", clear_on_submit=True):
+        a, b, c = st.columns([2, 1, 1])
+        metric = a.selectbox("Metric", METRICS)
+        op = b.selectbox("Comparison", list(OPS), index=1)
+        value = c.number_input("Value", value=0.0, step=1.0)
+        d, e, f, g = st.columns([2, 2, 1, 1])
+        name = d.text_input("Name (optional)")
+        days = e.selectbox("On", list(DAY_SETS), format_func=str.capitalize)
+        k = f.number_input("At least k", min_value=0, max_value=31, value=0, help="0 = every day")
+        n = g.number_input("of n days", min_value=0, max_value=31, value=0)
+        if st.form_submit_button("Add goal"):
+            try:
+                goal = Goal(name, metric, op, value, days, int(k) or None, int(n) or None)
+                save_goal(goal if name else replace(goal, name=goal.describe()))
+                st.rerun()
+            except ValueError as exc:
+                st.error(str(exc))
+    current = get_goals()
+    if current:
+        drop = st.selectbox("Goal to remove", current, format_func=lambda g: f"{g.name} ({g.describe()})")
+        if st.button("Remove goal"):
+            delete_goal(drop.id)
+            st.rerun()
 
 st.subheader("Time series")
 if not df.empty:
     # 1) Productive hours
     st.markdown("**Productive hours (h)**")
-    st.plotly_chart(time_series(df, ["productive_hours"]), width="stretch")
+    st.plotly_chart(figcache.cached("time_series", "productive_hours", version, lambda: time_series(df, ["productive_hours"])), width="stretch")
 
     # 2) Water in liters
     st.markdown("**Water intake (L)**")
-    df2 = df.copy()
-    df2["water_l"] = df2["water_ml"] / 1000.0
-    st.plotly_chart(time_series(df2, ["water_l"]), width="stretch")
+    st.plotly_chart(figcache.cached(
+        "time_series", "water_l", version,
+        lambda: time_series(pd.DataFrame({"date": df["date"], "water_l": df["water_ml"] / 1000.0}), ["water_l"]),
+    ), width="stretch")
 
     # 3) Sugar intake grams
     st.markdown("**Sugar intake (g)**")
-    st.plotly_chart(time_series(df, ["sugar_intake_g"]), width="stretch")
+    st.plotly_chart(figcache.cached("time_series", "sugar_intake_g", version, lambda: time_series(df, ["sugar_intake_g"])), width="stretch")
 
     # 4) Fap count
     st.markdown("**Fap count**")
-    st.plotly_chart(time_series(df, ["fap_count"]), width="stretch")
+    st.plotly_chart(figcache.cached("time_series", "fap_count", version, lambda: time_series(df, ["fap_count"])), width="stretch")
 
     # 5) Weight kg
     st.markdown("**Weight (kg)**")
-    st.plotly_chart(time_series(df, ["weight_kg"]), width="stretch")
+    st.plotly_chart(figcache.cached("time_series", "weight_kg", version, lambda: time_series(df, ["weight_kg"])), width="stretch")
+
+instrument.end_page()
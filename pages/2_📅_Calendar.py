@@ -4,29 +4,49 @@ from datetime import date, datetime
 import pandas as pd
 import streamlit as st
 from src.utils import apply_theme_css
+from src import instrument, maintenance
 
-from src.repo import init_db, to_dataframe, upsert_day, get_day, delete_day
+from src.repo import init_db, upsert_day, get_day, delete_day, pending_sync, get_month, recent_days, get_rollup, goal_report
+from src.analytics import composite_score
 
 st.set_page_config(page_title="Calendar", page_icon="📅", layout="wide")
+instrument.begin_page("Calendar")
 init_db()
+maintenance.start()
 apply_theme_css()
 
 st.title("Calendar")
 
 # Simple month grid with day-click selection
 today = date.today()
-year = st.selectbox("Year", [2025], index=0)
+# Years with logged days, from the monthly rollups (one row per month, not per day), plus this year
+years = sorted({b.year for b in get_rollup("M", ["productive_hours"], "count")["bucket"]} | {today.year})
+year = st.selectbox("Year", years, index=years.index(today.year))
 month = st.selectbox(
     "Month",
     list(range(1, 13)),
-    index=8 if year == 2025 else 0,
+    index=today.month - 1 if year == today.year else 0,
     format_func=lambda m: calendar.month_name[m],
 )
 
 cal = calendar.Calendar(firstweekday=0)
 days = [d for d in cal.itermonthdates(year, month)]
 
+# Whole visible month in one cached read: drives the markers and the form prefill.
+month_df = get_month(year, month)
+month_scores = composite_score(month_df) if not month_df.empty else {}
+# Goals are evaluated over the whole history (windows reach back across months).
+goals_matrix = goal_report().matrix()
+goals_matrix.index = goals_matrix.index.date
+all_goals_met = set(goals_matrix.index[goals_matrix.fillna(True).all(axis=1)]) if len(goals_matrix.columns) else set()
+
+
+def day_marker(score: float) -> str:
+    return "🟢" if score >= 0.66 else ("🟡" if score >= 0.33 else "🔴")
+
+
 st.write(f"{calendar.month_name[month]} {year}")
+st.caption("🟢 / 🟡 / 🔴 logged day by composite score · ⭐ every goal met · plain number = not logged")
 cols = st.columns(7)
 for i, wd in enumerate(["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]):
     cols[i].markdown(f"**{wd}**")
@@ -36,10 +56,10 @@ for idx, d in enumerate(days):
     if idx % 7 == 0:
         row_cols = st.columns(7)
     style = ""
-    if d.month != month:
-        label = f"{d.day}"  # dim other-month days
+    if d.month == month and d in month_scores:
+        label = f"{d.day} {day_marker(month_scores[d])}" + (" ⭐" if d in all_goals_met else "")
     else:
-        label = f"{d.day}"
+        label = f"{d.day}"  # other-month days are dimmed below
     if row_cols:
         if d.month == month:
             if row_cols[idx % 7].button(label, key=f"daybtn-{d.isoformat()}"):
@@ -49,16 +69,24 @@ for idx, d in enumerate(days):
 
 sel = st.session_state.get("selected_date", today)
 st.markdown(f"### Edit {sel}")
+if sel in goals_matrix.index:
+    checks = goals_matrix.loc[sel]
+    st.caption(" · ".join(f"{'✅' if ok else '❌'} {name}" for name, ok in checks.items() if not pd.isna(ok)))
 
-# Prefill existing values if the day exists
-existing = get_day(sel)
+# Prefill existing values if the day exists (no extra lookup inside the visible month)
+if sel.year == year and sel.month == month:
+    existing = month_df.loc[sel].to_dict() if sel in month_df.index else None
+else:
+    rec = get_day(sel)
+    existing = vars(rec) if rec is not None else None
+existing = {k: (None if pd.isna(v) else v) for k, v in existing.items()} if existing else {}
 prefill = {
-    "sugar_intake_g": existing.sugar_intake_g if existing else 0,
-    "water_ml": existing.water_ml if existing else 0,
-    "fap_count": existing.fap_count if existing else 0,
-    "productive_hours": existing.productive_hours if existing else 0.0,
-    "weight_kg": existing.weight_kg if (existing and existing.weight_kg is not None) else 70.0,
-    "notes": existing.notes if (existing and existing.notes) else "",
+    "sugar_intake_g": existing.get("sugar_intake_g") or 0,
+    "water_ml": existing.get("water_ml") or 0,
+    "fap_count": existing.get("fap_count") or 0,
+    "productive_hours": existing.get("productive_hours") or 0.0,
+    "weight_kg": existing.get("weight_kg") or 70.0,
+    "notes": existing.get("notes") or "",
 }
 
 with st.form("day_form", clear_on_submit=False):
@@ -76,7 +104,7 @@ with st.form("day_form", clear_on_submit=False):
         del_clicked = st.form_submit_button("Delete", type="secondary")
     if submitted:
         try:
-            upsert_day(
+            outcome = upsert_day(
                 {
                     "date": d,
                     "sugar_intake_g": int(sugar),
@@ -87,7 +115,7 @@ with st.form("day_form", clear_on_submit=False):
                     "notes": notes,
                 }
             )
-            st.success("Saved / Updated ✨")
+            st.success("No changes to save" if outcome == "unchanged" else "Saved / Updated ✨")
         except Exception as e:
             st.error(str(e))
     if del_clicked:
@@ -98,8 +126,15 @@ with st.form("day_form", clear_on_submit=False):
         else:
             st.info("Nothing to delete for that date.")
 
+sync = pending_sync()
+if sync and sync["pending"]:
+    retrying = f", {sync['failing']} retrying" if sync["failing"] else ""
+    st.caption(f"⏳ {sync['pending']} edit(s) waiting to sync to Google Sheets{retrying}")
+
 st.caption("Day-click calendar grid provided. If an advanced component is needed, FullCalendar embed can be added later with a fallback to this form.")
 
-df = to_dataframe()
-if not df.empty:
-    st.dataframe(df.tail(10), width="stretch")
+recent = recent_days(10)
+if not recent.empty:
+    st.dataframe(recent, width="stretch")
+
+instrument.end_page()
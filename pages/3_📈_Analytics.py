@@ -1,19 +1,30 @@
 import streamlit as st
 from src.utils import apply_theme_css
+from src import figcache, instrument, maintenance
 import pandas as pd
-from src.repo import init_db, to_dataframe
-from src.analytics import add_rolling, weekly_breakdown, correlation_matrix, compute_streak
-from src.charts import time_series
+from src.repo import init_db, to_dataframe, data_version, get_rollup, get_forecast, get_seasonality, goal_report
+from src.analytics import add_rolling, resample, correlation_matrix, METRICS, AGGREGATIONS, WEEKDAYS
+from src.charts import correlation_heatmap, profile_heatmap, time_series
 
 st.set_page_config(page_title="Analytics", page_icon="📈", layout="wide")
+instrument.begin_page("Analytics")
 init_db()
+maintenance.start()
 apply_theme_css()
 
 st.title("Analytics")
 
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_resample(version: str, freq, anchor: str, metrics: tuple, aggs: tuple, _df: pd.DataFrame) -> pd.DataFrame:
+    # Keyed by data version + settings; the frame itself is not hashed.
+    return resample(_df, freq, list(metrics), list(aggs), anchor=anchor)
+
+
 df = to_dataframe()
 if df.empty:
     st.info("No data yet.")
+    instrument.end_page()
     st.stop()
 
 df["date"] = pd.to_datetime(df["date"])  # type: ignore[assignment]
@@ -22,30 +33,59 @@ df = add_rolling(df)
 col1, col2 = st.columns(2)
 with col1:
     st.subheader("Rolling averages (prod hours)")
-    st.plotly_chart(time_series(df, ["productive_hours", "prod_7", "prod_30"]), width="stretch")
+    st.plotly_chart(figcache.cached(
+        "time_series", "productive_hours+rolling+forecast", data_version(),
+        lambda: time_series(df, ["productive_hours", "prod_7", "prod_30"], get_forecast("productive_hours")),
+    ), width="stretch")
 with col2:
-    st.subheader("Weekly breakdown")
-    weekly = weekly_breakdown(df)
-    st.dataframe(weekly, width="stretch")
+    st.subheader("Breakdown")
+    c1, c2, c3 = st.columns(3)
+    period = c1.selectbox("Bucket", ["Weekly", "Monthly", "Daily", "Custom (days)"])
+    anchor = "MON"
+    freq = {"Weekly": "W", "Monthly": "M", "Daily": "D"}.get(period)
+    if period == "Weekly":
+        anchor = c2.selectbox("Week starts", WEEKDAYS, index=0)
+    elif freq is None:
+        freq = int(c2.number_input("Days per bucket", min_value=2, max_value=90, value=14, step=1))
+    aggs = c3.multiselect("Aggregations", AGGREGATIONS, default=["sum"])
+    metrics = st.multiselect(
+        "Metrics", METRICS, default=["sugar_intake_g", "water_ml", "productive_hours", "fap_count"]
+    )
+    if aggs and metrics and (freq == "M" or (freq == "W" and anchor == "MON")):
+        # Maintained rollups: one row per bucket, no pass over the daily rows.
+        st.dataframe(get_rollup(freq, metrics, aggs), width="stretch")
+    elif aggs and metrics:
+        breakdown = cached_resample(data_version(), freq, anchor, tuple(metrics), tuple(aggs), df)
+        st.dataframe(breakdown, width="stretch")
 
 st.subheader("Correlations")
-from plotly import express as px
-import numpy as np
+st.plotly_chart(
+    figcache.cached("correlation_heatmap", (), data_version(), lambda: correlation_heatmap(correlation_matrix(df))),
+    width="stretch",
+)
 
-corr = correlation_matrix(df)
-if not corr.empty:
-    fig = px.imshow(corr.values, x=corr.columns, y=corr.columns, color_continuous_scale="Viridis")
-    fig.update_layout(template="plotly_dark")
-    st.plotly_chart(fig, width="stretch")
-else:
-    st.caption("No data for correlations yet.")
+st.subheader("Seasonality")
+kinds = {"Weekday": "weekday", "Month": "month", "Day of month": "day"}
+kind = kinds[st.radio("Profile by", list(kinds), horizontal=True)]
+profile = get_seasonality()
+st.plotly_chart(
+    figcache.cached("profile_heatmap", kind, data_version(), lambda: profile_heatmap(profile.matrix(kind))),
+    width="stretch",
+)
+with st.expander("Means with 95% intervals"):
+    st.dataframe(profile.table(kind), width="stretch", hide_index=True)
 
 st.subheader("Streaks")
-st.metric("Current streak (days)", compute_streak(df))
+st.metric("Current streak (days, all goals met)", goal_report().streak())
 
 st.subheader("Weight trend")
 if "weight_kg" in df.columns:
-    w = df[["date", "weight_kg"]].dropna().copy()
-    if not w.empty:
-        w["weight_ma7"] = w["weight_kg"].rolling(7, min_periods=1).mean()
-    st.plotly_chart(time_series(w, ["weight_kg", "weight_ma7"]), width="stretch")
+
+    def weight_trend():
+        w = df[["date", "weight_kg"]].dropna()
+        w = w.assign(weight_ma7=w["weight_kg"].rolling(7, min_periods=1).mean())
+        return time_series(w, ["weight_kg", "weight_ma7"], get_forecast("weight_kg"))
+
+    st.plotly_chart(figcache.cached("time_series", "weight_kg+ma7+forecast", data_version(), weight_trend), width="stretch")
+
+instrument.end_page()
@@ -1,21 +1,61 @@
 import streamlit as st
 from src.utils import apply_theme_css
+from src import instrument, maintenance
 from datetime import date
 from pathlib import Path
-import pandas as pd
 
-from src.repo import init_db, to_dataframe, export_csv, export_json, import_csv, weekly_auto_backup, delete_day
+from src.repo import init_db, browse_days, get_day, export_csv, export_json, import_csv_report, weekly_auto_backup, delete_day, search_notes, create_snapshot, restore_snapshot
 
 st.set_page_config(page_title="Data & Export", page_icon="🗄️", layout="wide")
+instrument.begin_page("Data & Export")
 init_db()
+maintenance.start()
 apply_theme_css()
 
 st.title("Data & Export")
 
-df = to_dataframe()
-st.dataframe(df, width="stretch")
+st.subheader("Browse days")
+f1, f2, f3, f4 = st.columns([2, 1, 1, 1])
+span = f1.date_input("Between", value=(), help="Leave empty for all days")
+newest_first = f2.toggle("Newest first", value=True)
+only_notes = f3.checkbox("With notes only")
+page_size = f4.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+with st.expander("Filter by value", expanded=False):
+    v1, v2, v3 = st.columns(3)
+    metric = v1.selectbox("Metric", ["(none)", "sugar_intake_g", "water_ml", "fap_count", "productive_hours", "weight_kg"])
+    lo = v2.number_input("At least", value=None, disabled=metric == "(none)")
+    hi = v3.number_input("At most", value=None, disabled=metric == "(none)")
+start, end = (tuple(span) + (None, None))[:2]
+ranges = {metric: (lo, hi)} if metric != "(none)" else None
+query = dict(start=start, end=end, descending=newest_first, ranges=ranges, has_notes=True if only_notes else None)
 
-col1, col2, col3 = st.columns(3)
+# Cursors of the pages visited so far; any change to the filters starts over.
+state = st.session_state.setdefault("browse", {"query": None, "cursors": [None]})
+if state["query"] != (query, page_size):
+    state.update(query=(query, page_size), cursors=[None])
+page = browse_days(after=state["cursors"][-1], limit=page_size, **query)
+st.dataframe(page.rows, width="stretch", hide_index=True)
+p1, p2, p3 = st.columns([1, 1, 4])
+if p1.button("← Previous", disabled=len(state["cursors"]) == 1):
+    state["cursors"].pop()
+    st.rerun()
+if p2.button("Next →", disabled=page.next_after is None):
+    state["cursors"].append(page.next_after)
+    st.rerun()
+p3.caption(f"Page {len(state['cursors'])} · {len(page.rows)} day(s)")
+
+st.subheader("Search notes")
+q = st.text_input("Words to find", placeholder="e.g. headache gym")
+if q:
+    hits = search_notes(q, limit=100)
+    if hits.empty:
+        st.caption("No notes match.")
+    else:
+        st.caption(f"{len(hits)} matching day(s), best first")
+        for _, hit in hits.iterrows():
+            st.markdown(f"**{hit['date']}** — {hit['snippet']}")
+
+col1, col2, col3, col4 = st.columns(4)
 with col1:
     if st.button("Export CSV"):
         p = export_csv(Path("data/export.csv"))
@@ -28,6 +68,12 @@ with col3:
     if st.button("Backup (CSV)"):
         p = weekly_auto_backup()
         st.success(f"Backup at {p}")
+with col4:
+    if st.button("Snapshot (SQLite)"):
+        try:
+            st.success(f"Snapshot at {create_snapshot()}")
+        except Exception as e:
+            st.error(str(e))
 
 st.subheader("Import CSV")
 up = st.file_uploader("Choose CSV", type=["csv"])
@@ -35,31 +81,59 @@ if up is not None:
     temp = Path("data/_import.csv")
     temp.write_bytes(up.getvalue())
     try:
-        n = import_csv(temp, drop_conflicts=True)
-        st.success(f"Imported {n} rows")
+        res = import_csv_report(temp, drop_conflicts=True)
+        st.success(f"Imported {res.imported} rows: {res.inserted} new, {res.updated} updated, {res.unchanged} unchanged")
+        if res.rejected:
+            st.warning(f"Skipped {res.rejected} invalid rows")
+            st.dataframe(res.report.summary(), width="stretch")
+            # CSV line numbers: header is line 1
+            st.dataframe(res.report.errors.assign(line=res.report.errors["row"] + 2), width="stretch")
     except Exception as e:
         st.error(str(e))
 
 st.subheader("Restore from backup")
-backup_files = sorted(Path("backups").glob("*.csv"))
+backup_files = sorted(Path("backups").glob("habits-*.db"), reverse=True) + sorted(Path("backups").glob("*.csv"), reverse=True)
 if backup_files:
-    sel = st.selectbox("Select backup CSV", backup_files, format_func=lambda p: p.name)
+    sel = st.selectbox("Select backup", backup_files, format_func=lambda p: p.name)
+    if sel.suffix == ".db":
+        st.caption("Snapshots replace the whole database in one step; days added since are removed.")
+    else:
+        st.caption("CSV backups are merged in: changed days are overwritten, newer days are kept.")
     if st.button("Restore selected backup"):
         try:
-            n = import_csv(sel, drop_conflicts=True)
-            st.success(f"Restored {n} rows from {sel.name}")
+            if sel.suffix == ".db":
+                restore_snapshot(sel)
+                st.success(f"Restored the database from {sel.name}")
+            else:
+                res = import_csv_report(sel, drop_conflicts=True)
+                st.success(f"Restored {res.imported} rows from {sel.name} ({res.inserted + res.updated} changed)")
         except Exception as e:
             st.error(str(e))
 else:
     st.caption("No backups found yet. Create one above.")
 
 st.subheader("Delete a day")
-if not df.empty:
-    dsel = st.selectbox("Pick date to delete", df["date"].dt.date.tolist())
-    if st.button("Delete selected day", type="secondary"):
-        if delete_day(dsel):
-            st.success(f"Deleted {dsel}")
-        else:
-            st.info("That date wasn't in the database.")
+dsel = st.date_input("Day to delete", value=page.rows["date"].iloc[0].date() if not page.rows.empty else date.today())
+rec = get_day(dsel)
+if rec is None:
+    st.caption(f"Nothing logged on {dsel}.")
+elif st.button("Delete selected day", type="secondary"):
+    if delete_day(dsel):
+        st.success(f"Deleted {dsel}")
+    else:
+        st.info("That date wasn't in the database.")
+
+st.subheader("Maintenance")
+sched = maintenance.start()
+if sched is None:
+    st.caption("Background maintenance is off (HABITS_MAINTENANCE=0).")
 else:
-    st.caption("No rows to delete yet.")
+    st.caption("Backups, cache warming and database checks run in the background, never on a page rerun.")
+    st.dataframe(sched.status(), width="stretch", hide_index=True)
+    m1, m2 = st.columns([3, 1])
+    job = m1.selectbox("Job", list(sched.tasks), label_visibility="collapsed")
+    if m2.button("Run now"):
+        sched.request(job)
+        st.info(f"Queued {job}; it runs within {sched.tick:.0f}s unless another server is already running it.")
+
+instrument.end_page()
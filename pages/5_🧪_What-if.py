@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src import instrument, maintenance
+from src.analytics import (
+    DEFAULT_SCORE_RULES,
+    MAX_SWEEP_COMBOS,
+    best_of_sweep,
+    composite_score,
+    sweep_grid,
+    weight_grid,
+)
+from src.charts import time_series
+from src.repo import init_db, to_dataframe
+from src.utils import apply_theme_css
+
+st.set_page_config(page_title="What-if", page_icon="🧪", layout="wide")
+instrument.begin_page("What-if")
+init_db()
+maintenance.start()
+apply_theme_css()
+
+st.title("What-if scoring")
+st.caption("Score the whole history under every weight and target combination at once, then rank them.")
+
+df = to_dataframe()
+if df.empty:
+    st.info("No data yet.")
+    instrument.end_page()
+    st.stop()
+
+rules = st.session_state.get("score_rules", DEFAULT_SCORE_RULES)
+
+c1, c2 = st.columns(2)
+step = c1.select_slider("Weight step", options=[0.25, 0.1, 0.05, 0.02], value=0.05)
+goal = c2.radio("Rank by", ["Tracks productive hours", "Matches my goals"], horizontal=True)
+
+targets = []
+with st.expander("Targets to try (value that scores 1, or 0 for sugar)", expanded=False):
+    for r in DEFAULT_SCORE_RULES:
+        a, b, n = st.columns([2, 2, 1])
+        lo = a.number_input(f"{r.column} from", value=float(r.high) * 0.5, key=f"lo-{r.column}")
+        hi = b.number_input(f"{r.column} to", value=float(r.high) * 1.5, key=f"hi-{r.column}")
+        k = n.number_input("steps", min_value=1, max_value=25, value=5, key=f"n-{r.column}")
+        targets.append(np.linspace(lo, max(hi, lo), int(k)))
+highs = np.stack(np.meshgrid(*targets, indexing="ij"), axis=-1).reshape(-1, len(targets))
+grid = weight_grid(len(DEFAULT_SCORE_RULES), step)
+total = len(grid) * len(highs)
+weights, highs = sweep_grid(grid, highs, limit=MAX_SWEEP_COMBOS)
+if total > MAX_SWEEP_COMBOS:
+    st.warning(f"{total:,} combinations is too many to score; ranking a random {MAX_SWEEP_COMBOS:,} of them. "
+               "Use a coarser weight step or fewer target steps to cover them all.")
+
+if goal == "Tracks productive hours":
+    ranked, result = best_of_sweep(df, weights, highs, df["productive_hours"].to_numpy(), "corr",
+                                   rules=DEFAULT_SCORE_RULES)
+else:
+    g1, g2, g3 = st.columns(3)
+    goal_hours = g1.number_input("Productive hours goal", value=4.0, step=0.5)
+    water_goal = g2.number_input("Water goal (ml)", value=2000, step=250)
+    threshold = g3.slider("Score counted as a good day", 0.0, 1.0, 0.5, 0.05)
+    met = (df["productive_hours"] >= goal_hours) & (df["water_ml"] >= water_goal)
+    ranked, result = best_of_sweep(df, weights, highs, met.to_numpy(), "agreement", threshold,
+                                   rules=DEFAULT_SCORE_RULES)
+
+st.metric("Combinations scored", f"{len(weights):,}")
+st.dataframe(ranked, width="stretch")
+
+best = int(ranked.index[0])
+compare = pd.DataFrame({
+    "date": df["date"].to_numpy(),
+    "current": composite_score(df, rules).to_numpy(),
+    "best": result.scores[best],
+})
+st.plotly_chart(time_series(compare, ["current", "best"]), width="stretch")
+
+if st.button("Use best combination on the Dashboard"):
+    st.session_state["score_rules"] = result.rules_for(best)
+    st.success("Dashboard scores now use the best combination for this session.")
+
+instrument.end_page()
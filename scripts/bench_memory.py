@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Ensure project root on path when running from scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src import analytics, frames  # noqa: E402
+
+
+def legacy_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """A frame laid out the way the repo used to return it (Sheets flavour)."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("1900-01-01", periods=rows, freq="D")
+    stamps = (dates + pd.Timedelta(hours=21)).strftime("%Y-%m-%dT%H:%M:%S")
+    notes = np.array(["", "gym", "long day at work", "slept badly, coffee x3"], dtype=object)
+    return pd.DataFrame({
+        "date": dates,
+        "sugar_intake_g": rng.integers(0, 150, rows),
+        "water_ml": rng.integers(500, 4000, rows),
+        "fap_count": rng.integers(0, 3, rows),
+        "productive_hours": rng.integers(0, 25, rows) / 2.0,
+        "weight_kg": np.round(rng.normal(75, 2, rows), 1),
+        "notes": notes[rng.integers(0, len(notes), rows)],
+        "created_at": stamps,
+        "updated_at": stamps,
+    })
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, (time.perf_counter() - t0) * 1000.0
+
+
+def main():
+    p = argparse.ArgumentParser(description="Memory of the day frame before/after compact dtypes.")
+    p.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = p.parse_args()
+
+    print(f"{'rows':>10}{'legacy MB':>12}{'compact MB':>12}{'saved':>8}{'resample ms':>14}{'(legacy)':>10}")
+    for n in args.rows:
+        legacy = legacy_frame(n)
+        before = frames.memory_bytes(legacy)
+        compact = frames.compact(legacy.copy())
+        after = frames.memory_bytes(compact)
+        # Same answers from both layouts, or the benchmark is meaningless.
+        ref, t_legacy = _timed(analytics.resample, legacy, "M", None, ["sum", "mean", "max"])
+        got, t_compact = _timed(analytics.resample, compact, "M", None, ["sum", "mean", "max"])
+        pd.testing.assert_frame_equal(ref, got)
+        print(f"{n:>10,}{before / 1e6:>12.1f}{after / 1e6:>12.1f}{1 - after / before:>8.0%}"
+              f"{t_compact:>14.1f}{t_legacy:>10.1f}")
+    print("dtypes:", ", ".join(f"{c}={t}" for c, t in compact.dtypes.items()))
+
+
+if __name__ == "__main__":
+    main()
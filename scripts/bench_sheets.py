@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+# Ensure project root on path when running from scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.sheets_repo import HEADERS, GoogleSheetRepo, SheetsConfig  # noqa: E402
+from src.sheets_sim import SimClient, SimConfig  # noqa: E402
+
+START = date(2020, 1, 1)
+
+
+def _row(d: date, i: int) -> list:
+    stamp = f"{d.isoformat()}T21:00:00Z"
+    return [d.isoformat(), i % 150, 500 + i % 3500, i % 3, (i % 25) / 2.0, "", "", stamp, stamp]
+
+
+def seeded_repo(rows: int, cfg: SimConfig):
+    client = SimClient(cfg)
+    client.open_by_key("bench").add_worksheet("DailyMetrics", rows=rows + 1, cols=len(HEADERS)).load(
+        [HEADERS] + [_row(START + timedelta(days=i), i) for i in range(rows)]
+    )
+    repo = GoogleSheetRepo(SheetsConfig("bench"), client=client)
+    return repo, client
+
+
+def operations(rows: int):
+    last = START + timedelta(days=rows - 1)
+    new = START + timedelta(days=rows)
+    payload = {"date": last, "sugar_intake_g": 1, "water_ml": 2000, "fap_count": 0, "productive_hours": 5.0}
+    return [
+        ("to_dataframe", lambda r: r.to_dataframe()),
+        ("to_dataframe (30d)", lambda r: r.to_dataframe(last - timedelta(days=29), last)),
+        ("get_day (last)", lambda r: r.get_day(last)),
+        ("get_day (missing)", lambda r: r.get_day(new + timedelta(days=1))),
+        ("upsert (update)", lambda r: r.upsert_day(dict(payload))),
+        ("upsert (unchanged)", lambda r: r.upsert_day(dict(payload))),
+        ("upsert (insert)", lambda r: r.upsert_day(dict(payload, date=new))),
+        ("delete_day", lambda r: r.delete_day(new)),
+    ]
+
+
+def main():
+    p = argparse.ArgumentParser(description="Round trips and simulated time per Sheets repo operation.")
+    p.add_argument("--rows", type=int, nargs="+", default=[100, 1_000, 10_000])
+    p.add_argument("--latency-ms", type=float, default=120.0)
+    p.add_argument("--per-cell-ms", type=float, default=0.002)
+    p.add_argument("--archive", action="store_true", help="move old months to the yearly archives first")
+    args = p.parse_args()
+    cfg = SimConfig(latency_ms=args.latency_ms, per_cell_ms=args.per_cell_ms,
+                    read_quota_per_min=None, write_quota_per_min=None)
+
+    print(f"{'rows':>8}  {'operation':<20}{'calls':>6}{'reads':>6}{'writes':>7}{'cells':>9}{'sim ms':>10}")
+    for n in args.rows:
+        repo, client = seeded_repo(n, cfg)
+        if args.archive:
+            repo.archive(START + timedelta(days=n))
+        # Operations run in order on one sheet: the update/unchanged/insert/delete
+        # sequence leaves it as it started.
+        for name, op in operations(n):
+            client.reset_stats()
+            op(repo)
+            st = client.stats
+            print(f"{n:>8,}  {name:<20}{st.round_trips:>6}{st.reads:>6}{st.writes:>7}{st.cells:>9,}{st.simulated_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+# Ensure project root on path when running from scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src import db  # noqa: E402
+
+START = date(2025, 9, 22)
+DAYS = 100
+
+
+def _payload(rng: random.Random) -> dict:
+    return {
+        "date": START + timedelta(days=rng.randrange(DAYS)),
+        "sugar_intake_g": rng.randrange(0, 150),
+        "water_ml": rng.randrange(500, 4000),
+        "fap_count": rng.randrange(0, 3),
+        "productive_hours": round(rng.uniform(0, 10), 1),
+        "weight_kg": round(rng.uniform(70, 80), 1),
+    }
+
+
+def session(k: int, ops: int, write_ratio: float, lat: dict, errors: list) -> None:
+    """One simulated browser session: Calendar/Dashboard reads mixed with saves."""
+    from src import repo
+
+    rng = random.Random(k)
+    for _ in range(ops):
+        r = rng.random()
+        # Arguments are drawn here and bound as defaults, so each closure keeps its own.
+        d = START + timedelta(days=rng.randrange(DAYS))
+        if r < write_ratio * 0.9:
+            kind, fn = "upsert", lambda p=_payload(rng): repo.upsert_day(p)
+        elif r < write_ratio:
+            kind, fn = "delete", lambda d=d: repo.delete_day(d)
+        elif r < write_ratio + (1 - write_ratio) / 2:
+            kind, fn = "read_month", lambda d=d: repo.get_month(d.year, d.month)
+        else:
+            kind, fn = "read_day", lambda d=d: repo.get_day(d)
+        t0 = time.perf_counter()
+        try:
+            fn()
+        except Exception as exc:  # e.g. "database is locked" without the writer
+            errors.append(f"{kind}: {exc}")
+            continue
+        lat[kind].append((time.perf_counter() - t0) * 1000.0)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Simulate concurrent app sessions against a scratch SQLite DB.")
+    p.add_argument("--sessions", type=int, default=16)
+    p.add_argument("--ops", type=int, default=100, help="operations per session")
+    p.add_argument("--write-ratio", type=float, default=0.3)
+    p.add_argument("--no-writer", action="store_true", help="each session commits on its own (HABITS_SINGLE_WRITER=0)")
+    p.add_argument("--db", type=Path, default=None, help="database file (default: a temporary one)")
+    args = p.parse_args()
+
+    if args.no_writer:
+        os.environ["HABITS_SINGLE_WRITER"] = "0"
+    tmp = None
+    if args.db is None:
+        tmp = tempfile.TemporaryDirectory()
+        args.db = Path(tmp.name) / "habits.db"
+    db.DB_PATH = args.db
+    db.reset_engine()
+
+    from scripts.seed_sample_data import generate
+    from src import repo
+
+    repo.init_db()
+    repo.import_frame(generate(START, START + timedelta(days=DAYS - 1)), drop_conflicts=True)
+
+    kinds = ("upsert", "delete", "read_month", "read_day")
+    lat = {k: [] for k in kinds}
+    errors: list = []
+    threads = [
+        threading.Thread(target=session, args=(k, args.ops, args.write_ratio, lat, errors))
+        for k in range(args.sessions)
+    ]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    done = sum(len(v) for v in lat.values())
+    print(f"{args.sessions} sessions x {args.ops} ops, write ratio {args.write_ratio:.0%}, "
+          f"writer {'off' if args.no_writer else 'on'}")
+    print(f"throughput: {done / elapsed:,.0f} ops/s ({done} ok, {len(errors)} failed in {elapsed:.2f}s)")
+    print(f"{'op':<12}{'n':>7}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for k in kinds:
+        if lat[k]:
+            a = np.asarray(lat[k])
+            print(f"{k:<12}{len(a):>7}{np.percentile(a, 50):>10.2f}{np.percentile(a, 99):>10.2f}{a.max():>10.2f}")
+    stats = repo.writer_stats()
+    if stats:
+        print(f"group commits: {stats['batches']} for {stats['jobs']} writes (largest {stats['largest']})")
+    for e in errors[:5]:
+        print("error:", e)
+    if tmp is not None:
+        db.reset_engine()
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
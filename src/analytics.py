@@ -1,53 +1,156 @@
 from __future__ import annotations
 
+import calendar
+from dataclasses import dataclass, replace
+from datetime import date
+from typing import Optional, Sequence, Tuple
+
 import numpy as np
 import pandas as pd
 
+from .frames import widen
+from .instrument import timed
+
 
+@timed("analytics")
 def add_rolling(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df
-    df = df.sort_values("date").copy()
-    df["prod_7"] = df["productive_hours"].rolling(7, min_periods=1).mean()
-    df["prod_30"] = df["productive_hours"].rolling(30, min_periods=1).mean()
+    df = df.sort_values("date")
+    prod = df["productive_hours"].astype(np.float64)
+    df["prod_7"] = prod.rolling(7, min_periods=1).mean()
+    df["prod_30"] = prod.rolling(30, min_periods=1).mean()
     return df
 
 
+METRICS = ["sugar_intake_g", "water_ml", "fap_count", "productive_hours", "weight_kg"]
+AGGREGATIONS = ("sum", "mean", "min", "max", "count", "coverage")
+WEEKDAYS = ("MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN")
+
+# 1970-01-01 (day 0 of datetime64[D]) was a Thursday.
+_EPOCH_WEEKDAY = 3
+
+
+def bucket_starts(
+    dates: pd.Series,
+    freq: str | int = "W",
+    anchor: str = "MON",
+    origin: Optional[date] = None,
+) -> np.ndarray:
+    """Bucket start day for every date, using integer day arithmetic only.
+
+    ``freq`` is ``"D"``, ``"W"`` (weeks start on ``anchor``), ``"M"`` or a
+    number of days for custom buckets counted from ``origin`` (default: the
+    Monday 1970-01-05).
+    """
+    days = pd.to_datetime(dates).to_numpy(dtype="datetime64[D]")
+    if freq == "D":
+        return days
+    if freq == "W":
+        start = WEEKDAYS.index(anchor.upper()[:3])
+        weekday = (days.astype(np.int64) + _EPOCH_WEEKDAY) % 7
+        return days - ((weekday - start) % 7).astype("timedelta64[D]")
+    if freq == "M":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    n = int(freq)
+    if n < 1:
+        raise ValueError(f"bucket size must be positive: {freq}")
+    base = np.datetime64(origin or date(1970, 1, 5), "D")
+    offset = (days - base).astype(np.int64)
+    return base + ((offset // n) * n).astype("timedelta64[D]")
+
+
+def _bucket_lengths(starts: np.ndarray, freq: str | int) -> np.ndarray:
+    if freq == "D":
+        return np.ones(len(starts), dtype=np.int64)
+    if freq == "W":
+        return np.full(len(starts), 7, dtype=np.int64)
+    if freq == "M":
+        month = starts.astype("datetime64[M]")
+        return ((month + 1).astype("datetime64[D]") - starts).astype(np.int64)
+    return np.full(len(starts), int(freq), dtype=np.int64)
+
+
+@timed("analytics")
+def resample(
+    df: pd.DataFrame,
+    freq: str | int = "W",
+    metrics: Optional[Sequence[str]] = None,
+    aggs: str | Sequence[str] = "sum",
+    anchor: str = "MON",
+    origin: Optional[date] = None,
+) -> pd.DataFrame:
+    """Aggregate metrics into daily, weekly, monthly or custom-size buckets.
+
+    ``aggs`` is any of :data:`AGGREGATIONS`; ``coverage`` is the share of days
+    in the bucket with a value. A single aggregation keeps the metric names as
+    columns, a list of them produces ``<metric>_<agg>`` columns.
+    """
+    single = isinstance(aggs, str)
+    agg_list = [aggs] if single else list(aggs)
+    unknown = set(agg_list) - set(AGGREGATIONS)
+    if unknown:
+        raise ValueError(f"unknown aggregations: {sorted(unknown)}")
+    cols = [m for m in (metrics or METRICS) if m in df.columns]
+    out_cols = cols if single else [f"{m}_{a}" for m in cols for a in agg_list]
+    if df.empty:
+        return pd.DataFrame(columns=["bucket", *out_cols])
+
+    keys = bucket_starts(df["date"], freq, anchor, origin)
+    grouped = widen(df, cols).groupby(keys, sort=True)
+    pandas_aggs = [a for a in agg_list if a != "coverage"]
+    if "coverage" in agg_list and "count" not in pandas_aggs:
+        pandas_aggs.append("count")
+    res = grouped.agg(pandas_aggs)
+    starts = res.index.to_numpy(dtype="datetime64[D]")
+    if "coverage" in agg_list:
+        lengths = _bucket_lengths(starts, freq)
+        for m in cols:
+            res[(m, "coverage")] = res[(m, "count")].to_numpy() / lengths
+
+    out = pd.DataFrame({"bucket": pd.to_datetime(starts)})
+    for m in cols:
+        for a in agg_list:
+            out[m if single else f"{m}_{a}"] = res[(m, a)].to_numpy()
+    return out
+
+
+WEEKLY_COLUMNS = ["sugar_intake_g", "water_ml", "productive_hours", "fap_count"]
+
+
+@timed("analytics")
 def weekly_breakdown(df: pd.DataFrame) -> pd.DataFrame:
+    """Weekly (Monday-start) sums of the core metrics."""
     if df.empty:
         return df
-    df = df.copy()
-    df["week"] = df["date"].dt.to_period("W-MON").apply(lambda r: r.start_time)
-    agg = (
-        df.groupby("week")[
-            ["sugar_intake_g", "water_ml", "productive_hours", "fap_count"]
-        ]
-        .sum()
-        .reset_index()
-    )
-    return agg
+    return resample(df, "W", WEEKLY_COLUMNS, "sum").rename(columns={"bucket": "week"})
 
 
+@timed("analytics")
 def weekday_avg_productivity(df: pd.DataFrame) -> pd.Series:
+    """Mean productive hours by weekday name, Monday first; weekdays without data are left out."""
+    from .seasonality import build  # seasonality builds on this module
+
     if df.empty:
         return pd.Series(dtype=float)
-    df = df.copy()
-    df["weekday"] = df["date"].dt.day_name()
-    return df.groupby("weekday")["productive_hours"].mean()
+    means = build(df, ["productive_hours"]).matrix("weekday").iloc[0]
+    means.index = pd.Index(list(calendar.day_name), name="weekday")
+    return means.dropna().rename("productive_hours")
 
 
+@timed("analytics")
 def correlation_matrix(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return pd.DataFrame()
     cols = ["sugar_intake_g", "water_ml", "fap_count", "productive_hours", "weight_kg"]
-    numeric = df[cols].copy()
-    return numeric.corr(method="pearson")
+    return widen(df, cols).corr(method="pearson")
 
 
+@timed("analytics")
 def compute_streak(df: pd.DataFrame, goal_hours: float = 4.0, water_goal_ml: int = 2000) -> int:
     if df.empty:
         return 0
-    x = df.sort_values("date").copy()
+    x = df.sort_values("date")
     met = (x["productive_hours"] >= goal_hours) & (x["water_ml"] >= water_goal_ml)
     # Count from the last day backwards until first failure
     streak = 0
@@ -59,17 +162,210 @@ def compute_streak(df: pd.DataFrame, goal_hours: float = 4.0, water_goal_ml: int
     return streak
 
 
-def composite_score(df: pd.DataFrame) -> pd.Series:
+@dataclass(frozen=True)
+class ScoreRule:
+    """One term of the composite score: ``weight * normalise(column, low, high)``.
+
+    ``high`` doubles as the target: values at or beyond it score 1 (or 0 when
+    ``invert`` is set, for metrics where less is better).
+    """
+
+    column: str
+    weight: float
+    low: float
+    high: float
+    invert: bool = False
+
+
+DEFAULT_SCORE_RULES: Tuple[ScoreRule, ...] = (
+    ScoreRule("productive_hours", 0.5, 0.0, 12.0),
+    ScoreRule("water_ml", 0.35, 0.0, 4000.0),
+    ScoreRule("sugar_intake_g", 0.15, 0.0, 150.0, invert=True),
+)
+
+
+def _rule_values(df: pd.DataFrame, rules: Sequence[ScoreRule]) -> np.ndarray:
+    """``(days, rules)`` float64 matrix of the raw metric values."""
+    return np.column_stack([df[r.column].to_numpy(dtype=np.float64) for r in rules])
+
+
+@timed("analytics")
+def composite_score(
+    df: pd.DataFrame, rules: Sequence[ScoreRule] = DEFAULT_SCORE_RULES
+) -> pd.Series:
     if df.empty:
         return pd.Series(dtype=float)
-    x = df.copy()
-    # Normalize each metric to 0-1, invert sugar (less is better)
-    def norm(s, low, high):
-        s = s.clip(lower=low, upper=high)
-        return (s - low) / (high - low)
-
-    water = norm(x["water_ml"], 0, 4000)
-    prod = norm(x["productive_hours"], 0, 12)
-    sugar = 1 - norm(x["sugar_intake_g"], 0, 150)
-    score = (0.5 * prod) + (0.35 * water) + (0.15 * sugar)
-    return score.clip(0, 1)
+    score = np.zeros(len(df), dtype=np.float64)
+    for r in rules:
+        v = df[r.column].to_numpy(dtype=np.float64)
+        n = (np.clip(v, r.low, r.high) - r.low) / (r.high - r.low)
+        score = score + r.weight * (1 - n if r.invert else n)
+    return pd.Series(np.clip(score, 0, 1), index=df.index)
+
+
+def weight_grid(n_rules: int, step: float = 0.05) -> np.ndarray:
+    """All weight vectors on a ``step`` grid whose entries sum to 1."""
+    k = int(round(1 / step))
+    axes = np.indices((k + 1,) * (n_rules - 1)).reshape(n_rules - 1, -1).T
+    axes = axes[axes.sum(axis=1) <= k]
+    last = k - axes.sum(axis=1, keepdims=True)
+    return np.hstack([axes, last]) / k
+
+
+# Most weight/target combinations one sweep scores; larger grids are sampled.
+MAX_SWEEP_COMBOS = 20_000
+
+
+def sweep_grid(
+    weights: np.ndarray, highs: np.ndarray, limit: Optional[int] = None, seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Cartesian product of weight rows and target (``high``) rows.
+
+    When the product has more than ``limit`` rows, a fixed random sample of
+    ``limit`` of them is returned instead; the full product is never built.
+    """
+    weights = np.atleast_2d(weights)
+    highs = np.atleast_2d(highs)
+    total = len(weights) * len(highs)
+    if limit is not None and total > limit:
+        pick = np.sort(np.random.default_rng(seed).choice(total, size=limit, replace=False))
+        return weights[pick // len(highs)], highs[pick % len(highs)]
+    return (
+        np.repeat(weights, len(highs), axis=0),
+        np.tile(highs, (len(weights), 1)),
+    )
+
+
+@dataclass
+class SweepResult:
+    rules: Tuple[ScoreRule, ...]
+    weights: np.ndarray  # (combos, rules)
+    highs: np.ndarray  # (combos, rules)
+    scores: np.ndarray  # (combos, days)
+
+    def combos(self) -> pd.DataFrame:
+        cols = {f"w_{r.column}": self.weights[:, j] for j, r in enumerate(self.rules)}
+        cols.update({f"target_{r.column}": self.highs[:, j] for j, r in enumerate(self.rules)})
+        return pd.DataFrame(cols)
+
+    def rules_for(self, i: int) -> Tuple[ScoreRule, ...]:
+        return tuple(
+            replace(r, weight=float(self.weights[i, j]), high=float(self.highs[i, j]))
+            for j, r in enumerate(self.rules)
+        )
+
+
+# Cap on the (combos x days x rules) temporary so large sweeps run in chunks.
+SWEEP_CHUNK_ELEMENTS = 4_000_000
+
+
+@timed("analytics")
+def score_sweep(
+    df: pd.DataFrame,
+    weights: np.ndarray,
+    highs: Optional[np.ndarray] = None,
+    rules: Sequence[ScoreRule] = DEFAULT_SCORE_RULES,
+) -> SweepResult:
+    """Score every day under many weight/target combinations at once.
+
+    ``weights`` is ``(combos, rules)``; ``highs`` is ``(combos, rules)``, a
+    single row, or None for the rules' own targets. Returns a
+    ``(combos, days)`` score matrix built by broadcasting, no per-combo loop.
+    """
+    rules = tuple(rules)
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    base_high = np.array([r.high for r in rules], dtype=np.float64)
+    highs_arr = base_high if highs is None else np.asarray(highs, dtype=np.float64)
+    highs_arr = np.broadcast_to(highs_arr, weights.shape)
+    low = np.array([r.low for r in rules], dtype=np.float64)
+    invert = np.array([r.invert for r in rules])
+    values = _rule_values(df, rules)  # (days, rules)
+
+    if highs is None or (highs_arr == highs_arr[0]).all():
+        # Targets fixed: normalise once, then one matrix product.
+        n = (np.clip(values, low, highs_arr[0]) - low) / (highs_arr[0] - low)
+        n = np.where(invert, 1 - n, n)
+        scores = weights @ n.T
+    else:
+        scores = np.empty((len(weights), len(values)), dtype=np.float64)
+        step = max(1, SWEEP_CHUNK_ELEMENTS // max(1, values.size))
+        for a in range(0, len(weights), step):
+            hi = highs_arr[a:a + step, None, :]  # (chunk, 1, rules)
+            n = (np.clip(values[None, :, :], low, hi) - low) / (hi - low)
+            n = np.where(invert, 1 - n, n)
+            scores[a:a + step] = np.einsum("cdr,cr->cd", n, weights[a:a + step])
+    return SweepResult(rules, weights, np.array(highs_arr), np.clip(scores, 0, 1))
+
+
+@timed("analytics")
+def rank_sweep(
+    result: SweepResult,
+    reference: np.ndarray,
+    method: str = "corr",
+    threshold: float = 0.5,
+) -> pd.DataFrame:
+    """Rank combinations against a per-day reference.
+
+    ``corr``: Pearson correlation of each score row with a numeric reference
+    (e.g. productive hours). ``agreement``: share of days where
+    ``score >= threshold`` matches a boolean reference (e.g. goals met).
+    """
+    ref = np.asarray(reference)
+    scores = result.scores
+    if method == "corr":
+        ref = ref.astype(np.float64)
+        sc = scores - scores.mean(axis=1, keepdims=True)
+        rc = ref - ref.mean()
+        denom = np.sqrt((sc * sc).sum(axis=1) * (rc * rc).sum())
+        with np.errstate(invalid="ignore", divide="ignore"):
+            metric = np.where(denom > 0, sc @ rc / denom, np.nan)
+    elif method == "agreement":
+        metric = ((scores >= threshold) == ref.astype(bool)[None, :]).mean(axis=1)
+    else:
+        raise ValueError(f"unknown ranking method: {method}")
+    out = result.combos()
+    out[method] = metric
+    out["mean_score"] = scores.mean(axis=1)
+    return out.sort_values(method, ascending=False, na_position="last")
+
+
+@timed("analytics")
+def best_of_sweep(
+    df: pd.DataFrame,
+    weights: np.ndarray,
+    highs: Optional[np.ndarray],
+    reference: np.ndarray,
+    method: str = "corr",
+    threshold: float = 0.5,
+    rules: Sequence[ScoreRule] = DEFAULT_SCORE_RULES,
+    k: int = 20,
+) -> Tuple[pd.DataFrame, SweepResult]:
+    """:func:`score_sweep` + :func:`rank_sweep`, keeping only the ``k`` best combinations.
+
+    Combinations are scored a chunk at a time and each chunk is cut to its
+    top ``k``, so memory stays at ``chunk + k`` score rows however large the
+    sweep. Returns the ranking and a result holding just those rows (the
+    ranking's index points into it).
+    """
+    rules = tuple(rules)
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    highs = None if highs is None else np.broadcast_to(np.asarray(highs, dtype=np.float64), weights.shape)
+    step = max(k, SWEEP_CHUNK_ELEMENTS // max(1, len(df) * len(rules)))
+    best: Optional[pd.DataFrame] = None
+    kept = SweepResult(rules, weights[:0], weights[:0], np.empty((0, len(df))))
+    for a in range(0, len(weights), step):
+        chunk = score_sweep(df, weights[a:a + step], None if highs is None else highs[a:a + step], rules)
+        top = rank_sweep(chunk, reference, method, threshold).head(k)
+        rows = top.index.to_numpy()
+        kept = SweepResult(
+            rules,
+            np.vstack([kept.weights, chunk.weights[rows]]),
+            np.vstack([kept.highs, chunk.highs[rows]]),
+            np.vstack([kept.scores, chunk.scores[rows]]),
+        )
+        top = top.reset_index(drop=True)
+        best = top if best is None else pd.concat([best, top], ignore_index=True)
+        order = best.sort_values(method, ascending=False, na_position="last", kind="stable").index[:k].to_numpy()
+        best = best.loc[order].reset_index(drop=True)
+        kept = SweepResult(rules, kept.weights[order], kept.highs[order], kept.scores[order])
+    return (best if best is not None else pd.DataFrame()), kept
@@ -0,0 +1,219 @@
+"""Streaming anomaly detection over the daily metrics.
+
+Each metric keeps a small, fixed-size state: an EWMA mean and variance plus
+the last :data:`WINDOW` values for a rolling median/MAD. A new day is scored
+against the state *before* it, then folded in, so appending a day costs O(1).
+:func:`score_history` computes the same scores for a whole history with
+vectorized NumPy/pandas and yields the state to resume from.
+
+In SQLite mode the repo calls :func:`sync` at the end of its write
+transactions and keeps flagged days in the ``anomalies`` table.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import delete, insert, select
+
+from . import derived
+from .instrument import timed
+from .models import Anomaly, DailyMetrics
+
+ANOMALY_METRICS = ("sugar_intake_g", "water_ml", "productive_hours")
+WINDOW = 14  # days of history before a metric is scored
+ALPHA = 0.1  # EWMA smoothing
+THRESHOLD = 3.5  # |score| at or above this is flagged
+STATE_KEY = "anomaly"
+ANOMALY_COLUMNS = ["date", "metric", "value", "score"]
+
+_MAD_SCALE = 0.6745  # makes MAD comparable to a standard deviation
+
+
+def _ewm_step(prev: float, x: float) -> float:
+    # The adjust=False recursion exactly as pandas evaluates it, so both paths agree.
+    if prev != x:
+        prev = ((1 - ALPHA) * prev + ALPHA * x) / ((1 - ALPHA) + ALPHA)
+    return prev
+
+
+def _score(x: float, mean: float, var: float, med: float, mad: float) -> float:
+    if mad > 0:
+        return _MAD_SCALE * (x - med) / mad
+    # Flat window (e.g. the same water every day): fall back to the EWMA z-score.
+    sd = math.sqrt(var)
+    return (x - mean) / sd if sd > 0 else 0.0
+
+
+@dataclass
+class MetricState:
+    n: int = 0
+    mean: float = 0.0
+    var: float = 0.0
+    window: List[float] = field(default_factory=list)  # last WINDOW values, oldest first
+
+    def score(self, x: float) -> float:
+        """Score ``x`` against the history so far (NaN while warming up)."""
+        if self.n < WINDOW:
+            return math.nan
+        w = np.asarray(self.window, dtype=float)
+        med = float(np.median(w))
+        mad = float(np.median(np.abs(w - med)))
+        return _score(x, self.mean, self.var, med, mad)
+
+    def update(self, x: float) -> None:
+        if self.n == 0:
+            self.mean, self.var = x, 0.0
+        else:
+            d = x - self.mean
+            self.mean = _ewm_step(self.mean, x)
+            self.var = _ewm_step(self.var, (1 - ALPHA) * d * d)
+        self.window = (self.window + [x])[-WINDOW:]
+        self.n += 1
+
+
+@dataclass
+class Detector:
+    states: Dict[str, MetricState] = field(default_factory=lambda: {m: MetricState() for m in ANOMALY_METRICS})
+    last_date: Optional[date] = None
+
+    def observe(self, day: date, values: Mapping[str, float]) -> Dict[str, float]:
+        """Score one new day (after ``last_date``) and fold it into the state."""
+        scores = {}
+        for m, st in self.states.items():
+            x = float(values[m])
+            scores[m] = st.score(x)
+            st.update(x)
+        self.last_date = day
+        return scores
+
+    def to_dict(self) -> dict:
+        return {
+            "last_date": self.last_date.isoformat() if self.last_date else None,
+            "states": {m: vars(st) for m, st in self.states.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "Detector":
+        last = raw.get("last_date")
+        return cls(
+            {m: MetricState(**st) for m, st in raw["states"].items()},
+            date.fromisoformat(last) if last else None,
+        )
+
+
+def flagged(scores: Mapping[str, float]) -> Dict[str, float]:
+    return {m: s for m, s in scores.items() if not math.isnan(s) and abs(s) >= THRESHOLD}
+
+
+def _batch(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Scores, EWMA means and variances (after each day) for one metric."""
+    n = len(x)
+    mean = pd.Series(x).ewm(alpha=ALPHA, adjust=False).mean().to_numpy()
+    d = np.zeros(n)
+    d[1:] = x[1:] - mean[:-1]
+    var = pd.Series((1 - ALPHA) * d * d).ewm(alpha=ALPHA, adjust=False).mean().to_numpy()
+    scores = np.full(n, np.nan)
+    if n > WINDOW:
+        windows = sliding_window_view(x, WINDOW)[: n - WINDOW]  # windows[i] precedes day i + WINDOW
+        med = np.median(windows, axis=1)
+        mad = np.median(np.abs(windows - med[:, None]), axis=1)
+        cur = x[WINDOW:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            robust = _MAD_SCALE * (cur - med) / mad
+            sd = np.sqrt(var[WINDOW - 1: n - 1])
+            ewz = np.where(sd > 0, (cur - mean[WINDOW - 1: n - 1]) / sd, 0.0)
+        scores[WINDOW:] = np.where(mad > 0, robust, ewz)
+    return scores, mean, var
+
+
+def _state_at(x: np.ndarray, mean: np.ndarray, var: np.ndarray, i: int) -> MetricState:
+    """State after observing ``x[i]``."""
+    return MetricState(i + 1, float(mean[i]), float(var[i]), [float(v) for v in x[max(0, i - WINDOW + 1): i + 1]])
+
+
+@timed("anomaly")
+def score_history(df: pd.DataFrame) -> Tuple[pd.DataFrame, Detector, Optional[Detector]]:
+    """Score every day of ``df`` at once.
+
+    Returns the scores (``date``, ``metric``, ``value``, ``score``; NaN while
+    warming up), the detector after the last day and the detector before it.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=ANOMALY_COLUMNS), Detector(), None
+    df = df.sort_values("date")
+    days = pd.to_datetime(df["date"]).dt.date.to_numpy()
+    n = len(df)
+    frames, current, previous = [], {}, {}
+    for m in ANOMALY_METRICS:
+        x = df[m].to_numpy(dtype=float)
+        scores, mean, var = _batch(x)
+        frames.append(pd.DataFrame({"date": days, "metric": m, "value": x, "score": scores}))
+        current[m] = _state_at(x, mean, var, n - 1)
+        previous[m] = _state_at(x, mean, var, n - 2) if n > 1 else MetricState()
+    out = pd.concat(frames, ignore_index=True)
+    return out, Detector(current, days[-1]), Detector(previous, days[-2] if n > 1 else None)
+
+
+def flagged_frame(scores: pd.DataFrame) -> pd.DataFrame:
+    keep = scores["score"].abs().to_numpy() >= THRESHOLD  # NaN compares False
+    return scores.loc[keep, ANOMALY_COLUMNS].sort_values(["date", "metric"]).reset_index(drop=True)
+
+
+# -- SQLite maintenance (called by the repo inside its transactions) ----------
+
+
+def _save(s, current: Detector, previous: Optional[Detector]) -> None:
+    derived.save(s, STATE_KEY, {"current": current.to_dict(), "previous": previous.to_dict() if previous else None})
+
+
+@timed("anomaly")
+def backfill(s) -> None:
+    """Rescore the whole history (vectorized) and store the flags and state."""
+    s.flush()
+    rows = s.execute(select(DailyMetrics.date, *(getattr(DailyMetrics, m) for m in ANOMALY_METRICS))).all()
+    df = pd.DataFrame(rows, columns=["date", *ANOMALY_METRICS])
+    scores, current, previous = score_history(df)
+    s.execute(delete(Anomaly))
+    flags = flagged_frame(scores)
+    if not flags.empty:
+        s.execute(insert(Anomaly), flags.to_dict("records"))
+    _save(s, current, previous)
+
+
+@timed("anomaly")
+def sync(s) -> None:
+    """Bring the stored flags up to date with the change log.
+
+    New days (or a re-edit of the newest one) are scored in O(1) each;
+    anything else falls back to :func:`backfill`.
+    """
+    plan = derived.resume(s, STATE_KEY)
+    if plan is None:
+        backfill(s)
+        return
+    if not plan.rows:
+        return
+    current = Detector.from_dict(plan.state)
+    s.execute(delete(Anomaly).where(Anomaly.date.in_([r.date for r in plan.rows])))
+    flags = []
+    for rec in plan.rows:
+        previous = Detector.from_dict(current.to_dict())
+        scores = current.observe(rec.date, {m: getattr(rec, m) for m in ANOMALY_METRICS})
+        flags += [
+            {"date": rec.date, "metric": m, "value": float(getattr(rec, m)), "score": sc}
+            for m, sc in flagged(scores).items()
+        ]
+    if flags:
+        s.execute(insert(Anomaly), flags)
+    _save(s, current, previous)
+
+
+def read(s) -> pd.DataFrame:
+    rows = s.execute(select(Anomaly).order_by(Anomaly.date, Anomaly.metric)).scalars()
+    return pd.DataFrame([{c: getattr(r, c) for c in ANOMALY_COLUMNS} for r in rows], columns=ANOMALY_COLUMNS)
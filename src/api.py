@@ -0,0 +1,338 @@
+"""Small JSON-over-HTTP API on top of :mod:`src.repo` (stdlib WSGI, no framework).
+
+Routes::
+
+    GET    /api/version                 data version and last change
+    GET    /api/days?after=&limit=&start=&end=&order=   keyset-paginated days (order: asc|desc)
+    GET    /api/days/<date>
+    PUT    /api/days/<date>             JSON body with any payload fields
+    DELETE /api/days/<date>
+    GET    /api/breakdown?freq=W&aggs=sum,mean&metrics=...&start=&end=
+    GET    /api/summary
+
+GET responses carry a weak ETag derived from the data version plus the
+request, and Last-Modified from the change log, so polling clients get
+``304 Not Modified`` until something changes. Bodies are gzip-compressed
+when the client accepts it. Set ``HABITS_API_TOKEN`` to require
+``Authorization: Bearer <token>``.
+
+Run with ``python -m src.api --port 8765``; tests call :func:`app` directly.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import hmac
+import json
+import math
+import os
+from datetime import date, datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http import HTTPStatus
+from socketserver import ThreadingMixIn
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIServer, make_server
+
+import pandas as pd
+
+from . import repo
+from .analytics import AGGREGATIONS, METRICS, resample, weekday_avg_productivity
+from .changes import last_changed_at
+from .instrument import timed
+
+MAX_PAGE = 500
+MAX_FREQ_DAYS = 366
+GZIP_MIN_BYTES = 256
+_FIELDS = ["sugar_intake_g", "water_ml", "fap_count", "productive_hours", "weight_kg", "notes"]
+
+Headers = List[Tuple[str, str]]
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_value(v: Any) -> Any:
+    if v is None or v is pd.NA or v is pd.NaT or (isinstance(v, float) and math.isnan(v)):
+        return None
+    if isinstance(v, pd.Timestamp):
+        return v.date().isoformat() if v == v.normalize() else v.isoformat()
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    if hasattr(v, "item"):  # NumPy scalars
+        return _json_value(v.item())
+    return v
+
+
+def _records(df: pd.DataFrame, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    if df.empty:
+        return []
+    cols = [c for c in (columns or df.columns) if c in df.columns]
+    return [
+        {c: _json_value(v) for c, v in zip(cols, row, strict=True)}
+        for row in df[cols].itertuples(index=False)
+    ]
+
+
+def _day_dict(rec: Any) -> Dict[str, Any]:
+    return {"date": _json_value(rec.date), **{f: _json_value(getattr(rec, f, None)) for f in _FIELDS}}
+
+
+def _parse_date(raw: Optional[str], name: str) -> Optional[date]:
+    if raw in (None, ""):
+        return None
+    try:
+        return date.fromisoformat(raw)  # type: ignore[arg-type]
+    except ValueError as exc:
+        raise ApiError(400, f"{name} must be an ISO date (YYYY-MM-DD), got {raw!r}") from exc
+
+
+def _list(raw: Optional[str], allowed: Iterable[str], name: str) -> Optional[List[str]]:
+    if not raw:
+        return None
+    items = [x for x in raw.split(",") if x]
+    unknown = sorted(set(items) - set(allowed))
+    if unknown:
+        raise ApiError(400, f"unknown {name}: {', '.join(unknown)}")
+    return items
+
+
+# -- handlers: (query, body) -> (status, payload) ----------------------------
+
+
+def _version(q: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    changed = last_changed_at()
+    return 200, {"version": repo.data_version(), "last_modified": _json_value(changed)}
+
+
+def _order(raw: Optional[str]) -> bool:
+    if raw in (None, "", "asc"):
+        return False
+    if raw == "desc":
+        return True
+    raise ApiError(400, "order must be 'asc' or 'desc'")
+
+
+def _days(q: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    try:
+        limit = min(max(int(q.get("limit", 100)), 1), MAX_PAGE)
+    except ValueError as exc:
+        raise ApiError(400, "limit must be an integer") from exc
+    page = repo.browse_days(
+        after=_parse_date(q.get("after"), "after"),
+        limit=limit,
+        start=_parse_date(q.get("start"), "start"),
+        end=_parse_date(q.get("end"), "end"),
+        descending=_order(q.get("order")),
+    )
+    return 200, {"items": _records(page.rows, ["date", *_FIELDS]), "next_after": _json_value(page.next_after)}
+
+
+def _get_day(q: Dict[str, str], body: Any, d: date) -> Tuple[int, Any]:
+    rec = repo.get_day(d)
+    if rec is None:
+        raise ApiError(404, f"no entry for {d.isoformat()}")
+    return 200, _day_dict(rec)
+
+
+def _put_day(q: Dict[str, str], body: Any, d: date) -> Tuple[int, Any]:
+    if not isinstance(body, dict):
+        raise ApiError(400, "body must be a JSON object")
+    unknown = sorted(set(body) - set(_FIELDS) - {"date"})
+    if unknown:
+        raise ApiError(400, f"unknown fields: {', '.join(unknown)}")
+    existing = repo.get_day(d)
+    base = {f: getattr(existing, f) for f in _FIELDS} if existing is not None else {}
+    payload = {**base, **body, "date": d}
+    try:
+        repo.upsert_day(payload)
+    except ValueError as exc:
+        raise ApiError(422, str(exc)) from exc
+    return (200 if existing is not None else 201), _day_dict(repo.get_day(d))
+
+
+def _delete_day(q: Dict[str, str], body: Any, d: date) -> Tuple[int, Any]:
+    if not repo.delete_day(d):
+        raise ApiError(404, f"no entry for {d.isoformat()}")
+    return 204, None
+
+
+def _breakdown(q: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    freq_raw = q.get("freq", "W")
+    freq: Any = int(freq_raw) if freq_raw.isdigit() else freq_raw.upper()
+    if freq not in ("D", "W", "M") and not (isinstance(freq, int) and 1 <= freq <= MAX_FREQ_DAYS):
+        raise ApiError(400, f"freq must be D, W, M or a number of days from 1 to {MAX_FREQ_DAYS}")
+    aggs = _list(q.get("aggs"), AGGREGATIONS, "aggregations") or ["sum"]
+    metrics = _list(q.get("metrics"), METRICS, "metrics")
+    start, end = _parse_date(q.get("start"), "start"), _parse_date(q.get("end"), "end")
+    if freq in ("W", "M"):
+        df = repo.get_rollup(freq, metrics, aggs, start, end)  # maintained rollups, O(buckets)
+    else:
+        days = repo.to_dataframe()
+        if not days.empty and (start or end):
+            day = days["date"].dt.date
+            days = days.loc[(day >= (start or date.min)) & (day <= (end or date.max))]
+        df = resample(days, freq, metrics, aggs)
+    return 200, {"freq": freq_raw, "aggs": aggs, "items": _records(df)}
+
+
+def _summary(q: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    df = repo.to_dataframe()
+    if df.empty:
+        return 200, {"days": 0}
+    weekday = weekday_avg_productivity(df)
+    week = repo.get_rollup("W", None, ["sum", "mean"]).tail(1)
+    return 200, {
+        "days": int(len(df)),
+        "first": _json_value(df["date"].min()),
+        "last": _json_value(df["date"].max()),
+        "streak": int(repo.goal_report().streak()),  # the goal-based streak the pages show
+        "weekday_avg_productivity": {k: _json_value(v) for k, v in weekday.items()},
+        "latest_week": _records(week)[0] if not week.empty else None,
+        "anomalies": _records(repo.get_anomalies().tail(10)),
+    }
+
+
+_ROUTES: Dict[Tuple[str, str], Callable[..., Tuple[int, Any]]] = {
+    ("GET", "/api/version"): _version,
+    ("GET", "/api/days"): _days,
+    ("GET", "/api/breakdown"): _breakdown,
+    ("GET", "/api/summary"): _summary,
+}
+_DAY_ROUTES: Dict[str, Callable[..., Tuple[int, Any]]] = {
+    "GET": _get_day,
+    "PUT": _put_day,
+    "DELETE": _delete_day,
+}
+
+
+def _dispatch(method: str, path: str, q: Dict[str, str], body: Any) -> Tuple[int, Any]:
+    path = path.rstrip("/") or "/"
+    handler = _ROUTES.get((method, path))
+    if handler is not None:
+        return handler(q, body)
+    if path.startswith("/api/days/"):
+        d = _parse_date(path[len("/api/days/"):], "date")
+        day_handler = _DAY_ROUTES.get(method)
+        if day_handler is None:
+            raise ApiError(405, f"{method} not allowed on {path}")
+        return day_handler(q, body, d)
+    if any(p == path for _, p in _ROUTES):
+        raise ApiError(405, f"{method} not allowed on {path}")
+    raise ApiError(404, f"no route for {path}")
+
+
+# -- HTTP plumbing -------------------------------------------------------------
+
+
+def _etag(version: str, path: str, query: str) -> str:
+    digest = hashlib.sha1(f"{version}|{path}?{query}".encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _not_modified(environ: dict, etag: str, modified: Optional[datetime]) -> bool:
+    inm = environ.get("HTTP_IF_NONE_MATCH")
+    if inm is not None:  # takes precedence over If-Modified-Since
+        tags = {t.strip() for t in inm.split(",")}
+        return "*" in tags or etag in tags or etag[2:] in tags
+    ims = environ.get("HTTP_IF_MODIFIED_SINCE")
+    if ims and modified is not None:
+        try:
+            since = parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            return False
+        return modified.replace(microsecond=0) <= since
+    return False
+
+
+def _authorized(environ: dict) -> bool:
+    token = os.getenv("HABITS_API_TOKEN")
+    if not token:
+        return True
+    given = environ.get("HTTP_AUTHORIZATION", "")
+    return hmac.compare_digest(given, f"Bearer {token}")
+
+
+def _read_body(environ: dict) -> Any:
+    try:
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        length = 0
+    if not length:
+        return None
+    raw = environ["wsgi.input"].read(length)
+    try:
+        return json.loads(raw)
+    except ValueError as exc:
+        raise ApiError(400, "body is not valid JSON") from exc
+
+
+@timed("api")
+def app(environ: dict, start_response: Callable) -> List[bytes]:
+    """The WSGI application."""
+    method = environ.get("REQUEST_METHOD", "GET").upper()
+    path = environ.get("PATH_INFO", "/")
+    query = environ.get("QUERY_STRING", "")
+    q = {k: v[-1] for k, v in parse_qs(query).items()}
+    headers: Headers = [("Vary", "Accept-Encoding")]
+
+    try:
+        if not _authorized(environ):
+            raise ApiError(401, "missing or wrong bearer token")
+        conditional = method in ("GET", "HEAD")
+        if conditional:
+            version = repo.data_version()
+            changed = last_changed_at()
+            modified = changed.replace(tzinfo=timezone.utc) if changed is not None else None
+            etag = _etag(version, path, "&".join(sorted(query.split("&"))))
+            headers.append(("ETag", etag))
+            headers.append(("Cache-Control", "no-cache"))
+            if modified is not None:
+                headers.append(("Last-Modified", format_datetime(modified, usegmt=True)))
+            if _not_modified(environ, etag, modified):
+                start_response("304 Not Modified", headers)
+                return []
+        status, payload = _dispatch("GET" if method == "HEAD" else method, path, q, _read_body(environ))
+    except (ApiError, ValueError) as exc:
+        # A ValueError that escapes a handler means a query value it could not use.
+        status, payload = getattr(exc, "status", 400), {"error": str(exc)}
+        headers = [h for h in headers if h[0] not in ("ETag", "Last-Modified", "Cache-Control")]
+
+    phrase = HTTPStatus(status).phrase
+    if payload is None:
+        start_response(f"{status} {phrase}", headers)
+        return []
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    if len(body) >= GZIP_MIN_BYTES and "gzip" in environ.get("HTTP_ACCEPT_ENCODING", ""):
+        body = gzip.compress(body, compresslevel=6)
+        headers.append(("Content-Encoding", "gzip"))
+    headers += [("Content-Type", "application/json"), ("Content-Length", str(len(body)))]
+    start_response(f"{status} {phrase}", headers)
+    return [] if method == "HEAD" else [body]
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765) -> None:
+    repo.init_db()
+    with make_server(host, port, app, server_class=_ThreadingWSGIServer) as httpd:
+        print(f"Serving habits API on http://{host}:{port}/api/")
+        httpd.serve_forever()
+
+
+def main():
+    p = argparse.ArgumentParser(description="Serve the habits JSON API.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    args = p.parse_args()
+    serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Change-data-capture over ``daily_metrics``.
+
+Every insert, update and delete appends a row to ``change_log`` (SQLite
+triggers; the repo records Sheets writes itself). Consumers keep a cursor and
+ask :func:`changes_since` for what happened after it, so incremental work is
+proportional to the change rather than to the table.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, select
+
+from .db import session_scope
+from .instrument import timed
+from .models import ChangeLogEntry
+
+
+@dataclass
+class Change:
+    id: int
+    date: date
+    op: str  # insert | update | delete (upsert when the backend cannot tell)
+    changed_at: datetime
+
+
+@dataclass
+class ChangeBatch:
+    changes: List[Change] = field(default_factory=list)
+    cursor: int = 0
+    has_more: bool = False
+    # True when entries after the caller's cursor were pruned: resync from scratch.
+    truncated: bool = False
+
+    @property
+    def dates(self) -> List[date]:
+        return [c.date for c in self.changes]
+
+
+def _compact(rows: List[ChangeLogEntry]) -> List[Change]:
+    """One change per date: the net effect of everything in the batch."""
+    first_op: dict = {}
+    last: dict = {}
+    for r in rows:
+        first_op.setdefault(r.date, r.op)
+        last[r.date] = r
+    out = []
+    for d, r in last.items():
+        op = r.op
+        if op != "delete" and first_op[d] == "insert":
+            op = "insert"
+        out.append(Change(r.id, d, op, r.changed_at))
+    return sorted(out, key=lambda c: c.id)
+
+
+def _sequence(s) -> int:
+    # sqlite_sequence survives pruning, so the cursor never goes backwards.
+    seq = s.connection().exec_driver_sql(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'change_log'"
+    ).scalar()
+    return int(seq or 0)
+
+
+@timed("changes")
+def changes_since(cursor: int = 0, limit: int = 500) -> ChangeBatch:
+    """Changes with id > ``cursor``, compacted per date, plus the next cursor.
+
+    New consumers should build from the table and start at :func:`latest_cursor`.
+    """
+    with session_scope() as s:
+        rows = list(
+            s.execute(
+                select(ChangeLogEntry)
+                .where(ChangeLogEntry.id > cursor)
+                .order_by(ChangeLogEntry.id)
+                .limit(limit + 1)
+            ).scalars()
+        )
+        if cursor > 0:
+            seq = _sequence(s)
+            oldest = s.execute(select(func.min(ChangeLogEntry.id))).scalar() or seq + 1
+            # Entries right after the cursor were pruned, or the cursor is from another database:
+            # the caller must rebuild from the table, then continue from the latest id.
+            if oldest > cursor + 1 or cursor > seq:
+                return ChangeBatch([], seq, False, True)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = rows[-1].id if rows else cursor
+    return ChangeBatch(_compact(rows), next_cursor, has_more)
+
+
+@timed("changes")
+def latest_cursor() -> int:
+    """Id of the newest change (0 when nothing was ever logged)."""
+    with session_scope() as s:
+        return _sequence(s)
+
+
+@timed("changes")
+def last_changed_at() -> Optional[datetime]:
+    """UTC time of the newest logged change (None if nothing was logged)."""
+    with session_scope() as s:
+        return s.execute(select(func.max(ChangeLogEntry.changed_at))).scalar()
+
+
+def record_changes(dates: Iterable[date], op: str) -> None:
+    """Log writes the database cannot see itself (e.g. Sheets via the outbox)."""
+    now = datetime.utcnow()
+    rows = [{"date": d, "op": op, "changed_at": now} for d in dates]
+    if rows:
+        with session_scope() as s:
+            s.execute(insert(ChangeLogEntry), rows)
+
+
+@timed("changes")
+def prune_changes(keep_days: int = 90) -> int:
+    """Drop log entries older than ``keep_days``; lagging consumers see ``truncated``."""
+    cutoff = datetime.utcnow() - timedelta(days=keep_days)
+    with session_scope() as s:
+        res = s.execute(delete(ChangeLogEntry).where(ChangeLogEntry.changed_at < cutoff))
+        return int(res.rowcount or 0)
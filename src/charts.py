@@ -1,9 +1,14 @@
 from __future__ import annotations
 
-import plotly.express as px
-import plotly.graph_objects as go
+from typing import TYPE_CHECKING, Iterable, Optional
+
 import pandas as pd
 
+from .instrument import timed
+
+if TYPE_CHECKING:  # plotly is imported by the first builder that runs
+    import plotly.graph_objects as go
+
 # Joel Maisel Color Palette alignment for charts
 JOEL_BG = "#373B4B"          # Navy Blazer (app background)
 JOEL_PANEL = "#444C38"       # Rifle Green (panels/plots)
@@ -29,7 +34,10 @@ BASE_LAYOUT = dict(
 )
 
 
+@timed("charts")
 def kpi_sparkline(df: pd.DataFrame, y: str) -> go.Figure:
+    import plotly.express as px
+
     fig = px.line(df, x="date", y=y, height=100)
     fig.update_layout(margin=dict(l=0, r=0, t=10, b=0), showlegend=False, **BASE_LAYOUT)
     fig.update_xaxes(visible=False)
@@ -37,10 +45,23 @@ def kpi_sparkline(df: pd.DataFrame, y: str) -> go.Figure:
     return fig
 
 
-def time_series(df: pd.DataFrame, y_cols: list[str]) -> go.Figure:
+@timed("charts")
+def time_series(df: pd.DataFrame, y_cols: list[str], forecast: Optional[pd.DataFrame] = None) -> go.Figure:
+    """Line per column; ``forecast`` (date, yhat, lower, upper) adds a dashed projection and band."""
+    import plotly.graph_objects as go
+
     fig = go.Figure()
     for col in y_cols:
         fig.add_trace(go.Scatter(x=df["date"], y=df[col], name=col, mode="lines+markers"))
+    if forecast is not None and not forecast.empty:
+        band = forecast.dropna(subset=["lower", "upper"])
+        if not band.empty:
+            fig.add_trace(go.Scatter(x=band["date"], y=band["upper"], mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip"))
+            fig.add_trace(go.Scatter(
+                x=band["date"], y=band["lower"], mode="lines", line=dict(width=0), fill="tonexty",
+                fillcolor="rgba(59, 183, 183, 0.2)", name="80% band",
+            ))
+        fig.add_trace(go.Scatter(x=forecast["date"], y=forecast["yhat"], name="forecast", mode="lines", line=dict(dash="dash", color=JOEL_PRIMARY)))
     fig.update_layout(hovermode="x unified", **BASE_LAYOUT)
     fig.update_xaxes(rangeselector=dict(
         buttons=list([
@@ -52,14 +73,18 @@ def time_series(df: pd.DataFrame, y_cols: list[str]) -> go.Figure:
     return fig
 
 
-def calendar_heatmap(df: pd.DataFrame, values: pd.Series) -> go.Figure:
+@timed("charts")
+def calendar_heatmap(df: pd.DataFrame, values: pd.Series, flagged: Optional[Iterable] = None) -> go.Figure:
+    """Weekday x week heatmap of ``values``; dates in ``flagged`` get a marker."""
+    import plotly.express as px
+    import plotly.graph_objects as go
+
     # Simple heatmap by day index (fallback to visual calendar look)
     if df.empty or values is None or len(values) == 0:
         return go.Figure()
-    x = df.copy()
     # align values with df index and give it a stable column name
     col = values.name or "value"
-    x[col] = values.values
+    x = pd.DataFrame({"date": df["date"].to_numpy(), col: values.values})
     x["dow"] = x["date"].dt.weekday
     x["week"] = x["date"].dt.isocalendar().week
     pivot = x.pivot_table(index="dow", columns="week", values=col, aggfunc="mean")
@@ -70,7 +95,62 @@ def calendar_heatmap(df: pd.DataFrame, values: pd.Series) -> go.Figure:
         (1.0, JOEL_ALERT),   # high intensity in pomegranate
     ]
     fig = px.imshow(pivot, aspect="auto", color_continuous_scale=heat_scale)
+    if flagged is not None:
+        days = pd.to_datetime(pd.Series(list(flagged), dtype=object)).drop_duplicates()
+        days = days[days.isin(x["date"])]
+        if not days.empty:
+            fig.add_trace(go.Scatter(
+                x=days.dt.isocalendar().week, y=days.dt.weekday, mode="markers", name="anomaly",
+                marker=dict(symbol="x", size=9, color=JOEL_TEXT), text=days.dt.strftime("%Y-%m-%d"),
+                hovertemplate="%{text}: anomaly<extra></extra>", showlegend=False,
+            ))
     fig.update_layout(coloraxis_showscale=True, **BASE_LAYOUT)
     fig.update_yaxes(title="Day of Week")
     fig.update_xaxes(title="Week #")
     return fig
+
+
+@timed("charts")
+def correlation_heatmap(corr: pd.DataFrame) -> go.Figure:
+    import plotly.express as px
+
+    fig = px.imshow(corr.values, x=corr.columns, y=corr.columns, color_continuous_scale="Viridis")
+    fig.update_layout(template="plotly_dark")
+    return fig
+
+
+@timed("charts")
+def goal_matrix(matrix: pd.DataFrame) -> go.Figure:
+    """Goal x day grid from ``GoalReport.matrix()``: met, missed, or blank where it does not apply."""
+    import plotly.graph_objects as go
+
+    z = matrix.astype("float64").T
+    fig = go.Figure(go.Heatmap(
+        z=z.to_numpy(), x=matrix.index, y=list(matrix.columns), zmin=0, zmax=1, xgap=1, ygap=1,
+        colorscale=[(0.0, JOEL_ALERT), (1.0, JOEL_PRIMARY)], showscale=False,
+        hovertemplate="%{x|%Y-%m-%d} %{y}: %{z}<extra></extra>",
+    ))
+    fig.update_layout(height=60 + 28 * len(matrix.columns), margin=dict(l=0, r=0, t=10, b=0), **BASE_LAYOUT)
+    return fig
+
+
+@timed("charts")
+def profile_heatmap(means: pd.DataFrame) -> go.Figure:
+    """Metric x bucket grid from ``Profile.matrix()``.
+
+    Colour is each metric's deviation from its own average (metrics have
+    different units); the cells are labelled with the actual means.
+    """
+    import plotly.graph_objects as go
+
+    values = means.to_numpy(dtype="float64")
+    center = pd.DataFrame(values).mean(axis=1).to_numpy()[:, None]
+    spread = pd.DataFrame(values).std(axis=1).replace(0.0, 1.0).fillna(1.0).to_numpy()[:, None]
+    fig = go.Figure(go.Heatmap(
+        z=(values - center) / spread, x=list(means.columns), y=list(means.index),
+        text=[[f"{v:.3g}" if v == v else "" for v in row] for row in values], texttemplate="%{text}",
+        colorscale=[(0.0, JOEL_ALERT), (0.5, JOEL_PANEL), (1.0, JOEL_PRIMARY)], zmid=0, showscale=False,
+        xgap=1, ygap=1, hovertemplate="%{y} %{x}: %{text}<extra></extra>",
+    ))
+    fig.update_layout(height=60 + 40 * len(means.index), margin=dict(l=0, r=0, t=10, b=0), **BASE_LAYOUT)
+    return fig
@@ -1,39 +1,120 @@
 from __future__ import annotations
 
 import os
+import sqlite3
+import threading
+import time
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 from sqlalchemy import create_engine, event
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
+from . import instrument
+
 DB_PATH = Path("data/habits.db")
+BUSY_TIMEOUT_S = 10.0
+
+# Built on first use so importing the package has no I/O side effects.
+_ENGINE: Optional[Engine] = None
+_SESSION_FACTORY: Optional[sessionmaker] = None
+_ENGINE_LOCK = threading.Lock()
 
 
 def get_engine(echo: bool = False) -> Engine:
+    """Return the process-wide engine for ``DB_PATH``, creating it on first call."""
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = _create_engine(echo)
+    return _ENGINE
+
+
+def reset_engine() -> None:
+    """Dispose the engine so the next call reconnects (e.g. after DB_PATH changes)."""
+    global _ENGINE, _SESSION_FACTORY
+    with _ENGINE_LOCK:
+        if _ENGINE is not None:
+            _ENGINE.dispose()
+        _ENGINE = None
+        _SESSION_FACTORY = None
+
+
+def replace_database(src: Path) -> None:
+    """Atomically make the SQLite file ``src`` the database at ``DB_PATH``.
+
+    The engine is disposed and no new one can be created until the swap is
+    done. The live file is switched out of WAL mode first, which checkpoints
+    and removes its ``-wal``/``-shm`` files so none of their frames can be
+    replayed onto the new file. That switch needs the only connection, so a
+    connection still held elsewhere makes this raise before anything changes.
+    """
+    global _ENGINE, _SESSION_FACTORY
+    with _ENGINE_LOCK:
+        if _ENGINE is not None:
+            _ENGINE.dispose()
+        _ENGINE = None
+        _SESSION_FACTORY = None
+        if DB_PATH.exists():
+            conn = sqlite3.connect(DB_PATH, timeout=1.0)
+            try:
+                mode = conn.execute("PRAGMA journal_mode=DELETE").fetchone()[0]
+            except sqlite3.OperationalError as exc:
+                mode = str(exc)
+            finally:
+                conn.close()
+            if str(mode).lower() != "delete":
+                raise RuntimeError(f"database is in use by another connection ({mode}); try again")
+        os.replace(src, DB_PATH)
+
+
+def _create_engine(echo: bool) -> Engine:
     os.makedirs(DB_PATH.parent, exist_ok=True)
-    engine = create_engine(f"sqlite:///{DB_PATH}", echo=echo, future=True)
+    # Wait for a competing writer (another process, or a reader checkpointing) instead of failing.
+    engine = create_engine(
+        f"sqlite:///{DB_PATH}", echo=echo, future=True, connect_args={"timeout": BUSY_TIMEOUT_S}
+    )
 
     @event.listens_for(engine, "connect")
     def set_sqlite_pragma(dbapi_connection, connection_record):  # type: ignore[no-redef]
         cursor = dbapi_connection.cursor()
         cursor.execute("PRAGMA foreign_keys=ON")
         cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(BUSY_TIMEOUT_S * 1000)}")
         cursor.close()
 
+    @event.listens_for(engine, "before_cursor_execute")
+    def _query_started(conn, cursor, statement, parameters, context, executemany):  # type: ignore[no-redef]
+        if instrument.enabled():
+            conn.info.setdefault("query_t0", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _query_done(conn, cursor, statement, parameters, context, executemany):  # type: ignore[no-redef]
+        starts = conn.info.get("query_t0")
+        if instrument.enabled() and starts:
+            elapsed_ms = (time.perf_counter() - starts.pop()) * 1000.0
+            instrument.record("sqlite.query", "sqlite", elapsed_ms)
+            instrument.count("sqlite.queries")
+
     return engine
 
 
-SessionLocal = sessionmaker(
-    bind=get_engine(), autoflush=False, autocommit=False, future=True, expire_on_commit=False
-)
+def get_sessionmaker() -> sessionmaker:
+    global _SESSION_FACTORY
+    if _SESSION_FACTORY is None:
+        _SESSION_FACTORY = sessionmaker(
+            bind=get_engine(), autoflush=False, autocommit=False, future=True, expire_on_commit=False
+        )
+    return _SESSION_FACTORY
 
 
 @contextmanager
 def session_scope():
-    session = SessionLocal()
+    session = get_sessionmaker()()
     try:
         yield session
         session.commit()
@@ -44,5 +125,26 @@ def session_scope():
         session.close()
 
 
+def quick_check() -> str:
+    """``PRAGMA quick_check``: ``"ok"`` or the first problems found."""
+    with get_engine().connect() as conn:
+        rows = [r[0] for r in conn.exec_driver_sql("PRAGMA quick_check").fetchall()]
+    return "ok" if rows == ["ok"] else "; ".join(rows[:5])
+
+
+def optimize() -> None:
+    """``PRAGMA optimize``: refresh planner statistics where SQLite thinks it helps."""
+    with get_engine().connect() as conn:
+        conn.exec_driver_sql("PRAGMA optimize")
+
+
+def checkpoint(mode: str = "TRUNCATE") -> tuple:
+    """Copy the WAL back into the database file; returns (busy, wal pages, checkpointed pages)."""
+    if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"unknown checkpoint mode: {mode}")
+    with get_engine().connect() as conn:
+        return tuple(conn.exec_driver_sql(f"PRAGMA wal_checkpoint({mode})").fetchone())
+
+
 def utcnow_str() -> str:
     return datetime.utcnow().isoformat(timespec="seconds")
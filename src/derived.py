@@ -0,0 +1,77 @@
+"""Bookkeeping for features maintained incrementally from ``daily_metrics``.
+
+A feature (anomaly detector, forecasts, ...) stores its state as JSON in
+``derived_state`` together with the change-log cursor it reflects. The log
+entries after that cursor tell whether the state can simply be extended with
+new days or must be rebuilt because older rows changed.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import select
+
+from .changes import _sequence
+from .models import ChangeLogEntry, DailyMetrics, DerivedState
+
+# More unseen changes than this and a rebuild is cheaper than replaying them.
+RESUME_LIMIT = 64
+
+
+def save(s, key: str, value: dict) -> None:
+    """Store ``value`` as reflecting every change logged so far (call after flushing)."""
+    row = s.get(DerivedState, key)
+    if row is None:
+        row = DerivedState(key=key)
+        s.add(row)
+    row.value = json.dumps(value)
+    row.cursor = _sequence(s)
+    row.updated_at = datetime.utcnow()
+
+
+@dataclass
+class Resume:
+    state: dict  # the saved state to extend
+    rows: List[DailyMetrics]  # days to fold into it, oldest first (may be empty)
+
+
+def _day(raw: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(raw) if raw else None
+
+
+def resume(s, key: str) -> Optional[Resume]:
+    """How to bring ``key`` up to date, or None when it must be rebuilt.
+
+    States are saved as ``{"current": ..., "previous": ...}`` where both carry
+    a ``last_date`` and ``previous`` is the state before the newest day, so a
+    re-edit of that day can be replayed. Anything touching an older day, or
+    a deleted one, needs a rebuild.
+    """
+    s.flush()
+    row = s.get(DerivedState, key)
+    if row is None or row.cursor > _sequence(s):
+        return None
+    logged = list(
+        s.execute(
+            select(ChangeLogEntry.date).where(ChangeLogEntry.id > row.cursor).limit(RESUME_LIMIT + 1)
+        ).scalars()
+    )
+    if len(logged) > RESUME_LIMIT:
+        return None
+    state = json.loads(row.value)
+    if not logged:
+        return Resume(state["current"], [])
+    dates = sorted(set(logged))
+    base = state["current"]
+    if dates[0] == _day(base["last_date"]) and state.get("previous") is not None:
+        base = state["previous"]
+    last = _day(base["last_date"])
+    if last is not None and dates[0] <= last:
+        return None
+    rows = list(
+        s.execute(select(DailyMetrics).where(DailyMetrics.date.in_(dates)).order_by(DailyMetrics.date)).scalars()
+    )
+    return Resume(base, rows) if len(rows) == len(dates) else None
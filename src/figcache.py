@@ -0,0 +1,84 @@
+"""Process-wide cache of built Plotly figures, stored as their JSON.
+
+Streamlit reruns a page on every interaction and page switch, and each rerun
+used to rebuild every chart: the pandas reshaping in the builders plus
+Plotly's property validation. Figures are keyed by ``(builder, params, data
+version)`` so a hit is only possible when the chart would come out the same.
+A hit skips both steps: the stored JSON is loaded back into a figure with
+validation off. Entries are evicted least recently used first once the
+stored JSON exceeds :data:`MAX_BYTES`.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Hashable, Tuple
+
+from . import instrument
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+MAX_BYTES = 32 * 1024 * 1024
+
+_LOCK = threading.Lock()
+_CACHE: "OrderedDict[Tuple[str, Hashable, str], str]" = OrderedDict()
+_STATS = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0, "bytes_saved": 0}
+
+
+def _load(spec: str) -> go.Figure:
+    import plotly.graph_objects as go
+
+    return go.Figure(json.loads(spec), _validate=False)
+
+
+def cached(builder: str, params: Hashable, version: str, build: Callable[[], go.Figure]) -> go.Figure:
+    """The figure ``build()`` returns, rebuilt only when the key is new.
+
+    ``params`` must capture every input of ``build`` besides the stored data,
+    whose state ``version`` (``repo.data_version()``) stands for.
+    """
+    import plotly.io as pio
+
+    key = (builder, params, version)
+    with _LOCK:
+        spec = _CACHE.get(key)
+        if spec is not None:
+            _CACHE.move_to_end(key)
+            _STATS["hits"] += 1
+            _STATS["bytes_saved"] += len(spec)
+    if spec is not None:
+        instrument.count("figcache.hits")
+        return _load(spec)
+    instrument.count("figcache.misses")
+    fig = build()
+    spec = pio.to_json(fig, validate=False)
+    with _LOCK:
+        _STATS["misses"] += 1
+        old = _CACHE.pop(key, None)
+        if old is not None:
+            _STATS["bytes"] -= len(old)
+        if len(spec) <= MAX_BYTES:
+            _CACHE[key] = spec
+            _STATS["bytes"] += len(spec)
+        while _STATS["bytes"] > MAX_BYTES:
+            _, dropped = _CACHE.popitem(last=False)
+            _STATS["bytes"] -= len(dropped)
+            _STATS["evictions"] += 1
+    return fig
+
+
+def stats() -> Dict[str, float]:
+    """Hits, misses, hit rate, entries, stored bytes and bytes served from cache."""
+    with _LOCK:
+        out: Dict[str, float] = dict(_STATS, entries=len(_CACHE))
+    lookups = out["hits"] + out["misses"]
+    out["hit_rate"] = out["hits"] / lookups if lookups else 0.0
+    return out
+
+
+def clear() -> None:
+    with _LOCK:
+        _CACHE.clear()
+        _STATS.update(hits=0, misses=0, evictions=0, bytes=0, bytes_saved=0)
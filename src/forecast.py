@@ -0,0 +1,170 @@
+"""Holt (level + trend) exponential-smoothing forecasts, fitted incrementally.
+
+Each metric keeps a fitted level, a per-day trend and the running sum of
+squared one-step errors, so a new day updates the fit in O(1). Gaps between
+logged days are stepped over with the trend; missing values (e.g. no
+weigh-in) leave that metric's fit untouched.
+
+In SQLite mode the repo calls :func:`sync` at the end of its write
+transactions; editing or deleting a past day triggers a full :func:`refit`.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field, replace
+from datetime import date, timedelta
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from . import derived
+from .instrument import timed
+from .models import DailyMetrics
+
+# metric -> (alpha: level smoothing, beta: trend smoothing)
+FORECAST_PARAMS = {"weight_kg": (0.2, 0.05), "productive_hours": (0.3, 0.05)}
+HORIZON = 14
+BAND_Z = 1.28  # ~80% prediction band
+STATE_KEY = "forecast"
+FORECAST_COLUMNS = ["date", "yhat", "lower", "upper"]
+
+
+@dataclass
+class HoltState:
+    alpha: float
+    beta: float
+    n: int = 0
+    level: float = 0.0
+    trend: float = 0.0  # per day
+    sse: float = 0.0  # squared one-step errors since the trend was initialised
+    last_date: Optional[date] = None
+
+    def update(self, d: date, x: float) -> None:
+        if self.n == 0:
+            self.level = x
+        else:
+            gap = max((d - self.last_date).days, 1)  # type: ignore[operator]
+            if self.n == 1:
+                self.trend = (x - self.level) / gap
+                self.level = x
+            else:
+                expected = self.level + gap * self.trend
+                err = x - expected
+                self.sse += err * err
+                level = self.alpha * x + (1 - self.alpha) * expected
+                self.trend = self.beta * (level - self.level) / gap + (1 - self.beta) * self.trend
+                self.level = level
+        self.n += 1
+        self.last_date = d
+
+    @property
+    def sigma(self) -> float:
+        """Standard deviation of the one-step errors (NaN until there are any)."""
+        return math.sqrt(self.sse / (self.n - 2)) if self.n > 2 else math.nan
+
+    def forecast(self, horizon: int = HORIZON) -> pd.DataFrame:
+        if self.n == 0:
+            return pd.DataFrame(columns=FORECAST_COLUMNS)
+        h = np.arange(1, horizon + 1)
+        yhat = self.level + h * self.trend
+        # Holt's h-step variance: sigma^2 * (1 + sum_{j<h} alpha^2 (1 + j beta)^2)
+        growth = np.concatenate([[0.0], np.cumsum(self.alpha ** 2 * (1 + h[:-1] * self.beta) ** 2)])
+        half = BAND_Z * self.sigma * np.sqrt(1 + growth)
+        return pd.DataFrame({
+            "date": pd.to_datetime([self.last_date + timedelta(days=int(i)) for i in h]),  # type: ignore[operator]
+            "yhat": yhat,
+            "lower": yhat - half,
+            "upper": yhat + half,
+        })
+
+
+def _fresh() -> Dict[str, HoltState]:
+    return {m: HoltState(a, b) for m, (a, b) in FORECAST_PARAMS.items()}
+
+
+@dataclass
+class Forecaster:
+    states: Dict[str, HoltState] = field(default_factory=_fresh)
+    last_date: Optional[date] = None
+
+    def observe(self, d: date, values: Mapping[str, Optional[float]]) -> None:
+        """Fold in one day after ``last_date``."""
+        for m, st in self.states.items():
+            x = values.get(m)
+            if x is not None and not (isinstance(x, float) and math.isnan(x)):
+                st.update(d, float(x))
+        self.last_date = d
+
+    def copy(self) -> "Forecaster":
+        return Forecaster({m: replace(st) for m, st in self.states.items()}, self.last_date)
+
+    def to_dict(self) -> dict:
+        return {
+            "last_date": _iso(self.last_date),
+            "states": {m: {**vars(st), "last_date": _iso(st.last_date)} for m, st in self.states.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "Forecaster":
+        states = {m: HoltState(**{**st, "last_date": _day(st["last_date"])}) for m, st in raw["states"].items()}
+        return cls(states, _day(raw.get("last_date")))
+
+
+def _iso(d: Optional[date]) -> Optional[str]:
+    return d.isoformat() if d else None
+
+
+def _day(raw: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(raw) if raw else None
+
+
+@timed("forecast")
+def fit(df: pd.DataFrame) -> Tuple[Forecaster, Optional[Forecaster]]:
+    """Batch fit over a whole history: the fit after the last day and the one before it."""
+    current, previous = Forecaster(), None
+    if df.empty:
+        return current, previous
+    df = df.sort_values("date")
+    days = pd.to_datetime(df["date"]).dt.date.to_numpy()
+    cols = [m for m in FORECAST_PARAMS if m in df.columns]
+    values = df[cols].to_numpy(dtype=float)
+    for i, d in enumerate(days):
+        if i == len(days) - 1:
+            previous = current.copy()
+        current.observe(d, dict(zip(cols, values[i])))
+    return current, previous
+
+
+# -- SQLite maintenance (called by the repo inside its transactions) ----------
+
+
+def _save(s, current: Forecaster, previous: Optional[Forecaster]) -> None:
+    derived.save(s, STATE_KEY, {"current": current.to_dict(), "previous": previous.to_dict() if previous else None})
+
+
+@timed("forecast")
+def refit(s) -> Forecaster:
+    """Refit every metric from the stored rows."""
+    s.flush()
+    rows = s.execute(select(DailyMetrics.date, *(getattr(DailyMetrics, m) for m in FORECAST_PARAMS))).all()
+    current, previous = fit(pd.DataFrame(rows, columns=["date", *FORECAST_PARAMS]))
+    _save(s, current, previous)
+    return current
+
+
+@timed("forecast")
+def sync(s) -> Forecaster:
+    """Bring the stored fit up to date: O(1) per new day, a refit for anything else."""
+    plan = derived.resume(s, STATE_KEY)
+    if plan is None:
+        return refit(s)
+    current = Forecaster.from_dict(plan.state)
+    if not plan.rows:
+        return current
+    for rec in plan.rows:
+        previous = current.copy()
+        current.observe(rec.date, {m: getattr(rec, m) for m in FORECAST_PARAMS})
+    _save(s, current, previous)
+    return current
@@ -0,0 +1,86 @@
+"""Compact column types for the day frames the repo hands out.
+
+Every page holds the full history in memory (often once per session), so the
+frames use the smallest types that keep every value exact: integers are
+downcast to fit their range, floats become float32 only when each value
+survives the round trip, notes are Arrow strings and timestamps are real
+``datetime64`` columns whatever the backend. Analytics widen back to 64-bit
+before aggregating (see :func:`widen`), so results do not depend on this.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+INT_COLUMNS = ("sugar_intake_g", "water_ml", "fap_count")
+FLOAT_COLUMNS = ("productive_hours", "weight_kg")
+TIMESTAMP_COLUMNS = ("created_at", "updated_at")
+TEXT_COLUMNS = ("notes",)
+
+
+def _string_dtype() -> str:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:  # pragma: no cover
+        return "string"
+    return "string[pyarrow]"
+
+
+STRING_DTYPE = _string_dtype()
+
+
+def _int(col: pd.Series) -> pd.Series:
+    num = pd.to_numeric(col, errors="coerce")
+    if num.isna().any():
+        return num  # gaps (e.g. blank sheet cells) keep a float column
+    return pd.to_numeric(num.astype(np.int64), downcast="integer")
+
+
+def _float(col: pd.Series) -> pd.Series:
+    num = pd.to_numeric(col, errors="coerce").astype(np.float64)
+    small = num.astype(np.float32)
+    if np.array_equal(small.to_numpy(np.float64), num.to_numpy(), equal_nan=True):
+        return small
+    return num
+
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Return ``df`` with compact dtypes (modified in place and returned)."""
+    if df.empty:
+        return df
+    if "date" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["date"]):
+        df["date"] = pd.to_datetime(df["date"])
+    for c in INT_COLUMNS:
+        if c in df.columns:
+            df[c] = _int(df[c])
+    for c in FLOAT_COLUMNS:
+        if c in df.columns:
+            df[c] = _float(df[c])
+    for c in TIMESTAMP_COLUMNS:
+        if c in df.columns and not pd.api.types.is_datetime64_any_dtype(df[c]):
+            df[c] = pd.to_datetime(df[c], errors="coerce", format="ISO8601")
+    for c in TEXT_COLUMNS:
+        if c in df.columns:
+            df[c] = df[c].astype(STRING_DTYPE)
+    return df
+
+
+def widen(df: pd.DataFrame, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Copy of the numeric ``columns`` as int64/float64, for exact aggregation."""
+    cols = list(columns) if columns is not None else list(df.columns)
+    out = {}
+    for c in cols:
+        col = df[c]
+        if pd.api.types.is_integer_dtype(col):
+            out[c] = col.astype(np.int64)
+        elif pd.api.types.is_float_dtype(col):
+            out[c] = col.astype(np.float64)
+        else:
+            out[c] = col
+    return pd.DataFrame(out, index=df.index)
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
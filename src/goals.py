@@ -0,0 +1,208 @@
+"""User-defined goals, evaluated for every goal and day in one vectorised pass.
+
+A :class:`Goal` is declarative: ``metric op value``, optionally only on some
+weekdays, optionally relaxed to "at least k of the last n days". Each goal
+compiles to NumPy comparisons over the metric columns, so checking every
+goal against the whole history is a handful of array operations rather than
+a loop over days.
+"""
+from __future__ import annotations
+
+import operator
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from .analytics import METRICS, WEEKDAYS
+from .instrument import timed
+from .models import GoalRow
+
+OPS: Dict[str, Callable[[np.ndarray, float], np.ndarray]] = {
+    "<=": operator.le,
+    ">=": operator.ge,
+    "<": operator.lt,
+    ">": operator.gt,
+    "==": operator.eq,
+}
+DAY_SETS = {
+    "all": tuple(range(7)),
+    "weekdays": (0, 1, 2, 3, 4),
+    "weekends": (5, 6),
+}
+# Seeded into an empty goals table: the targets the app used to hard-code.
+DEFAULT_GOALS = (
+    ("Productive 4h+", "productive_hours", ">=", 4.0),
+    ("Water 2 L+", "water_ml", ">=", 2000.0),
+)
+
+
+@dataclass(frozen=True)
+class Goal:
+    name: str
+    metric: str
+    op: str
+    value: float
+    days: str = "all"
+    window_k: Optional[int] = None
+    window_n: Optional[int] = None
+    id: Optional[int] = None
+
+    def __post_init__(self):
+        if self.metric not in METRICS:
+            raise ValueError(f"unknown metric: {self.metric}")
+        if self.op not in OPS:
+            raise ValueError(f"unknown comparison: {self.op}")
+        weekday_set(self.days)
+        if (self.window_k is None) != (self.window_n is None):
+            raise ValueError("give both k and n for 'at least k of n days'")
+        if self.window_n is not None and not 1 <= self.window_k <= self.window_n:
+            raise ValueError("need 1 <= k <= n for 'at least k of n days'")
+
+    def describe(self) -> str:
+        text = f"{self.metric} {self.op} {self.value:g}"
+        if self.days != "all":
+            text += f" on {self.days.lower()}"
+        if self.window_n is not None:
+            text += f", at least {self.window_k} of {self.window_n} days"
+        return text
+
+
+def weekday_set(days: str) -> Tuple[int, ...]:
+    """``all``/``weekdays``/``weekends`` or a comma list like ``MON,WED`` -> weekday numbers."""
+    key = days.strip().lower()
+    if key in DAY_SETS:
+        return DAY_SETS[key]
+    try:
+        return tuple(sorted({WEEKDAYS.index(d.strip().upper()[:3]) for d in days.split(",") if d.strip()}))
+    except ValueError:
+        raise ValueError(f"unknown days: {days!r}") from None
+
+
+@dataclass
+class GoalReport:
+    goals: Tuple[Goal, ...]
+    dates: np.ndarray  # datetime64[D], ascending
+    applies: np.ndarray  # (goals, days) bool: the goal counts on that day
+    passed: np.ndarray  # (goals, days) bool: ... and was met (False where it does not apply)
+
+    @property
+    def names(self) -> List[str]:
+        return [g.name for g in self.goals]
+
+    def matrix(self) -> pd.DataFrame:
+        """Day x goal pass/fail, with NA where a goal does not apply."""
+        values = np.where(self.applies, self.passed, np.nan).T
+        out = pd.DataFrame(values, index=pd.to_datetime(self.dates), columns=self.names).astype("boolean")
+        out.index.name = "date"
+        return out
+
+    def all_met(self) -> np.ndarray:
+        """Per day: every goal that applies was met (True when none apply)."""
+        return ~(self.applies & ~self.passed).any(axis=0)
+
+    def streak(self) -> int:
+        """Logged days in a row, up to the latest, on which every applicable goal was met."""
+        return _streaks(self.all_met())[0]
+
+    def summary(self) -> pd.DataFrame:
+        """Per goal: days it applied, hits, hit rate, current and best streak."""
+        days = self.applies.sum(axis=1)
+        hits = self.passed.sum(axis=1)
+        current, best = zip(*(_streaks(p[a]) for p, a in zip(self.passed, self.applies))) if self.goals else ((), ())
+        return pd.DataFrame({
+            "goal": self.names,
+            "rule": [g.describe() for g in self.goals],
+            "days": days,
+            "hits": hits,
+            "hit_rate": np.divide(hits, days, out=np.full(len(days), np.nan), where=days > 0),
+            "streak": current,
+            "best_streak": best,
+        })
+
+
+def _streaks(ok: np.ndarray) -> Tuple[int, int]:
+    """(trailing, longest) run of True in ``ok``."""
+    if ok.size == 0:
+        return 0, 0
+    fails = np.flatnonzero(~ok)
+    trailing = ok.size - 1 - fails[-1] if fails.size else ok.size
+    edges = np.concatenate(([-1], fails, [ok.size]))
+    return int(trailing), int((np.diff(edges) - 1).max())
+
+
+def _window(met: np.ndarray, day_no: np.ndarray, k: int, n: int) -> np.ndarray:
+    """At each logged day: met on at least ``k`` of the ``n`` calendar days ending there.
+
+    Days without a log count as missed.
+    """
+    offset = day_no - day_no[0]
+    per_day = np.zeros(offset[-1] + 1, dtype=np.int64)
+    per_day[offset] = met
+    csum = np.concatenate(([0], np.cumsum(per_day)))
+    return (csum[offset + 1] - csum[np.maximum(offset + 1 - n, 0)]) >= k
+
+
+@timed("goals")
+def evaluate(df: pd.DataFrame, goals: Sequence[Goal]) -> GoalReport:
+    """Evaluate every goal on every day of ``df`` (needs ``date`` and the metric columns)."""
+    goals = tuple(goals)
+    if df.empty:
+        empty = np.zeros((len(goals), 0), dtype=bool)
+        return GoalReport(goals, np.array([], dtype="datetime64[D]"), empty, empty)
+    df = df.sort_values("date")
+    dates = pd.to_datetime(df["date"]).to_numpy(dtype="datetime64[D]")
+    day_no = dates.astype(np.int64)
+    weekday = (day_no + 3) % 7  # 1970-01-01 was a Thursday
+    columns = {m: df[m].to_numpy(dtype=np.float64) for m in {g.metric for g in goals}}
+    applies = np.empty((len(goals), len(dates)), dtype=bool)
+    passed = np.empty_like(applies)
+    for i, g in enumerate(goals):
+        values = columns[g.metric]
+        met = OPS[g.op](values, g.value) & ~np.isnan(values)
+        applies[i] = np.isin(weekday, weekday_set(g.days))
+        met &= applies[i]
+        if g.window_n is not None:
+            met = _window(met, day_no, g.window_k, g.window_n)
+        passed[i] = met & applies[i]
+    return GoalReport(goals, dates, applies, passed)
+
+
+def _from_row(r: GoalRow) -> Goal:
+    return Goal(r.name, r.metric, r.op, r.value, r.days, r.window_k, r.window_n, r.id)
+
+
+def ensure_defaults(s) -> None:
+    """Seed an empty goals table (never used before) with DEFAULT_GOALS."""
+    if s.execute(select(GoalRow.id).limit(1)).first() is None:
+        now = datetime.utcnow()
+        s.add_all(GoalRow(name=n, metric=m, op=o, value=v, days="all", active=True, created_at=now) for n, m, o, v in DEFAULT_GOALS)
+
+
+def list_goals(s) -> List[Goal]:
+    """Active goals in creation order."""
+    rows = s.execute(select(GoalRow).where(GoalRow.active.is_(True)).order_by(GoalRow.id)).scalars()
+    return [_from_row(r) for r in rows]
+
+
+def save_goal(s, goal: Goal) -> int:
+    """Insert ``goal`` (or update it when it has an id); returns the id."""
+    row = s.get(GoalRow, goal.id) if goal.id is not None else None
+    if row is None:
+        row = GoalRow(created_at=datetime.utcnow(), active=True)
+        s.add(row)
+    row.name, row.metric, row.op, row.value = goal.name, goal.metric, goal.op, float(goal.value)
+    row.days, row.window_k, row.window_n = goal.days, goal.window_k, goal.window_n
+    s.flush()
+    return row.id
+
+
+def delete_goal(s, goal_id: int) -> bool:
+    row = s.get(GoalRow, goal_id)
+    if row is None or not row.active:
+        return False
+    row.active = False
+    return True
@@ -0,0 +1,44 @@
+"""Content hashes of a day's values, used to skip writes that change nothing.
+
+The hash covers the logged values only (not the date or timestamps) after
+normalising them the way every backend stores them, so the same day hashes
+the same whether it comes from a payload, a SQLite row or a sheet cell.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Mapping
+
+import pandas as pd
+
+HASHED_FIELDS = ("sugar_intake_g", "water_ml", "fap_count", "productive_hours", "weight_kg", "notes")
+
+
+def _missing(v: Any) -> bool:
+    if isinstance(v, str):
+        return v == ""
+    return v is None or bool(pd.isna(v))
+
+
+def normalize(values: Mapping[str, Any]) -> list:
+    """Canonical, JSON-serialisable form of the hashed fields."""
+    get = values.get
+    return [
+        int(get("sugar_intake_g") or 0),
+        int(get("water_ml") or 0),
+        int(get("fap_count") or 0),
+        float(get("productive_hours") or 0.0),
+        None if _missing(get("weight_kg")) else float(get("weight_kg")),
+        "" if _missing(get("notes")) else str(get("notes")),
+    ]
+
+
+def content_hash(values: Mapping[str, Any]) -> str:
+    raw = json.dumps(normalize(values), separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def record_hash(rec: Any) -> str:
+    """Hash of an object with the fields as attributes (e.g. a ``DailyMetrics`` row)."""
+    return content_hash({f: getattr(rec, f, None) for f in HASHED_FIELDS})
@@ -0,0 +1,348 @@
+"""Timing spans and call counters for the app's hot paths.
+
+Instrumentation is off by default. ``HABITS_PROFILE=1`` turns it on for the
+whole process. Opening a page with ``?debug=1`` turns it on for that browser
+session only (its script reruns; background threads are not timed), and
+``?debug=0`` or the sidebar's "Stop profiling" button turns it off again.
+When off, every wrapper is a flag check before calling straight through.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+MAX_EVENTS = 5000
+MAX_PAGE_RUNS = 200
+
+_ENABLED = os.getenv("HABITS_PROFILE", "").lower() in ("1", "true", "yes", "on")
+_LOCK = threading.Lock()
+_local = threading.local()
+
+
+@dataclass
+class SpanEvent:
+    name: str
+    category: str
+    started_at: float  # epoch seconds
+    duration_ms: float
+    self_ms: float
+    page: Optional[str] = None
+
+
+@dataclass
+class SpanStat:
+    calls: int = 0
+    total_ms: float = 0.0
+    self_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+@dataclass
+class PageRun:
+    page: str
+    started_at: float
+    duration_ms: float
+    by_category_ms: Dict[str, float] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+    span_ms: Dict[str, float] = field(default_factory=dict)  # self time per span name
+
+
+_events: Deque[SpanEvent] = deque(maxlen=MAX_EVENTS)
+_page_runs: Deque[PageRun] = deque(maxlen=MAX_PAGE_RUNS)
+_stats: Dict[str, SpanStat] = {}
+_counters: Dict[str, int] = {}
+
+
+DEBUG_STATE_KEY = "_instrument_debug"
+RUNS_STATE_KEY = "_instrument_runs"  # a ?debug=1 session's own page runs
+
+
+def _on() -> bool:
+    # Process-wide switch, or a ?debug=1 session whose script is running on this thread.
+    return _ENABLED or getattr(_local, "debug", False)
+
+
+def enabled() -> bool:
+    return _on()
+
+
+def enable(flag: bool = True) -> None:
+    global _ENABLED
+    _ENABLED = bool(flag)
+
+
+def reset() -> None:
+    with _LOCK:
+        _events.clear()
+        _page_runs.clear()
+        _stats.clear()
+        _counters.clear()
+
+
+def count(name: str, n: int = 1) -> None:
+    """Bump a named counter (e.g. ``sheets.api``) when instrumentation is on."""
+    if not _on():
+        return
+    with _LOCK:
+        _counters[name] = _counters.get(name, 0) + n
+    run = getattr(_local, "page", None)
+    if run is not None:
+        run.counters[name] = run.counters.get(name, 0) + n
+
+
+def _stack() -> List[float]:
+    st = getattr(_local, "stack", None)
+    if st is None:
+        st = _local.stack = []
+    return st
+
+
+def _record(name: str, category: str, started_at: float, duration_ms: float, child_ms: float) -> None:
+    self_ms = max(duration_ms - child_ms, 0.0)
+    run = getattr(_local, "page", None)
+    ev = SpanEvent(name, category, started_at, duration_ms, self_ms, run.page if run else None)
+    with _LOCK:
+        _events.append(ev)
+        stat = _stats.get(name)
+        if stat is None:
+            stat = _stats[name] = SpanStat()
+        stat.calls += 1
+        stat.total_ms += duration_ms
+        stat.self_ms += self_ms
+        stat.max_ms = max(stat.max_ms, duration_ms)
+    if run is not None:
+        # Self time, so nested spans (repo -> sheets API) are not double counted.
+        run.by_category_ms[category] = run.by_category_ms.get(category, 0.0) + self_ms
+        run.span_ms[name] = run.span_ms.get(name, 0.0) + self_ms
+
+
+@contextmanager
+def span(name: str, category: str = "misc") -> Iterator[None]:
+    """Time a block. Nested spans subtract from their parent's self time."""
+    if not _on():
+        yield
+        return
+    stack = _stack()
+    stack.append(0.0)
+    wall = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration_ms = (time.perf_counter() - t0) * 1000.0
+        child_ms = stack.pop()
+        if stack:
+            stack[-1] += duration_ms
+        _record(name, category, wall, duration_ms, child_ms)
+
+
+def record(name: str, category: str, duration_ms: float) -> None:
+    """Record an already-measured span (e.g. from a driver callback)."""
+    if not _on():
+        return
+    stack = _stack()
+    if stack:
+        stack[-1] += duration_ms
+    _record(name, category, time.time() - duration_ms / 1000.0, duration_ms, 0.0)
+
+
+def timed(category: str, name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator form of :func:`span`, labelled ``<category>.<function>``."""
+
+    def deco(fn: F) -> F:
+        label = name or f"{category}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _on():
+                return fn(*args, **kwargs)
+            count(label)
+            with span(label, category):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return deco
+
+
+class CountingProxy:
+    """Wrap a client object so each method call counts as one API round trip."""
+
+    def __init__(self, target: Any, counter: str, category: str = "sheets_api"):
+        self._target = target
+        self._counter = counter
+        self._category = category
+
+    def __getattr__(self, item: str) -> Any:
+        attr = getattr(self._target, item)
+        if not callable(attr) or item.startswith("_"):
+            return attr
+        counter, category = self._counter, self._category
+
+        def call(*args, **kwargs):
+            if not _on():
+                return attr(*args, **kwargs)
+            count(counter)
+            count(f"{counter}.{item}")
+            with span(f"{counter}.{item}", category):
+                return attr(*args, **kwargs)
+
+        return call
+
+
+def begin_page(page: str) -> None:
+    """Start per-rerun totals for a Streamlit page script."""
+    # Reset first: a rerun that raised before end_page must not leave this thread profiling.
+    _local.debug = False
+    _local.page = None
+    st = sys.modules.get("streamlit")
+    _local.debug = st is not None and _debug_session(st)
+    if not _on():
+        _local.page = None
+        return
+    _local.page = PageRun(page=page, started_at=time.time(), duration_ms=0.0)
+    _local.page_t0 = time.perf_counter()
+
+
+def end_page(render_sidebar: bool = True) -> Optional[PageRun]:
+    """Close the current page run and optionally draw the debug sidebar."""
+    run = getattr(_local, "page", None)
+    _local.page = None
+    if run is not None:
+        run.duration_ms = (time.perf_counter() - _local.page_t0) * 1000.0
+        with _LOCK:
+            _page_runs.append(run)
+        if getattr(_local, "debug", False):
+            runs = _session_runs()
+            if runs is not None:
+                runs.append(run)
+                del runs[:-MAX_PAGE_RUNS]
+    try:
+        if render_sidebar:
+            render_debug_sidebar()
+    finally:
+        _local.debug = False  # the thread may serve another session next
+    return run
+
+
+def _session_runs() -> Optional[List[PageRun]]:
+    st = sys.modules.get("streamlit")
+    try:
+        return st.session_state.setdefault(RUNS_STATE_KEY, [])  # type: ignore[union-attr]
+    except Exception:
+        return None
+
+
+def snapshot() -> Dict[str, Any]:
+    with _LOCK:
+        return {
+            "enabled": _on(),
+            "stats": {k: asdict(v) for k, v in _stats.items()},
+            "counters": dict(_counters),
+            "page_runs": [asdict(r) for r in _page_runs],
+        }
+
+
+def export_jsonl(path: Path) -> Path:
+    """Write spans, page runs and a final summary as JSON lines."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _LOCK:
+        events = [asdict(e) for e in _events]
+        runs = [asdict(r) for r in _page_runs]
+        summary = {
+            "stats": {k: asdict(v) for k, v in _stats.items()},
+            "counters": dict(_counters),
+        }
+    with open(path, "w", encoding="utf-8") as f:
+        for ev in events:
+            f.write(json.dumps({"type": "span", **ev}) + "\n")
+        for run in runs:
+            f.write(json.dumps({"type": "page_run", **run}) + "\n")
+        f.write(json.dumps({"type": "summary", **summary}) + "\n")
+    return path
+
+
+def _debug_session(st) -> bool:
+    """Whether this browser session asked for profiling (``?debug=1``, until ``?debug=0``)."""
+    try:
+        flag = str(st.query_params.get("debug", "")).lower()
+        if flag in ("1", "true", "yes"):
+            st.session_state[DEBUG_STATE_KEY] = True
+        elif flag in ("0", "false", "no"):
+            st.session_state[DEBUG_STATE_KEY] = False
+        return bool(st.session_state.get(DEBUG_STATE_KEY, False))
+    except Exception:
+        return False
+
+
+def render_debug_sidebar() -> None:
+    """Opt-in sidebar panel with the latest page run and hottest spans."""
+    if not _on():
+        return
+    import pandas as pd
+    import streamlit as st
+
+    session = getattr(_local, "debug", False) and not _ENABLED
+    if session:
+        # Only this browser session's reruns; other sessions are not profiled.
+        runs = [asdict(r) for r in (_session_runs() or [])]
+        spans: Dict[str, float] = {}
+        counters: Dict[str, int] = {}
+        for r in runs:
+            for k, v in r["span_ms"].items():
+                spans[k] = spans.get(k, 0.0) + v
+            for k, n in r["counters"].items():
+                counters[k] = counters.get(k, 0) + n
+        stats = pd.DataFrame({"self_ms": pd.Series(spans, dtype=float)})
+        scope = f"This browser session, {len(runs)} reruns"
+    else:
+        snap = snapshot()
+        runs, counters = snap["page_runs"], snap["counters"]
+        stats = pd.DataFrame.from_dict(snap["stats"], orient="index")
+        scope = "Whole process, all sessions (HABITS_PROFILE)"
+    with st.sidebar.expander("Debug: performance", expanded=False):
+        st.caption(scope)
+        if runs:
+            last = runs[-1]
+            st.caption(f"Last rerun of {last['page']}: {last['duration_ms']:.1f} ms")
+            st.dataframe(
+                pd.Series(last["by_category_ms"], name="self ms").sort_values(ascending=False),
+                width="stretch",
+            )
+            totals = pd.DataFrame(runs).groupby("page")["duration_ms"].agg(["count", "mean", "max"])
+            st.caption("Rerun totals per page (ms)")
+            st.dataframe(totals, width="stretch")
+        if not stats.empty:
+            st.caption("Spans")
+            st.dataframe(stats.sort_values("self_ms", ascending=False).head(25), width="stretch")
+        if counters:
+            st.caption("Counters")
+            st.json(counters, expanded=False)
+        from . import figcache
+
+        fc = figcache.stats()
+        if fc["hits"] or fc["misses"]:
+            st.caption(
+                f"Figure cache: {fc['hit_rate']:.0%} hit rate, {fc['entries']} figures "
+                f"({fc['bytes'] / 1024:.0f} KiB), {fc['bytes_saved'] / 1024:.0f} KiB served without a rebuild"
+            )
+        if st.button("Export profile (JSONL)", key="debug-export"):
+            p = export_jsonl(Path("data/profile.jsonl"))
+            st.success(f"Saved {p}")
+        if st.button("Reset profile", key="debug-reset"):
+            reset()
+        if not _ENABLED and st.button("Stop profiling", key="debug-stop"):
+            st.session_state[DEBUG_STATE_KEY] = False
+            st.query_params.pop("debug", None)
+            st.rerun()
@@ -0,0 +1,293 @@
+"""Background maintenance, run by one scheduler thread per server process.
+
+Nothing here runs on a user's rerun. Pages only call :func:`start` (a no-op
+after the first call) and read :func:`status`. The jobs:
+
+* ``backup`` weekly: a database snapshot (CSV export with Sheets), pruned to
+  the newest ``snapshot.KEEP_SNAPSHOTS``;
+* ``warm`` whenever the data version changes: re-load the reads pages start
+  with, so the rerun after a write finds them cached;
+* ``checkpoint`` hourly: fold the WAL back into the database file;
+* ``db-check`` daily: ``PRAGMA quick_check``, ``PRAGMA optimize`` and pruning
+  of the change log;
+* ``sheets-archive`` daily: with the Sheets backend, move months older than
+  ``sheets_repo.HOT_DAYS`` out of the hot worksheet.
+
+Shared jobs keep their schedule and a lease in the ``maintenance`` table,
+so with several server processes each run happens in exactly one of them
+and the weekly cadence survives restarts. Every next run is pushed by a
+random jitter so processes started together do not all wake at once.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy import insert, select, update
+
+from . import db, repo
+from .changes import prune_changes
+from .instrument import timed
+from .models import MaintenanceTask
+
+log = logging.getLogger(__name__)
+
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+TICK_S = 5.0  # how often the thread looks for due jobs
+LEASE = timedelta(minutes=15)  # a crashed holder's lease expires after this
+HOUR = 3600.0
+DAY = 24 * HOUR
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    every: float  # seconds between runs
+    run: Callable[[], object]  # its return value is shown as the run's detail
+    jitter: float = 0.1  # each next run moves by up to +/- this share of ``every``
+    first_delay: float = 60.0  # first run after a fresh database (also jittered)
+    shared: bool = True  # one process at a time via the lease; False: every process runs it
+    when: Optional[Callable[[], bool]] = None  # run whenever this says so, not on a clock
+
+
+@dataclass
+class Run:
+    started: Optional[datetime] = None
+    finished: Optional[datetime] = None
+    status: Optional[str] = None  # running | ok | error
+    detail: Optional[str] = None
+    ms: Optional[float] = None
+
+
+def _backup() -> str:
+    return str(repo.auto_backup())
+
+
+def _checkpoint() -> str:
+    busy, wal, done = db.checkpoint("TRUNCATE")
+    return f"{done}/{wal} WAL pages copied" + (" (busy)" if busy else "")
+
+
+def _db_check() -> str:
+    result = db.quick_check()
+    if result != "ok":
+        raise RuntimeError(f"quick_check: {result}")
+    db.optimize()
+    return f"ok; pruned {prune_changes()} change-log entries"
+
+
+def _sheets_archive() -> str:
+    result = repo.archive_sheets()
+    if result is None:
+        return "not using Sheets"
+    return f"moved {result['moved']} days; hot from {result['watermark']}"
+
+
+class _Warmer:
+    # Per process: the read caches live in this process.
+    def __init__(self):
+        self.version: Optional[str] = None
+
+    def due(self) -> bool:
+        return repo.data_version() != self.version
+
+    def run(self) -> str:
+        version = repo.data_version()
+        n = repo.warm_caches()
+        self.version = version
+        return f"{n} reads at {version}"
+
+
+def default_tasks() -> List[Task]:
+    warmer = _Warmer()
+    return [
+        Task("backup", 7 * DAY, _backup, first_delay=5 * 60.0),
+        Task("warm", 0.0, warmer.run, shared=False, when=warmer.due),
+        Task("checkpoint", HOUR, _checkpoint),
+        Task("db-check", DAY, _db_check, first_delay=15 * 60.0),
+        Task("sheets-archive", DAY, _sheets_archive, first_delay=10 * 60.0),
+    ]
+
+
+class Scheduler:
+    def __init__(self, tasks: List[Task], tick: float = TICK_S, owner: str = OWNER,
+                 rng: Optional[random.Random] = None):
+        self.tasks: Dict[str, Task] = {t.name: t for t in tasks}
+        self.tick = tick
+        self.owner = owner
+        self._rng = rng or random.Random()
+        self._runs: Dict[str, Run] = {t.name: Run() for t in tasks}
+        self._local_due: Dict[str, datetime] = {}
+        self._requested: set = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _after(self, now: datetime, seconds: float, jitter: float) -> datetime:
+        return now + timedelta(seconds=seconds * (1.0 + self._rng.uniform(-jitter, jitter)))
+
+    # -- shared schedule and lease (SQLite) ------------------------------
+    def _acquire(self, task: Task, now: datetime, forced: bool) -> bool:
+        with db.session_scope() as s:
+            s.execute(
+                insert(MaintenanceTask).prefix_with("OR IGNORE").values(
+                    name=task.name, next_due=self._after(now, task.first_delay, 1.0)
+                )
+            )
+            free = (MaintenanceTask.lease_until.is_(None)) | (MaintenanceTask.lease_until < now)
+            cond = [MaintenanceTask.name == task.name, free]
+            if not forced:
+                cond.append(MaintenanceTask.next_due <= now)
+            res = s.execute(
+                update(MaintenanceTask).where(*cond).values(
+                    lease_owner=self.owner, lease_until=now + LEASE, last_started=now, last_status="running"
+                )
+            )
+            return res.rowcount == 1
+
+    def _release(self, task: Task, run: Run) -> None:
+        with db.session_scope() as s:
+            s.execute(
+                update(MaintenanceTask)
+                .where(MaintenanceTask.name == task.name, MaintenanceTask.lease_owner == self.owner)
+                .values(
+                    lease_owner=None, lease_until=None, last_finished=run.finished, last_status=run.status,
+                    last_detail=run.detail, last_ms=run.ms,
+                    next_due=self._after(run.finished, task.every, task.jitter),
+                )
+            )
+
+    # -- running ---------------------------------------------------------
+    def _due_locally(self, task: Task, now: datetime) -> bool:
+        if task.when is not None:
+            return task.when()
+        if task.name not in self._local_due:
+            self._local_due[task.name] = self._after(now, task.first_delay, 1.0)
+        return now >= self._local_due[task.name]
+
+    def _execute(self, task: Task, now: datetime) -> Run:
+        run = Run(started=now, status="running")
+        self._runs[task.name] = run
+        t0 = time.perf_counter()
+        try:
+            result = task.run()
+            run.status, run.detail = "ok", None if result is None else str(result)
+        except Exception as exc:
+            log.exception("maintenance: %s failed", task.name)
+            run.status, run.detail = "error", f"{type(exc).__name__}: {exc}"[:300]
+        run.ms = (time.perf_counter() - t0) * 1000.0
+        run.finished = now + timedelta(milliseconds=run.ms)
+        return run
+
+    @timed("maintenance")
+    def run_pending(self, now: Optional[datetime] = None) -> List[str]:
+        """Run every job that is due (or was requested); returns the names run."""
+        now = now or datetime.utcnow()
+        with self._lock:
+            requested, self._requested = self._requested, set()
+        ran = []
+        for task in self.tasks.values():
+            forced = task.name in requested
+            if task.shared and task.when is None:
+                if not self._acquire(task, now, forced):
+                    continue
+                self._release(task, self._execute(task, now))
+            else:
+                if not (forced or self._due_locally(task, now)):
+                    continue
+                run = self._execute(task, now)
+                if task.when is None:
+                    self._local_due[task.name] = self._after(run.finished, task.every, task.jitter)
+            ran.append(task.name)
+        return ran
+
+    def request(self, name: str) -> None:
+        """Run ``name`` on the next tick, whatever its schedule (skipped if another process holds it)."""
+        if name not in self.tasks:
+            raise ValueError(f"unknown maintenance task: {name}")
+        with self._lock:
+            self._requested.add(name)
+        self._wake.set()
+
+    def status(self) -> pd.DataFrame:
+        """One row per job: its schedule and the last run (from any process for shared jobs)."""
+        with db.session_scope() as s:
+            rows = {r.name: r for r in s.execute(select(MaintenanceTask)).scalars()}
+        with self._lock:
+            requested = set(self._requested)
+        out = []
+        for task in self.tasks.values():
+            row = rows.get(task.name) if task.shared and task.when is None else None
+            run = self._runs[task.name]
+            out.append({
+                "task": task.name,
+                "every": "on change" if task.when is not None else str(timedelta(seconds=task.every)),
+                "status": row.last_status if row else run.status,
+                "last_started": row.last_started if row else run.started,
+                "ms": row.last_ms if row else run.ms,
+                "detail": row.last_detail if row else run.detail,
+                "next_due": row.next_due if row else self._local_due.get(task.name),
+                "owner": (row.lease_owner if row else None) or "",
+                "requested": task.name in requested,
+            })
+        return pd.DataFrame(out)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception:  # pragma: no cover - never let the scheduler die
+                log.exception("maintenance: tick failed")
+            self._wake.wait(self.tick)
+            self._wake.clear()
+
+
+_SCHEDULER: Optional[Scheduler] = None
+_START_LOCK = threading.Lock()
+
+
+def enabled() -> bool:
+    return os.getenv("HABITS_MAINTENANCE", "1") not in ("0", "false", "no")
+
+
+def start() -> Optional[Scheduler]:
+    """Start this server's scheduler once (later calls return it); None when disabled."""
+    global _SCHEDULER
+    if not enabled():
+        return None
+    with _START_LOCK:
+        if _SCHEDULER is None:
+            _SCHEDULER = Scheduler(default_tasks())
+            _SCHEDULER.start()
+    return _SCHEDULER
+
+
+def stop() -> None:
+    global _SCHEDULER
+    with _START_LOCK:
+        if _SCHEDULER is not None:
+            _SCHEDULER.stop()
+            _SCHEDULER = None
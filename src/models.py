@@ -3,7 +3,8 @@ from __future__ import annotations
 from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import Column, Date, DateTime, Float, Integer, MetaData, String
+from sqlalchemy import Boolean, Column, Date, DateTime, Float, Integer, MetaData, String
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -26,7 +27,190 @@ class DailyMetrics(Base):
     notes: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # src.hashing.content_hash of the values; NULL on rows written before it existed.
+    content_hash: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+
+
+class OutboxEntry(Base):
+    """A pending write to the remote backend, one row per date (edits coalesce)."""
+
+    __tablename__ = "outbox"
+
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
+    op: Mapped[str] = mapped_column(String, nullable=False)  # "upsert" | "delete"
+    payload: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # JSON
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    enqueued_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class ChangeLogEntry(Base):
+    """Append-only record of every change to ``daily_metrics`` (see ``src.changes``)."""
+
+    __tablename__ = "change_log"
+    __table_args__ = {"sqlite_autoincrement": True}  # ids are never reused
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    date: Mapped[date] = mapped_column(Date, nullable=False)
+    op: Mapped[str] = mapped_column(String, nullable=False)  # insert | update | delete | upsert
+    changed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class Rollup(Base):
+    """Per-bucket aggregates of one metric, kept in step with ``daily_metrics`` (see ``src.rollups``)."""
+
+    __tablename__ = "rollups"
+
+    period: Mapped[str] = mapped_column(String, primary_key=True)  # "W" (Monday weeks) | "M"
+    bucket: Mapped[date] = mapped_column(Date, primary_key=True)
+    metric: Mapped[str] = mapped_column(String, primary_key=True)
+    n: Mapped[int] = mapped_column(Integer, nullable=False)
+    total: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    min: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    max: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
+
+class DerivedState(Base):
+    """Resumable state of a derived feature (e.g. the anomaly detector) as JSON.
+
+    ``cursor`` is the change-log id the state reflects (see ``src.changes``).
+    """
+
+    __tablename__ = "derived_state"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[str] = mapped_column(String, nullable=False)
+    cursor: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class Anomaly(Base):
+    """A day whose metric value was flagged by ``src.anomaly``."""
+
+    __tablename__ = "anomalies"
+
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
+    metric: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[float] = mapped_column(Float, nullable=False)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+
+
+class GoalRow(Base):
+    """A user-defined goal (see ``src.goals``); deleting one only deactivates it."""
+
+    __tablename__ = "goals"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    metric: Mapped[str] = mapped_column(String, nullable=False)
+    op: Mapped[str] = mapped_column(String, nullable=False)  # <= | >= | < | > | ==
+    value: Mapped[float] = mapped_column(Float, nullable=False)
+    days: Mapped[str] = mapped_column(String, nullable=False, default="all")  # all | weekdays | weekends | MON,TUE,...
+    window_k: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # at least k of
+    window_n: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # the last n days
+    active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class MaintenanceTask(Base):
+    """Schedule, lease and last outcome of a background job (see ``src.maintenance``).
+
+    The lease makes a job run in one server process at a time.
+    """
+
+    __tablename__ = "maintenance"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    next_due: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    lease_owner: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    lease_until: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_started: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_finished: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_status: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # running | ok | error
+    last_detail: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    last_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
+
+# SQLite keeps the change log in step with daily_metrics, whoever writes to it.
+_CHANGE_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS daily_metrics_log_insert AFTER INSERT ON daily_metrics
+    BEGIN
+        INSERT INTO change_log (date, op, changed_at)
+        VALUES (NEW.date, 'insert', strftime('%Y-%m-%d %H:%M:%f', 'now'));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS daily_metrics_log_update AFTER UPDATE ON daily_metrics
+    BEGIN
+        INSERT INTO change_log (date, op, changed_at)
+        SELECT OLD.date, 'delete', strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE OLD.date <> NEW.date;
+        INSERT INTO change_log (date, op, changed_at)
+        VALUES (NEW.date, 'update', strftime('%Y-%m-%d %H:%M:%f', 'now'));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS daily_metrics_log_delete AFTER DELETE ON daily_metrics
+    BEGIN
+        INSERT INTO change_log (date, op, changed_at)
+        VALUES (OLD.date, 'delete', strftime('%Y-%m-%d %H:%M:%f', 'now'));
+    END""",
+]
+
+
+# Full-text index over notes (see ``src.search``). A standalone FTS5 table keyed
+# by day number, so the triggers update it with rowid lookups.
+_DAY_NO = "CAST(julianday({}) AS INTEGER)"
+_FTS_TABLE = "CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(date UNINDEXED, notes)"
+_FTS_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS daily_metrics_fts_insert AFTER INSERT ON daily_metrics
+    WHEN NEW.notes IS NOT NULL AND NEW.notes <> ''
+    BEGIN
+        INSERT INTO notes_fts (rowid, date, notes) VALUES ({_DAY_NO.format("NEW.date")}, NEW.date, NEW.notes);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS daily_metrics_fts_update AFTER UPDATE OF date, notes ON daily_metrics
+    BEGIN
+        DELETE FROM notes_fts WHERE rowid = {_DAY_NO.format("OLD.date")};
+        INSERT INTO notes_fts (rowid, date, notes)
+        SELECT {_DAY_NO.format("NEW.date")}, NEW.date, NEW.notes WHERE NEW.notes IS NOT NULL AND NEW.notes <> '';
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS daily_metrics_fts_delete AFTER DELETE ON daily_metrics
+    BEGIN
+        DELETE FROM notes_fts WHERE rowid = {_DAY_NO.format("OLD.date")};
+    END""",
+]
+
+
+def _create_fts(conn) -> None:
+    exists = conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'notes_fts'").first()
+    try:
+        conn.exec_driver_sql(_FTS_TABLE)
+    except OperationalError:  # SQLite built without FTS5: search falls back to LIKE
+        return
+    for ddl in _FTS_TRIGGERS:
+        conn.exec_driver_sql(ddl)
+    if not exists:  # index notes written before the table existed
+        conn.exec_driver_sql(
+            f"INSERT INTO notes_fts (rowid, date, notes) SELECT {_DAY_NO.format('date')}, date, notes "
+            "FROM daily_metrics WHERE notes IS NOT NULL AND notes <> ''"
+        )
+
+
+# Columns added after the first release: (table, column, DDL type). create_all
+# does not alter existing tables, so older databases get them here.
+_ADDED_COLUMNS = [
+    ("daily_metrics", "content_hash", "VARCHAR"),
+]
+
+
+def _add_columns(conn) -> None:
+    for table, column, ddl in _ADDED_COLUMNS:
+        have = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+        if column not in have:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
 
 
 def create_all(engine):
     Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        _add_columns(conn)
+        for ddl in _CHANGE_TRIGGERS:
+            conn.exec_driver_sql(ddl)
+        _create_fts(conn)
@@ -0,0 +1,226 @@
+"""Durable write-behind queue for the remote (Google Sheets) backend.
+
+Edits land in the local SQLite ``outbox`` table and return immediately; a
+background thread drains them to the remote sink. Repeated edits to the same
+date coalesce into one pending row, failures are retried with exponential
+backoff, and readers overlay pending edits so the UI never shows stale data.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Protocol
+
+import pandas as pd
+from sqlalchemy import delete, func, select, update
+
+from .db import session_scope
+from .instrument import timed
+from .models import OutboxEntry
+
+log = logging.getLogger(__name__)
+
+
+class Sink(Protocol):
+    def upsert_day(self, payload: Dict[str, Any]) -> None: ...
+
+    def delete_day(self, d: date) -> bool: ...
+
+
+@dataclass
+class PendingEdit:
+    date: date
+    op: str
+    payload: Optional[Dict[str, Any]]
+    version: int
+    attempts: int
+    last_error: Optional[str]
+
+
+def _jsonable(v: Any) -> Any:
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    if hasattr(v, "item"):  # NumPy scalars
+        return v.item()
+    return v
+
+
+def _encode(payload: Dict[str, Any]) -> str:
+    return json.dumps({k: _jsonable(v) for k, v in payload.items()})
+
+
+def _decode(raw: Optional[str]) -> Optional[Dict[str, Any]]:
+    if raw is None:
+        return None
+    payload = json.loads(raw)
+    payload["date"] = date.fromisoformat(payload["date"])
+    return payload
+
+
+class Outbox:
+    def __init__(self, sink: Sink, base_delay: float = 2.0, max_delay: float = 300.0, interval: float = 1.0):
+        self.sink = sink
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- writes -------------------------------------------------------------
+
+    def _enqueue(self, d: date, op: str, payload: Optional[Dict[str, Any]]) -> None:
+        now = datetime.utcnow()
+        with session_scope() as s:
+            entry = s.get(OutboxEntry, d)
+            if entry is None:
+                s.add(OutboxEntry(
+                    date=d, op=op, payload=_encode(payload) if payload else None, version=1,
+                    attempts=0, enqueued_at=now, next_attempt_at=now,
+                ))
+            else:
+                if op == "upsert" and entry.op == "upsert" and entry.payload:
+                    # Partial payloads merge over the earlier pending edit.
+                    payload = {**_decode(entry.payload), **payload}  # type: ignore[arg-type]
+                entry.op = op
+                entry.payload = _encode(payload) if payload else None
+                entry.version += 1
+                entry.attempts = 0
+                entry.last_error = None
+                entry.next_attempt_at = now
+        self._wake.set()
+
+    @timed("outbox")
+    def enqueue_upsert(self, payload: Dict[str, Any]) -> None:
+        self._enqueue(payload["date"], "upsert", payload)
+
+    @timed("outbox")
+    def enqueue_delete(self, d: date) -> None:
+        self._enqueue(d, "delete", None)
+
+    # -- reads --------------------------------------------------------------
+
+    def pending(self) -> Dict[date, PendingEdit]:
+        with session_scope() as s:
+            rows = s.execute(select(OutboxEntry).order_by(OutboxEntry.date)).scalars().all()
+            return {r.date: self._view(r) for r in rows}
+
+    def pending_for(self, d: date) -> Optional[PendingEdit]:
+        with session_scope() as s:
+            r = s.get(OutboxEntry, d)
+            return self._view(r) if r is not None else None
+
+    @staticmethod
+    def _view(r: OutboxEntry) -> PendingEdit:
+        return PendingEdit(r.date, r.op, _decode(r.payload), r.version, r.attempts, r.last_error)
+
+    def stats(self) -> Dict[str, Any]:
+        with session_scope() as s:
+            n, failing, oldest = s.execute(
+                select(
+                    func.count(),
+                    func.count(OutboxEntry.last_error),
+                    func.min(OutboxEntry.enqueued_at),
+                )
+            ).one()
+        return {"pending": n, "failing": failing, "oldest": oldest}
+
+    @timed("outbox")
+    def overlay(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Apply pending edits on top of a frame read from the remote backend."""
+        pending = self.pending()
+        if not pending:
+            return df
+        if df.empty:
+            df = pd.DataFrame(columns=["date"])
+        keys = pd.to_datetime(df["date"]).dt.date.to_numpy() if len(df) else []
+        drop = pd.Series(keys, dtype=object).isin(pending.keys()).to_numpy()
+        existing = {k: row for k, row in zip(keys[drop], df.loc[drop].to_dict("records"))} if len(df) else {}
+        rows: List[Dict[str, Any]] = []
+        for d, edit in pending.items():
+            if edit.op != "upsert":
+                continue
+            base = existing.get(d, {})
+            rows.append({**base, **edit.payload, "date": pd.Timestamp(d)})  # type: ignore[dict-item]
+        out = df.loc[~drop]
+        if rows:
+            out = pd.concat([out, pd.DataFrame(rows)], ignore_index=True)
+        out["date"] = pd.to_datetime(out["date"])
+        return out.sort_values("date").reset_index(drop=True)
+
+    # -- flushing -----------------------------------------------------------
+
+    def _backoff(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(self.max_delay, self.base_delay * 2 ** max(attempts - 1, 0)))
+
+    @timed("outbox")
+    def flush(self, now: Optional[datetime] = None) -> int:
+        """Push every due edit to the sink; returns how many were delivered."""
+        with self._flush_lock:
+            now = now or datetime.utcnow()
+            with session_scope() as s:
+                due = [
+                    self._view(r)
+                    for r in s.execute(
+                        select(OutboxEntry)
+                        .where(OutboxEntry.next_attempt_at <= now)
+                        .order_by(OutboxEntry.date)
+                    ).scalars()
+                ]
+            delivered = 0
+            for edit in due:
+                try:
+                    if edit.op == "upsert":
+                        self.sink.upsert_day(dict(edit.payload))  # type: ignore[arg-type]
+                    else:
+                        self.sink.delete_day(edit.date)
+                except Exception as exc:  # keep the edit and retry later
+                    log.warning("outbox: %s %s failed: %s", edit.op, edit.date, exc)
+                    attempts = edit.attempts + 1
+                    with session_scope() as s:
+                        s.execute(
+                            update(OutboxEntry)
+                            .where(OutboxEntry.date == edit.date, OutboxEntry.version == edit.version)
+                            .values(
+                                attempts=attempts,
+                                last_error=str(exc)[:500],
+                                next_attempt_at=now + self._backoff(attempts),
+                            )
+                        )
+                    continue
+                with session_scope() as s:
+                    # A newer edit for the same date (higher version) stays queued.
+                    s.execute(
+                        delete(OutboxEntry).where(
+                            OutboxEntry.date == edit.date, OutboxEntry.version == edit.version
+                        )
+                    )
+                delivered += 1
+            return delivered
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:  # pragma: no cover - never let the flusher die
+                log.exception("outbox: flush failed")
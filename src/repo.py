@@ -1,29 +1,54 @@
 from __future__ import annotations
 
+import calendar
 import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import date, datetime
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import pandas as pd
-from sqlalchemy import select
-
-from .db import get_engine, session_scope, utcnow_str
+from sqlalchemy import func, select
+
+from . import (
+    anomaly,
+    forecast,
+    frames,
+    goals,
+    instrument,
+    rollups,
+    search,
+    seasonality,
+    shared,
+    snapshot,
+)
+from .analytics import resample
+from .changes import latest_cursor, record_changes
+from .db import get_engine, session_scope
+from .hashing import content_hash, record_hash
+from .instrument import timed
 from .models import DailyMetrics, create_all
-from .validation import validate_date, validate_ranges
-
-# Optional Google Sheets backend
-try:  # lazy optional imports
-    import streamlit as st  # type: ignore
-except Exception:  # pragma: no cover
-    st = None  # type: ignore
+from .outbox import Outbox
+from .validation import ValidationReport, validate_frame, validate_payload
+from .writer import Writer
 
+# Optional Google Sheets backend; the Google client stack is imported on first connect
 try:
-    from .sheets_repo import GoogleSheetRepo, SheetsConfig, _load_service_account_dict
+    from .sheets_repo import (
+        GoogleSheetRepo,
+        SheetsConfig,
+        _load_service_account_dict,
+        client_available,
+    )
 except Exception:  # pragma: no cover
     GoogleSheetRepo = None  # type: ignore
     SheetsConfig = None  # type: ignore
     _load_service_account_dict = None  # type: ignore
+    client_available = None  # type: ignore
 
 
 DATA_DIR = Path("data")
@@ -32,9 +57,42 @@ BACKUP_DIR = Path("backups")
 
 _SHEETS_REPO: Optional[GoogleSheetRepo] = None  # type: ignore
 
+_DEFAULTS = {
+    "sugar_intake_g": 0,
+    "water_ml": 0,
+    "fap_count": 0,
+    "productive_hours": 0.0,
+    "weight_kg": None,
+    "notes": None,
+}
+
+# Bumped on every write from this process; part of data_version().
+_WRITE_EPOCH = 0
+SHEETS_VERSION_TTL = 60  # seconds
+
+_OUTBOX: Optional[Outbox] = None
+_WRITER: Optional[Writer] = None
+
+READ_CACHE_SIZE = 32
+_READ_CACHE: "OrderedDict[tuple, Tuple[str, Any]]" = OrderedDict()
+_READ_LOCK = threading.Lock()
+
+_PAYLOAD_COLUMNS = [
+    "date",
+    "sugar_intake_g",
+    "water_ml",
+    "fap_count",
+    "productive_hours",
+    "weight_kg",
+    "notes",
+]
+
 
 def _get_spreadsheet_id() -> Optional[str]:
-    # Priority: Streamlit secrets, env var, then project default from user's shared sheet
+    # Priority: Streamlit secrets, env var, then project default from user's shared sheet.
+    # Secrets are only consulted when already running under Streamlit, so CLI tools
+    # and tests never pay for importing it.
+    st = sys.modules.get("streamlit")
     if st is not None:
         for key in ("spreadsheet_id", "google_spreadsheet_id", "GOOGLE_SHEETS_SPREADSHEET_ID"):
             try:
@@ -53,7 +111,7 @@ def _get_spreadsheet_id() -> Optional[str]:
 def _sheets_enabled() -> bool:
     if GoogleSheetRepo is None or SheetsConfig is None:
         return False
-    if _load_service_account_dict is None:
+    if _load_service_account_dict is None or client_available is None or not client_available():
         return False
     sa = _load_service_account_dict()
     sid = _get_spreadsheet_id()
@@ -68,63 +126,198 @@ def _get_sheets_repo() -> GoogleSheetRepo:  # type: ignore[name-defined]
     return _SHEETS_REPO
 
 
-def init_db():
+def _write_behind() -> bool:
+    """Sheets writes go through the local outbox unless HABITS_WRITE_BEHIND=0."""
+    return os.getenv("HABITS_WRITE_BEHIND", "1") not in ("0", "false", "no")
+
+
+class _SheetsSink:
+    # Resolves the Sheets repo at flush time so enqueueing never touches the network.
+    def upsert_day(self, payload: dict) -> None:
+        _get_sheets_repo().upsert_day(payload)
+
+    def delete_day(self, d: date) -> bool:
+        return _get_sheets_repo().delete_day(d)
+
+
+def _get_outbox() -> Outbox:
+    global _OUTBOX
+    if _OUTBOX is None:
+        _OUTBOX = Outbox(_SheetsSink())
+        _OUTBOX.start()
+    return _OUTBOX
+
+
+def _single_writer() -> bool:
+    """SQLite writes go through the group-commit writer unless HABITS_SINGLE_WRITER=0."""
+    return os.getenv("HABITS_SINGLE_WRITER", "1") not in ("0", "false", "no")
+
+
+def _get_writer() -> Writer:
+    global _WRITER
+    if _WRITER is None:
+        with _READ_LOCK:
+            if _WRITER is None:
+                _WRITER = Writer(finish=_derive_tx)
+    return _WRITER
+
+
+def _derive_tx(s) -> None:
+    # Once per transaction (a whole group commit), driven by the change log.
+    anomaly.sync(s)
+    forecast.sync(s)
+    seasonality.sync(s)
+
+
+def _write(fn):
+    """Run ``fn(session)`` in a SQLite write transaction and return its result."""
+    if _single_writer():
+        return _get_writer().run(fn)
+    with session_scope() as s:
+        result = fn(s)
+        _derive_tx(s)
+        return result
+
+
+def writer_stats() -> Optional[dict]:
+    """Group-commit counters (batches, jobs, largest batch), or None if unused."""
+    return _WRITER.stats() if _WRITER is not None else None
+
+
+def _remote_frame(start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+    """Days from Sheets (all, or ``start``..``end``) with not-yet-flushed local edits applied."""
+    df = _get_sheets_repo().to_dataframe(start, end)
+    if _write_behind():
+        df = _get_outbox().overlay(df)
+        if (start or end) and not df.empty:
+            days = df["date"].dt.date
+            df = df.loc[(days >= (start or date.min)) & (days <= (end or date.max))].reset_index(drop=True)
+    return frames.compact(df)
+
+
+@timed("repo")
+def pending_sync() -> Optional[dict]:
+    """Outbox status (pending/failing edits) when writing behind to Sheets, else None."""
+    if not (_sheets_enabled() and _write_behind()):
+        return None
+    return _get_outbox().stats()
+
+
+def _bump_version() -> None:
+    global _WRITE_EPOCH
+    _WRITE_EPOCH += 1
+
+
+@timed("repo")
+def data_version() -> str:
+    """Opaque token that changes whenever the stored days may have changed.
+
+    Use it as a cache key for anything derived from :func:`to_dataframe`.
+    """
     if _sheets_enabled():
+        # Edits made directly in the sheet are not observable cheaply; age the token out.
+        return f"s{_WRITE_EPOCH}.{int(time.time() // SHEETS_VERSION_TTL)}"
+    # Triggers log every write, including ones made outside the app.
+    return f"{_WRITE_EPOCH}.{latest_cursor()}"
+
+
+@timed("repo")
+def init_db():
+    # Local tables always exist: they hold the data in SQLite mode and the outbox otherwise.
+    create_all(get_engine())
+    with session_scope() as s:
+        goals.ensure_defaults(s)
+    if not _sheets_enabled():
+        with session_scope() as s:
+            rollups.ensure(s)
+    else:
         # Ensure worksheet exists and headers are present
         _get_sheets_repo()
-    else:
-        engine = get_engine()
-        create_all(engine)
 
 
-def upsert_day(payload: dict) -> None:
+@timed("repo")
+def upsert_day(payload: dict) -> str:
+    """Insert or update one day; returns ``"inserted"``, ``"updated"`` or ``"unchanged"``.
+
+    A payload whose values match the stored row (by content hash) writes
+    nothing: no ``updated_at`` bump, no change-log entry, no rollup refresh.
+    Queued Sheets writes report ``"updated"``; the flush skips the API write
+    if the row turns out to be unchanged.
+    """
     d = payload["date"]
     if isinstance(d, str):
         d = date.fromisoformat(d)
         payload["date"] = d
 
-    vd = validate_date(d)
-    if not vd.ok:
-        raise ValueError(vd.message)
-    vr = validate_ranges(payload)
+    vr = validate_payload(payload)
     if not vr.ok:
         raise ValueError(vr.message)
 
     if _sheets_enabled():
-        # Delegate to Sheets
-        _get_sheets_repo().upsert_day(payload)
-        return
-    # Fallback to SQLite
-    now = datetime.utcnow()
-    with session_scope() as s:
-        instance = s.get(DailyMetrics, d)
-        if instance is None:
-            instance = DailyMetrics(
-                date=d,
-                sugar_intake_g=int(payload.get("sugar_intake_g", 0)),
-                water_ml=int(payload.get("water_ml", 0)),
-                fap_count=int(payload.get("fap_count", 0)),
-                productive_hours=float(payload.get("productive_hours", 0.0)),
-                weight_kg=(
-                    float(payload["weight_kg"]) if payload.get("weight_kg") is not None else None
-                ),
-                notes=payload.get("notes"),
-                created_at=now,
-                updated_at=now,
-            )
-            s.add(instance)
+        # Delegate to Sheets, normally via the write-behind outbox
+        if _write_behind():
+            _get_outbox().enqueue_upsert(payload)
+            outcome = "updated"
         else:
-            instance.sugar_intake_g = int(payload.get("sugar_intake_g", instance.sugar_intake_g))
-            instance.water_ml = int(payload.get("water_ml", instance.water_ml))
-            instance.fap_count = int(payload.get("fap_count", instance.fap_count))
-            instance.productive_hours = float(
-                payload.get("productive_hours", instance.productive_hours)
-            )
-            instance.weight_kg = (
-                float(payload["weight_kg"]) if payload.get("weight_kg") is not None else instance.weight_kg
-            )
-            instance.notes = payload.get("notes", instance.notes)
-            instance.updated_at = now
+            outcome = _get_sheets_repo().upsert_day(payload)
+        if outcome != "unchanged":
+            record_changes([d], "upsert")
+    else:
+        # Fallback to SQLite
+        outcome = _write(lambda s: _upsert_tx(s, payload))
+    if outcome != "unchanged":
+        _bump_version()
+    return outcome
+
+
+def _upsert_tx(s, payload: dict) -> str:
+    d = payload["date"]
+    outcome = _apply_upsert(s, payload, datetime.utcnow())
+    if outcome != "unchanged":
+        rollups.refresh(s, [d])
+    return outcome
+
+
+def _merged(instance: Optional[DailyMetrics], payload: dict) -> dict:
+    """The values a row ends up with: payload fields over the stored ones (or defaults)."""
+    if instance is None:
+        return {
+            "sugar_intake_g": int(payload.get("sugar_intake_g", 0)),
+            "water_ml": int(payload.get("water_ml", 0)),
+            "fap_count": int(payload.get("fap_count", 0)),
+            "productive_hours": float(payload.get("productive_hours", 0.0)),
+            "weight_kg": float(payload["weight_kg"]) if payload.get("weight_kg") is not None else None,
+            "notes": payload.get("notes"),
+        }
+    return {
+        "sugar_intake_g": int(payload.get("sugar_intake_g", instance.sugar_intake_g)),
+        "water_ml": int(payload.get("water_ml", instance.water_ml)),
+        "fap_count": int(payload.get("fap_count", instance.fap_count)),
+        "productive_hours": float(payload.get("productive_hours", instance.productive_hours)),
+        "weight_kg": float(payload["weight_kg"]) if payload.get("weight_kg") is not None else instance.weight_kg,
+        "notes": payload.get("notes", instance.notes),
+    }
+
+
+def _apply_upsert(s, payload: dict, now: datetime) -> str:
+    """Insert or update one validated payload inside an open session.
+
+    Returns ``"inserted"``, ``"updated"`` or ``"unchanged"`` (nothing written).
+    """
+    d = payload["date"]
+    instance = s.get(DailyMetrics, d)
+    values = _merged(instance, payload)
+    digest = content_hash(values)
+    if instance is None:
+        s.add(DailyMetrics(date=d, **values, created_at=now, updated_at=now, content_hash=digest))
+        return "inserted"
+    if digest == (instance.content_hash or record_hash(instance)):
+        return "unchanged"
+    for k, v in values.items():
+        setattr(instance, k, v)
+    instance.updated_at = now
+    instance.content_hash = digest
+    return "updated"
 
 
 class _ObjView:
@@ -133,34 +326,58 @@ class _ObjView:
             setattr(self, k, v)
 
 
+@timed("repo")
 def get_day(d: date) -> Optional[object]:
     """Return a single day's record-like object with attributes or None."""
     if _sheets_enabled():
+        edit = _get_outbox().pending_for(d) if _write_behind() else None
+        if edit is not None:
+            if edit.op == "delete":
+                return None
+            rec = {} if set(_PAYLOAD_COLUMNS) <= set(edit.payload) else _get_sheets_repo().get_day(d)
+            return _ObjView({**_DEFAULTS, **(rec or {}), **edit.payload})
         rec = _get_sheets_repo().get_day(d)
         return _ObjView(rec) if rec else None
     with session_scope() as s:
         return s.get(DailyMetrics, d)
 
 
+@timed("repo")
 def delete_day(d: date) -> bool:
-    """Delete a day's record. Returns True if deleted, False if not found."""
+    """Delete a day's record. Returns True if deleted, False if not found.
+
+    When writing behind to Sheets the delete is queued and reported as done.
+    """
     if _sheets_enabled():
-        return _get_sheets_repo().delete_day(d)
-    with session_scope() as s:
-        obj = s.get(DailyMetrics, d)
-        if obj is None:
-            return False
-        s.delete(obj)
-        return True
+        if _write_behind():
+            _get_outbox().enqueue_delete(d)
+            deleted = True
+        else:
+            deleted = _get_sheets_repo().delete_day(d)
+        if deleted:
+            record_changes([d], "delete")
+    else:
+        deleted = _write(lambda s: _delete_tx(s, d))
+    if deleted:
+        _bump_version()
+    return deleted
 
 
+def _delete_tx(s, d: date) -> bool:
+    obj = s.get(DailyMetrics, d)
+    if obj is None:
+        return False
+    s.delete(obj)
+    rollups.refresh(s, [d])
+    return True
+
+
+@timed("repo")
 def get_between(start: date, end: date) -> List[DailyMetrics]:
     if _sheets_enabled():
-        df = _get_sheets_repo().to_dataframe()
-        if df.empty:
+        sub = _remote_frame(start, end)  # only the partitions the range overlaps
+        if sub.empty:
             return []
-        mask = (df["date"].dt.date >= start) & (df["date"].dt.date <= end)
-        sub = df.loc[mask]
         # Convert rows to lightweight objects akin to DailyMetrics for compatibility
         out: List[DailyMetrics] = []  # type: ignore[assignment]
         for _, r in sub.iterrows():
@@ -171,7 +388,7 @@ def get_between(start: date, end: date) -> List[DailyMetrics]:
                 "fap_count": int(r.get("fap_count", 0)),
                 "productive_hours": float(r.get("productive_hours", 0.0)),
                 "weight_kg": (float(r["weight_kg"]) if pd.notna(r.get("weight_kg")) else None),
-                "notes": r.get("notes", ""),
+                "notes": r.get("notes") if pd.notna(r.get("notes")) else None,
                 "created_at": r.get("created_at"),
                 "updated_at": r.get("updated_at"),
             }))
@@ -181,40 +398,363 @@ def get_between(start: date, end: date) -> List[DailyMetrics]:
         return list(res)
 
 
+@timed("repo")
 def to_dataframe(start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
     if _sheets_enabled():
-        df = _get_sheets_repo().to_dataframe()
-        if start and end and not df.empty:
-            mask = (df["date"].dt.date >= start) & (df["date"].dt.date <= end)
-            df = df.loc[mask]
-        return df
+        return _remote_frame(start, end) if start and end else _remote_frame()
     if start and end:
-        rows = get_between(start, end)
+        return _rows_frame(get_between(start, end))
+    if shared.enabled():
+        ver = shared.version(latest_cursor())
+        df = shared.load(ver, "days")
+        return df if df is not None else _publish_shared(ver)["days"]
+    with session_scope() as s:
+        rows = list(s.execute(select(DailyMetrics)).scalars())
+    return _rows_frame(rows)
+
+
+def _shared_frames(s) -> Dict[str, pd.DataFrame]:
+    anomaly.sync(s)  # no-op unless rows changed behind the repo's back
+    return {
+        "days": _rows_frame(s.execute(select(DailyMetrics)).scalars()),
+        "anomalies": anomaly.read(s),
+    }
+
+
+def _publish_shared(ver: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """Publish the frames other processes map (SQLite mode, when enabled); returns them.
+
+    Writes never call this: the first read of a new version does (normally
+    the maintenance ``warm`` job, right after the write), so saves do not pay
+    for re-reading the whole table. ``ver`` must be read before the rows so a snapshot never claims to be
+    newer than its contents. A failed publish only costs readers a fallback.
+    """
+    if _sheets_enabled() or not shared.enabled():
+        return {}
+    ver = ver or shared.version(latest_cursor())
+    with session_scope() as s:
+        out = _shared_frames(s)
+    try:
+        shared.publish(ver, out)
+    except OSError:
+        instrument.count("shared.publish_errors")
+    return out
+
+
+def _rows_frame(rows: Iterable[DailyMetrics]) -> pd.DataFrame:
+    rows = sorted(rows, key=lambda r: r.date)
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame({
+        "date": pd.to_datetime([r.date for r in rows]),
+        "sugar_intake_g": [r.sugar_intake_g for r in rows],
+        "water_ml": [r.water_ml for r in rows],
+        "fap_count": [r.fap_count for r in rows],
+        "productive_hours": [r.productive_hours for r in rows],
+        "weight_kg": [r.weight_kg for r in rows],
+        "notes": [r.notes for r in rows],
+        "created_at": [r.created_at for r in rows],
+        "updated_at": [r.updated_at for r in rows],
+    })
+    return frames.compact(df)
+
+
+def _cached_read(key: tuple, loader):
+    """Memoise a read until data_version() changes (shared by all sessions)."""
+    version = data_version()
+    with _READ_LOCK:
+        hit = _READ_CACHE.get(key)
+        if hit is not None and hit[0] == version:
+            _READ_CACHE.move_to_end(key)
+            return hit[1]
+    value = loader()
+    with _READ_LOCK:
+        _READ_CACHE[key] = (version, value)
+        while len(_READ_CACHE) > READ_CACHE_SIZE:
+            _READ_CACHE.popitem(last=False)
+    return value
+
+
+def reset_caches() -> None:
+    """Drop memoised reads, e.g. after the database file was replaced."""
+    global _WRITE_EPOCH
+    with _READ_LOCK:
+        _READ_CACHE.clear()
+    _WRITE_EPOCH += 1
+
+
+@timed("repo")
+def get_month(year: int, month: int) -> pd.DataFrame:
+    """All logged days of one month, indexed by ``datetime.date``.
+
+    One range query per data version; later calls (reruns, clicking between
+    days) are served from memory.
+    """
+    first = date(year, month, 1)
+    last = date(year, month, calendar.monthrange(year, month)[1])
+
+    def load() -> pd.DataFrame:
+        if _sheets_enabled():
+            df = _cached_read(("all",), _remote_frame)
+            if not df.empty:
+                df = df.loc[(df["date"] >= pd.Timestamp(first)) & (df["date"] <= pd.Timestamp(last))]
+        else:
+            df = to_dataframe(first, last)
+        if df.empty:
+            return df
+        return df.set_index(df["date"].dt.date.rename("day"))
+
+    return _cached_read(("month", year, month), load)
+
+
+@timed("repo")
+def recent_days(n: int = 10) -> pd.DataFrame:
+    """The ``n`` most recent logged days in date order."""
+
+    def load() -> pd.DataFrame:
+        if _sheets_enabled():
+            return _cached_read(("all",), _remote_frame).tail(n)
+        with session_scope() as s:
+            rows = list(
+                s.execute(select(DailyMetrics).order_by(DailyMetrics.date.desc()).limit(n)).scalars()
+            )
+        return _rows_frame(rows)
+
+    return _cached_read(("recent", n), load)
+
+
+@dataclass
+class DayPage:
+    rows: pd.DataFrame
+    next_after: Optional[date]  # pass as ``after`` to get the next page; None on the last one
+
+
+_RANGE_COLUMNS = ("sugar_intake_g", "water_ml", "fap_count", "productive_hours", "weight_kg")
+
+
+@timed("repo")
+def browse_days(
+    after: Optional[date] = None,
+    limit: int = 100,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    descending: bool = False,
+    ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+    has_notes: Optional[bool] = None,
+) -> DayPage:
+    """One page of days in date order, continuing after the ``after`` date.
+
+    Keyset pagination: each page is an index range scan on the date key, so
+    late pages cost the same as the first one. With ``descending`` the newest
+    day comes first and ``after`` continues towards older days. ``ranges``
+    maps metrics to inclusive ``(low, high)`` bounds (either may be None);
+    ``has_notes`` keeps only days with (True) or without (False) a note.
+    """
+    ranges = {k: v for k, v in (ranges or {}).items() if v != (None, None)}
+    unknown = set(ranges) - set(_RANGE_COLUMNS)
+    if unknown:
+        raise ValueError(f"cannot filter on: {sorted(unknown)}")
+    if _sheets_enabled():
+        df = _cached_read(("all",), _remote_frame)
+        if not df.empty:
+            day = df["date"].dt.date
+            mask = pd.Series(True, index=df.index)
+            if after is not None:
+                mask &= (day < after) if descending else (day > after)
+            if start is not None:
+                mask &= day >= start
+            if end is not None:
+                mask &= day <= end
+            for col, (lo, hi) in ranges.items():
+                if lo is not None:
+                    mask &= df[col] >= lo
+                if hi is not None:
+                    mask &= df[col] <= hi
+            if has_notes is not None:
+                mask &= df["notes"].fillna("").astype(str).str.strip().ne("") == has_notes
+            df = df.loc[mask]
+            df = (df.iloc[::-1] if descending else df).head(limit + 1)
     else:
+        key = DailyMetrics.date
+        q = select(DailyMetrics).order_by(key.desc() if descending else key).limit(limit + 1)
+        if after is not None:
+            q = q.where(key < after if descending else key > after)
+        if start is not None:
+            q = q.where(key >= start)
+        if end is not None:
+            q = q.where(key <= end)
+        for col, (lo, hi) in ranges.items():
+            attr = getattr(DailyMetrics, col)
+            if lo is not None:
+                q = q.where(attr >= lo)
+            if hi is not None:
+                q = q.where(attr <= hi)
+        if has_notes is True:
+            q = q.where(func.trim(func.coalesce(DailyMetrics.notes, "")) != "")
+        elif has_notes is False:
+            q = q.where(func.trim(func.coalesce(DailyMetrics.notes, "")) == "")
         with session_scope() as s:
-            rows = list(s.execute(select(DailyMetrics)).scalars())
-    df = pd.DataFrame(
-        [
-            {
-                "date": r.date.isoformat(),
-                "sugar_intake_g": r.sugar_intake_g,
-                "water_ml": r.water_ml,
-                "fap_count": r.fap_count,
-                "productive_hours": r.productive_hours,
-                "weight_kg": r.weight_kg,
-                "notes": r.notes,
-                "created_at": r.created_at,
-                "updated_at": r.updated_at,
-            }
-            for r in rows
-        ]
-    )
-    if not df.empty:
-        df["date"] = pd.to_datetime(df["date"])  # type: ignore[assignment]
-        df = df.sort_values("date")
-    return df
+            df = _rows_frame(list(s.execute(q).scalars()))
+            if descending and not df.empty:
+                df = df.iloc[::-1]
+    if len(df) > limit:
+        df = df.iloc[:limit]
+        return DayPage(df.reset_index(drop=True), df["date"].iloc[-1].date())
+    return DayPage(df.reset_index(drop=True), None)
+
+
+@timed("repo")
+def search_notes(
+    query: str, start: Optional[date] = None, end: Optional[date] = None, limit: int = 50
+) -> pd.DataFrame:
+    """Days whose notes match every word of ``query`` (prefix match), best first.
+
+    Returns ``date``, ``snippet`` (matches in **bold**) and ``rank`` (lower
+    is better). SQLite answers from the FTS5 index; Sheets scans the cached frame.
+    """
+    if _sheets_enabled():
+        return search.search_frame(_cached_read(("all",), _remote_frame), query, start, end, limit)
+    with session_scope() as s:
+        return search.search(s, query, start, end, limit)
+
+
+@timed("repo")
+def get_rollup(
+    period: str = "W",
+    metrics: Optional[List[str]] = None,
+    aggs: str | List[str] = "sum",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> pd.DataFrame:
+    """Weekly (Monday-start) or monthly aggregates, shaped like ``analytics.resample``.
+
+    SQLite reads the maintained rollup table, one row per bucket and metric;
+    Sheets has no such table and resamples the (cached) frame instead.
+    """
+    agg_key = aggs if isinstance(aggs, str) else tuple(aggs)
+
+    def load() -> pd.DataFrame:
+        if _sheets_enabled():
+            df = _cached_read(("all",), _remote_frame)
+            if start is not None and not df.empty:
+                df = df.loc[df["date"] >= pd.Timestamp(rollups.bucket_start(start, period))]
+            if end is not None and not df.empty:
+                df = df.loc[df["date"] <= pd.Timestamp(rollups.bucket_end(rollups.bucket_start(end, period), period))]
+            return resample(df, period, metrics, aggs)
+        with session_scope() as s:
+            return rollups.read(s, period, metrics, aggs, start, end)
+
+    return _cached_read(("rollup", period, tuple(metrics or ()), agg_key, start, end), load)
+
+
+@timed("repo")
+def get_anomalies() -> pd.DataFrame:
+    """Flagged days as ``date``, ``metric``, ``value``, ``score`` rows, oldest first.
+
+    SQLite keeps them up to date on every write; this only rescans when rows
+    changed behind the repo's back. Sheets mode scores the cached frame.
+    """
+
+    def load() -> pd.DataFrame:
+        if _sheets_enabled():
+            scores, _, _ = anomaly.score_history(_cached_read(("all",), _remote_frame))
+            return anomaly.flagged_frame(scores)
+        if shared.enabled():
+            ver = shared.version(latest_cursor())
+            mapped = shared.load(ver, "anomalies")
+            return mapped if mapped is not None else _publish_shared(ver)["anomalies"]
+        with session_scope() as s:
+            anomaly.sync(s)  # no-op unless rows changed behind the repo's back
+            return anomaly.read(s)
+
+    return _cached_read(("anomalies",), load)
+
+
+@timed("repo")
+def get_forecast(metric: str, horizon: int = forecast.HORIZON) -> pd.DataFrame:
+    """Holt forecast for ``metric``: ``date``, ``yhat`` and an 80% ``lower``/``upper`` band.
+
+    SQLite keeps the fit updated on every write; Sheets mode fits the cached frame.
+    """
+
+    def load() -> pd.DataFrame:
+        if _sheets_enabled():
+            fc, _ = forecast.fit(_cached_read(("all",), _remote_frame))
+        else:
+            with session_scope() as s:
+                fc = forecast.sync(s)
+        return fc.states[metric].forecast(horizon)
+
+    return _cached_read(("forecast", metric, horizon), load)
+
+
+@timed("repo")
+def get_seasonality() -> seasonality.Profile:
+    """Weekday, day-of-month and month profiles of every metric.
+
+    SQLite keeps the profile updated on every write; Sheets mode builds it
+    from the cached frame.
+    """
+
+    def load() -> seasonality.Profile:
+        if _sheets_enabled():
+            return seasonality.build(_cached_read(("all",), _remote_frame))
+        with session_scope() as s:
+            return seasonality.sync(s)
+
+    return _cached_read(("seasonality",), load)
 
 
+@timed("repo")
+def get_goals() -> List[goals.Goal]:
+    """Active goals (stored locally in both modes)."""
+    with session_scope() as s:
+        return goals.list_goals(s)
+
+
+@timed("repo")
+def save_goal(goal: goals.Goal) -> int:
+    with session_scope() as s:
+        goal_id = goals.save_goal(s, goal)
+    _bump_version()
+    return goal_id
+
+
+@timed("repo")
+def delete_goal(goal_id: int) -> bool:
+    with session_scope() as s:
+        deleted = goals.delete_goal(s, goal_id)
+    if deleted:
+        _bump_version()
+    return deleted
+
+
+@timed("repo")
+def goal_report() -> goals.GoalReport:
+    """Every active goal evaluated over the whole history (pass/fail per day)."""
+
+    def load() -> goals.GoalReport:
+        df = _cached_read(("all",), _remote_frame) if _sheets_enabled() else to_dataframe()
+        return goals.evaluate(df, get_goals())
+
+    return _cached_read(("goals",), load)
+
+
+@timed("repo")
+def check_rollups(repair: bool = False) -> pd.DataFrame:
+    """Rebuild the rollups from raw rows and report cells that disagree.
+
+    With ``repair=True`` the stored rollups are replaced by the rebuild.
+    """
+    with session_scope() as s:
+        mismatches = rollups.check(s)
+    if repair and not mismatches.empty:
+        _write(rollups.rebuild)
+        _bump_version()
+    return mismatches
+
+
+@timed("repo")
 def export_csv(path: Path, start: Optional[date] = None, end: Optional[date] = None) -> Path:
     df = to_dataframe(start, end)
     path.parent.mkdir(parents=True, exist_ok=True)
@@ -222,6 +762,7 @@ def export_csv(path: Path, start: Optional[date] = None, end: Optional[date] = N
     return path
 
 
+@timed("repo")
 def export_json(path: Path, start: Optional[date] = None, end: Optional[date] = None) -> Path:
     df = to_dataframe(start, end)
     path.parent.mkdir(parents=True, exist_ok=True)
@@ -229,24 +770,178 @@ def export_json(path: Path, start: Optional[date] = None, end: Optional[date] =
     return path
 
 
+@dataclass
+class ImportResult:
+    imported: int  # valid rows, whether or not they changed anything
+    report: ValidationReport
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    @property
+    def rejected(self) -> int:
+        return int(self.report.bad_rows.size)
+
+
+def _frame_payloads(df: pd.DataFrame) -> List[dict]:
+    """Turn validated rows into upsert payloads, mapping NaN cells to None."""
+    cols = [c for c in _PAYLOAD_COLUMNS if c in df.columns]
+    clean = df[cols].astype(object).where(df[cols].notna(), None)
+    return clean.to_dict("records")
+
+
+@timed("repo")
+def import_frame(df: pd.DataFrame, drop_conflicts: bool = False) -> ImportResult:
+    """Validate a whole frame in one pass, then write the valid rows.
+
+    With ``drop_conflicts=False`` any invalid row aborts the import before
+    anything is written; otherwise invalid rows are skipped and reported.
+    """
+    report = validate_frame(df)
+    if not report.ok and not drop_conflicts:
+        raise ValueError(report.first_message())
+    valid = df.loc[report.valid].copy()
+    if valid.empty:
+        return ImportResult(0, report)
+    valid["date"] = pd.to_datetime(valid["date"]).dt.date
+    payloads = _frame_payloads(valid)
+    if _sheets_enabled():
+        # One read of the sheet, then only rows whose values differ are sent.
+        current = _remote_frame()
+        stored = {}
+        if not current.empty:
+            for d, row in zip(current["date"].dt.date, current.to_dict("records"), strict=True):
+                stored[d] = content_hash(row)
+        changed: List[dict] = []
+        counts = {"inserted": 0, "updated": 0}
+        for p in payloads:  # in file order, so a repeated date counts against the earlier row
+            digest = content_hash({**_DEFAULTS, **p})
+            if stored.get(p["date"]) == digest:
+                continue
+            counts["inserted" if p["date"] not in stored else "updated"] += 1
+            stored[p["date"]] = digest
+            changed.append(p)
+        if _write_behind():
+            outbox = _get_outbox()
+            for payload in changed:
+                outbox.enqueue_upsert(payload)
+        else:
+            sheets = _get_sheets_repo()
+            for payload in changed:
+                sheets.upsert_day(payload)
+        if changed:
+            record_changes([p["date"] for p in changed], "upsert")
+    else:
+        counts = _write(lambda s: _import_tx(s, payloads))
+    inserted, updated = counts.get("inserted", 0), counts.get("updated", 0)
+    if inserted or updated:
+        _bump_version()
+    return ImportResult(len(payloads), report, inserted, updated, len(payloads) - inserted - updated)
+
+
+# Dates per IN (...) lookup when preloading the rows an import touches.
+_IMPORT_CHUNK = 500
+
+
+def _import_tx(s, payloads: List[dict]) -> Dict[str, int]:
+    now = datetime.utcnow()
+    dates = [p["date"] for p in payloads]
+    for i in range(0, len(dates), _IMPORT_CHUNK):
+        # Load into the identity map so _apply_upsert's s.get() never queries.
+        list(s.execute(select(DailyMetrics).where(DailyMetrics.date.in_(dates[i:i + _IMPORT_CHUNK]))).scalars())
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    touched = []
+    added: set = set()  # inserted since the last flush; s.get() cannot see them yet
+    for payload in payloads:
+        if payload["date"] in added:
+            # A date repeated in the file: flush so this row updates the earlier one (last row wins).
+            s.flush()
+            added.clear()
+        outcome = _apply_upsert(s, payload, now)
+        if outcome == "inserted":
+            added.add(payload["date"])
+        counts[outcome] += 1
+        if outcome != "unchanged":
+            touched.append(payload["date"])
+    if touched:
+        rollups.refresh(s, touched)
+    return counts
+
+
+@timed("repo")
+def import_csv_report(path: Path, drop_conflicts: bool = True) -> ImportResult:
+    return import_frame(pd.read_csv(path), drop_conflicts=drop_conflicts)
+
+
+@timed("repo")
 def import_csv(path: Path, drop_conflicts: bool = False) -> int:
-    df = pd.read_csv(path)
-    df["date"] = pd.to_datetime(df["date"]).dt.date
-    count = 0
-    with session_scope() as s:
-        for _, row in df.iterrows():
-            payload = row.to_dict()
-            payload["date"] = row["date"]
-            try:
-                upsert_day(payload)
-                count += 1
-            except Exception:
-                if drop_conflicts:
-                    continue
-                raise
-    return count
+    return import_csv_report(path, drop_conflicts=drop_conflicts).imported
+
+
+@timed("repo")
+def create_snapshot() -> Path:
+    """Online snapshot of the SQLite database into ``backups/`` (SQLite mode only)."""
+    if _sheets_enabled():
+        raise RuntimeError("snapshots cover the local SQLite store; use a CSV backup with Google Sheets")
+    path = snapshot.create()
+    snapshot.prune()
+    return path
 
 
+@timed("repo")
+def restore_snapshot(path: Path) -> None:
+    """Swap the database for the snapshot at ``path``; nothing changes if it fails.
+
+    Queued writes are committed first and the writer is stopped; the next
+    write starts a new one on the restored file.
+    """
+    global _WRITER
+    if _sheets_enabled():
+        raise RuntimeError("snapshots cover the local SQLite store; import a CSV backup with Google Sheets")
+    if _WRITER is not None:
+        _WRITER.stop()
+        _WRITER = None
+    try:
+        snapshot.restore(path)
+    finally:
+        reset_caches()
+    init_db()  # snapshots from older versions get any newer tables and columns
+
+
+@timed("repo")
+def auto_backup() -> Path:
+    """The scheduled backup: a database snapshot with SQLite, a CSV export with Sheets."""
+    return weekly_auto_backup() if _sheets_enabled() else create_snapshot()
+
+
+@timed("repo")
+def archive_sheets(today: Optional[date] = None) -> Optional[dict]:
+    """Move old months of the Sheets worksheet into the yearly archives; None with SQLite."""
+    if not _sheets_enabled():
+        return None
+    result = _get_sheets_repo().archive(today)
+    if result["moved"]:
+        _bump_version()
+    return result
+
+
+@timed("repo")
+def warm_caches() -> int:
+    """Load the reads every page starts with, so the next rerun finds them cached; returns how many."""
+    reads = [
+        to_dataframe,  # also publishes the shared snapshot for the new version
+        get_anomalies,
+        get_seasonality,
+        goal_report,
+        lambda: get_rollup("W", None, ["sum", "mean"]),
+        *(lambda m=m: get_forecast(m) for m in forecast.FORECAST_PARAMS),
+    ]
+    for read in reads:
+        read()
+    return len(reads)
+
+
+@timed("repo")
 def weekly_auto_backup() -> Path:
     BACKUP_DIR.mkdir(parents=True, exist_ok=True)
     stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
@@ -0,0 +1,170 @@
+"""Weekly and monthly rollups of ``daily_metrics``, maintained on write.
+
+The repo calls :func:`refresh` inside the same transaction as every SQLite
+write, recomputing only the buckets the written dates fall in. Long-range
+views then read one row per bucket and metric instead of every day.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Date, delete, func, insert, select
+
+from .analytics import AGGREGATIONS, METRICS
+from .instrument import timed
+from .models import DailyMetrics, Rollup
+
+PERIODS = ("W", "M")
+
+
+def bucket_start(d: date, period: str) -> date:
+    if period == "W":
+        return d - timedelta(days=d.weekday())
+    if period == "M":
+        return d.replace(day=1)
+    raise ValueError(f"unknown rollup period: {period}")
+
+
+def bucket_end(start: date, period: str) -> date:
+    """Last day of the bucket starting at ``start``."""
+    if period == "W":
+        return start + timedelta(days=6)
+    nxt = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return nxt - timedelta(days=1)
+
+
+def _bucket_expr(period: str):
+    # Same bucketing as bucket_start(), evaluated by SQLite.
+    if period == "W":
+        return func.date(DailyMetrics.date, "weekday 0", "-6 days", type_=Date)
+    return func.date(DailyMetrics.date, "start of month", type_=Date)
+
+
+def _aggregate(s, period: str, lo: Optional[date] = None, hi: Optional[date] = None) -> List[dict]:
+    """Rollup rows for every bucket with data between ``lo`` and ``hi``."""
+    bucket = _bucket_expr(period).label("bucket")
+    cols = [bucket]
+    for m in METRICS:
+        c = getattr(DailyMetrics, m)
+        cols += [func.count(c), func.sum(c), func.min(c), func.max(c)]
+    q = select(*cols).group_by(bucket)
+    if lo is not None:
+        q = q.where(DailyMetrics.date.between(lo, hi))
+    rows = []
+    for r in s.execute(q):
+        for i, m in enumerate(METRICS):
+            n, total, lo_v, hi_v = r[1 + 4 * i: 5 + 4 * i]
+            rows.append({"period": period, "bucket": r[0], "metric": m, "n": n, "total": total, "min": lo_v, "max": hi_v})
+    return rows
+
+
+def refresh(s, dates: Iterable[date]) -> None:
+    """Recompute the buckets containing ``dates`` inside the open session ``s``."""
+    dates = list(dates)
+    if not dates:
+        return
+    s.flush()  # the session does not autoflush; aggregate what was just written
+    for period in PERIODS:
+        lo = bucket_start(min(dates), period)
+        hi = bucket_end(bucket_start(max(dates), period), period)
+        s.execute(delete(Rollup).where(Rollup.period == period, Rollup.bucket.between(lo, hi)))
+        rows = _aggregate(s, period, lo, hi)
+        if rows:
+            s.execute(insert(Rollup), rows)
+
+
+@timed("rollups")
+def rebuild(s) -> int:
+    """Recompute every rollup from the raw rows; returns the number of rows written."""
+    s.execute(delete(Rollup))
+    rows = [r for period in PERIODS for r in _aggregate(s, period)]
+    if rows:
+        s.execute(insert(Rollup), rows)
+    return len(rows)
+
+
+def ensure(s) -> None:
+    """Build the rollups once for a database that predates them."""
+    if s.execute(select(Rollup.bucket).limit(1)).first() is None:
+        if s.execute(select(DailyMetrics.date).limit(1)).first() is not None:
+            rebuild(s)
+
+
+_KEY = ("period", "bucket", "metric")
+_VALUES = ("n", "total", "min", "max")
+
+
+@timed("rollups")
+def check(s) -> pd.DataFrame:
+    """Compare stored rollups with a fresh rebuild; one row per mismatching cell."""
+    expected = pd.DataFrame([r for period in PERIODS for r in _aggregate(s, period)], columns=[*_KEY, *_VALUES])
+    stored = pd.DataFrame(
+        [
+            {c: getattr(r, c) for c in (*_KEY, *_VALUES)}
+            for r in s.execute(select(Rollup)).scalars()
+        ],
+        columns=[*_KEY, *_VALUES],
+    )
+    merged = expected.merge(stored, on=list(_KEY), how="outer", suffixes=("_expected", "_stored"))
+    out = []
+    for c in _VALUES:
+        a = merged[f"{c}_expected"].astype(float).to_numpy()
+        b = merged[f"{c}_stored"].astype(float).to_numpy()
+        same = np.isclose(a, b, equal_nan=True)
+        for i in np.flatnonzero(~same):
+            out.append({**merged.loc[i, list(_KEY)].to_dict(), "field": c, "expected": a[i], "stored": b[i]})
+    return pd.DataFrame(out, columns=[*_KEY, "field", "expected", "stored"])
+
+
+@timed("rollups")
+def read(
+    s,
+    period: str,
+    metrics: Optional[Sequence[str]] = None,
+    aggs: str | Sequence[str] = "sum",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> pd.DataFrame:
+    """Rollups shaped like :func:`src.analytics.resample` for ``freq=period``."""
+    single = isinstance(aggs, str)
+    agg_list = [aggs] if single else list(aggs)
+    unknown = set(agg_list) - set(AGGREGATIONS)
+    if unknown:
+        raise ValueError(f"unknown aggregations: {sorted(unknown)}")
+    cols = list(metrics or METRICS)
+    out_cols = cols if single else [f"{m}_{a}" for m in cols for a in agg_list]
+
+    q = select(Rollup).where(Rollup.period == period, Rollup.metric.in_(cols))
+    if start is not None:
+        q = q.where(Rollup.bucket >= bucket_start(start, period))
+    if end is not None:
+        q = q.where(Rollup.bucket <= end)
+    cells: Dict[Tuple[date, str], Rollup] = {(r.bucket, r.metric): r for r in s.execute(q).scalars()}
+    buckets = sorted({b for b, _ in cells})
+    if not buckets:
+        return pd.DataFrame(columns=["bucket", *out_cols])
+
+    starts = np.array(buckets, dtype="datetime64[D]")
+    lengths = ((starts.astype("datetime64[M]") + 1).astype("datetime64[D]") - starts).astype(np.int64) if period == "M" else 7
+    out = pd.DataFrame({"bucket": pd.to_datetime(starts)})
+    for m in cols:
+        n = np.array([cells[b, m].n if (b, m) in cells else 0 for b in buckets], dtype=np.int64)
+        stats = {
+            "sum": [cells[b, m].total if (b, m) in cells and cells[b, m].n else 0.0 for b in buckets],
+            "min": [cells[b, m].min if (b, m) in cells else None for b in buckets],
+            "max": [cells[b, m].max if (b, m) in cells else None for b in buckets],
+        }
+        for a in agg_list:
+            if a == "count":
+                values = n
+            elif a == "coverage":
+                values = n / lengths
+            elif a == "mean":
+                values = np.divide(np.array(stats["sum"], dtype=float), n, out=np.full(len(n), np.nan), where=n > 0)
+            else:
+                values = np.array(stats[a], dtype=float)
+            out[m if single else f"{m}_{a}"] = values
+    return out
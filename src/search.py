@@ -0,0 +1,85 @@
+"""Full-text search over ``daily_metrics.notes``.
+
+SQLite triggers keep the ``notes_fts`` FTS5 index in step with every write
+(see ``src.models``). Its rowid is the day number, so date ranges become
+rowid ranges. Databases built without FTS5 fall back to a LIKE scan.
+"""
+from __future__ import annotations
+
+import re
+from datetime import date
+from typing import Optional
+
+import pandas as pd
+
+from .instrument import timed
+
+SEARCH_COLUMNS = ["date", "snippet", "rank"]
+HIGHLIGHT = ("**", "**")  # Markdown bold, as rendered by Streamlit
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(text: str) -> str:
+    """User text -> a safe FTS5 query: every word must match, as a prefix.
+
+    Quoting each token means stray quotes, ``-``, ``:`` or ``NEAR`` in what
+    people type can never be a syntax error.
+    """
+    return " ".join(f'"{tok}"*' for tok in _TOKEN.findall(text))
+
+
+def _julian_day(d: date) -> int:
+    # Matches CAST(julianday(date) AS INTEGER) used by the triggers.
+    return d.toordinal() + 1721424
+
+
+def has_fts(s) -> bool:
+    return s.connection().exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'notes_fts'").first() is not None
+
+
+@timed("search")
+def search(s, text: str, start: Optional[date] = None, end: Optional[date] = None, limit: int = 50) -> pd.DataFrame:
+    """Best-matching days first, with a highlighted snippet of each note."""
+    query = fts_query(text)
+    if not query:
+        return pd.DataFrame(columns=SEARCH_COLUMNS)
+    conn = s.connection()
+    lo = _julian_day(start) if start else 0
+    hi = _julian_day(end) if end else 2**62
+    if has_fts(s):
+        rows = conn.exec_driver_sql(
+            "SELECT date, snippet(notes_fts, 1, ?, ?, '…', 12), bm25(notes_fts) AS rank "
+            "FROM notes_fts WHERE notes_fts MATCH ? AND rowid BETWEEN ? AND ? "
+            "ORDER BY rank LIMIT ?",
+            (*HIGHLIGHT, query, lo, hi, limit),
+        ).all()
+    else:
+        words = _TOKEN.findall(text)
+        where = " AND ".join("notes LIKE ?" for _ in words)
+        rows = conn.exec_driver_sql(
+            f"SELECT date, notes, 0.0 FROM daily_metrics WHERE {where} "
+            "AND date BETWEEN ? AND ? ORDER BY date DESC LIMIT ?",
+            (*(f"%{w}%" for w in words), (start or date.min).isoformat(), (end or date.max).isoformat(), limit),
+        ).all()
+    df = pd.DataFrame(rows, columns=SEARCH_COLUMNS)
+    df["date"] = pd.to_datetime(df["date"]).dt.date
+    return df
+
+
+def search_frame(df: pd.DataFrame, text: str, start: Optional[date] = None, end: Optional[date] = None, limit: int = 50) -> pd.DataFrame:
+    """The same search over an in-memory frame (Sheets backend); newest first."""
+    words = _TOKEN.findall(text)
+    if not words or df.empty or "notes" not in df.columns:
+        return pd.DataFrame(columns=SEARCH_COLUMNS)
+    notes = df["notes"].fillna("").astype(str)
+    day = pd.to_datetime(df["date"]).dt.date
+    mask = (day >= (start or date.min)) & (day <= (end or date.max))
+    for w in words:
+        mask &= notes.str.contains(rf"\b{re.escape(w)}", case=False, regex=True)
+    hits = df.loc[mask].sort_values("date", ascending=False).head(limit)
+    return pd.DataFrame({
+        "date": pd.to_datetime(hits["date"]).dt.date.to_numpy(),
+        "snippet": hits["notes"].astype(str).to_numpy(),
+        "rank": 0.0,
+    }, columns=SEARCH_COLUMNS)
@@ -0,0 +1,211 @@
+"""Weekday, day-of-month and month-of-year profiles of every metric.
+
+A :class:`Profile` keeps, per metric and bucket, the count, sum and sum of
+squares of the logged values. Those three are enough for the mean, spread
+and a confidence interval, and they add and subtract. A day therefore
+updates a profile in O(1), and a whole history is folded in with one
+``np.bincount`` per statistic and bucket kind (all metrics at once). Buckets
+are integer codes computed from ``datetime64[D]`` arithmetic; no day-name
+strings and no groupby.
+
+In SQLite mode the repo calls :func:`sync` at the end of its write
+transactions, like the forecasts: new days are added to the stored profile,
+anything else rebuilds it.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from . import derived
+from .analytics import METRICS, WEEKDAYS
+from .instrument import timed
+from .models import DailyMetrics
+
+# kind -> bucket labels, in calendar order
+BUCKETS: Dict[str, Tuple[str, ...]] = {
+    "weekday": WEEKDAYS,
+    "day": tuple(str(d) for d in range(1, 32)),
+    "month": ("JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"),
+}
+CI_Z = 1.96  # ~95% interval for the mean (normal approximation)
+STATE_KEY = "seasonality"
+_EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday
+
+
+def bucket_codes(dates) -> Dict[str, np.ndarray]:
+    """0-based weekday (Monday = 0), day-of-month and month codes for ``dates``."""
+    days = pd.to_datetime(pd.Series(dates)).to_numpy(dtype="datetime64[D]")
+    months = days.astype("datetime64[M]")
+    return {
+        "weekday": (days.astype(np.int64) + _EPOCH_WEEKDAY) % 7,
+        "day": (days - months.astype("datetime64[D]")).astype(np.int64),
+        "month": months.astype(np.int64) % 12,
+    }
+
+
+def _zeros(metrics: Sequence[str]) -> Dict[str, np.ndarray]:
+    return {k: np.zeros((len(metrics), len(b))) for k, b in BUCKETS.items()}
+
+
+@dataclass
+class Profile:
+    metrics: Tuple[str, ...] = tuple(METRICS)
+    # kind -> (metrics, buckets) arrays
+    n: Optional[Dict[str, np.ndarray]] = None
+    total: Optional[Dict[str, np.ndarray]] = None
+    sq: Optional[Dict[str, np.ndarray]] = None
+
+    def __post_init__(self):
+        self.metrics = tuple(self.metrics)
+        for name in ("n", "total", "sq"):
+            if getattr(self, name) is None:
+                setattr(self, name, _zeros(self.metrics))
+
+    def add(self, df: pd.DataFrame, sign: int = 1) -> "Profile":
+        """Fold the days in ``df`` in (``sign=-1`` takes them back out)."""
+        if df.empty:
+            return self
+        codes = bucket_codes(df["date"])
+        values = np.column_stack([
+            df[m].to_numpy(dtype=np.float64, na_value=np.nan) if m in df.columns else np.full(len(df), np.nan)
+            for m in self.metrics
+        ])
+        ok = ~np.isnan(values)
+        x = np.where(ok, values, 0.0).ravel()
+        w = ok.ravel().astype(np.float64)
+        for kind, labels in BUCKETS.items():
+            size = len(self.metrics) * len(labels)
+            # Flat index metric * buckets + bucket: one bincount covers every metric.
+            idx = (np.arange(len(self.metrics)) * len(labels) + codes[kind][:, None]).ravel()
+            shape = (len(self.metrics), len(labels))
+            self.n[kind] += sign * np.bincount(idx, weights=w, minlength=size).reshape(shape)
+            self.total[kind] += sign * np.bincount(idx, weights=x, minlength=size).reshape(shape)
+            self.sq[kind] += sign * np.bincount(idx, weights=x * x, minlength=size).reshape(shape)
+        return self
+
+    def remove(self, df: pd.DataFrame) -> "Profile":
+        return self.add(df, sign=-1)
+
+    def update(self, old: pd.DataFrame, new: pd.DataFrame) -> "Profile":
+        """Replace the values of edited days: ``old`` as stored before, ``new`` after."""
+        return self.remove(old).add(new)
+
+    def copy(self) -> "Profile":
+        return Profile(self.metrics, *({k: a.copy() for k, a in d.items()} for d in (self.n, self.total, self.sq)))
+
+    def _stats(self, kind: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        n = self.n[kind]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n > 0, self.total[kind] / n, np.nan)
+            var = np.where(n > 1, (self.sq[kind] - n * mean * mean) / (n - 1), np.nan)
+        return n, mean, np.sqrt(np.clip(var, 0.0, None))
+
+    def matrix(self, kind: str = "weekday", stat: str = "mean") -> pd.DataFrame:
+        """Metric x bucket table of ``stat`` (``mean``, ``count`` or ``std``)."""
+        n, mean, std = self._stats(kind)
+        values = {"mean": mean, "count": n.astype(np.int64), "std": std}[stat]
+        return pd.DataFrame(values, index=list(self.metrics), columns=list(BUCKETS[kind]))
+
+    def table(self, kind: str = "weekday", metric: Optional[str] = None) -> pd.DataFrame:
+        """Long form: ``metric``, ``bucket``, ``count``, ``mean``, ``std``, ``lower``, ``upper``.
+
+        ``lower``/``upper`` bound the mean at CI_Z standard errors; empty
+        buckets are left out.
+        """
+        n, mean, std = self._stats(kind)
+        half = CI_Z * std / np.sqrt(np.where(n > 0, n, np.nan))
+        labels = BUCKETS[kind]
+        out = pd.DataFrame({
+            "metric": np.repeat(self.metrics, len(labels)),
+            "bucket": np.tile(labels, len(self.metrics)),
+            "count": n.ravel().astype(np.int64),
+            "mean": mean.ravel(),
+            "std": std.ravel(),
+            "lower": (mean - half).ravel(),
+            "upper": (mean + half).ravel(),
+        })
+        out = out[out["count"] > 0]
+        if metric is not None:
+            out = out[out["metric"] == metric]
+        return out.reset_index(drop=True)
+
+    def to_dict(self) -> dict:
+        return {
+            "metrics": list(self.metrics),
+            **{name: {k: a.tolist() for k, a in getattr(self, name).items()} for name in ("n", "total", "sq")},
+        }
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "Profile":
+        arrays = [{k: np.asarray(a, dtype=np.float64) for k, a in raw[name].items()} for name in ("n", "total", "sq")]
+        return cls(tuple(raw["metrics"]), *arrays)
+
+
+@timed("seasonality")
+def build(df: pd.DataFrame, metrics: Optional[Sequence[str]] = None) -> Profile:
+    """Profile of a whole history in one pass."""
+    return Profile(tuple(metrics or METRICS)).add(df)
+
+
+# -- SQLite maintenance (called by the repo inside its transactions) ----------
+
+
+def _frame(rows) -> pd.DataFrame:
+    df = pd.DataFrame([tuple(r) for r in rows], columns=["date", *METRICS])
+    return df.astype({m: np.float64 for m in METRICS})
+
+
+def _state(p: Profile, last_date: Optional[date]) -> dict:
+    return {**p.to_dict(), "last_date": last_date.isoformat() if last_date else None}
+
+
+def _save(s, current: Profile, last: Optional[date], previous: Optional[Profile], before: Optional[date]) -> None:
+    derived.save(s, STATE_KEY, {
+        "current": _state(current, last),
+        "previous": _state(previous, before) if previous is not None else None,
+    })
+
+
+def _columns():
+    return (DailyMetrics.date, *(getattr(DailyMetrics, m) for m in METRICS))
+
+
+@timed("seasonality")
+def rebuild(s) -> Profile:
+    """Profile every stored row."""
+    s.flush()
+    df = _frame(s.execute(select(*_columns()).order_by(DailyMetrics.date)).all())
+    if df.empty:
+        current = Profile()
+        _save(s, current, None, None, None)
+        return current
+    # Keep the profile without the newest day too, so re-editing it is O(1).
+    previous = build(df.iloc[:-1])
+    current = previous.copy().add(df.iloc[-1:])
+    dates = df["date"].tolist()
+    _save(s, current, dates[-1], previous, dates[-2] if len(dates) > 1 else None)
+    return current
+
+
+@timed("seasonality")
+def sync(s) -> Profile:
+    """Bring the stored profile up to date: O(1) per new day, a rebuild for anything else."""
+    plan = derived.resume(s, STATE_KEY)
+    if plan is None:
+        return rebuild(s)
+    current = Profile.from_dict(plan.state)
+    if not plan.rows:
+        return current
+    before = date.fromisoformat(plan.state["last_date"]) if plan.state["last_date"] else None
+    for rec in plan.rows:
+        previous, prev_date = current.copy(), before
+        current.add(_frame([[getattr(rec, c.key) for c in _columns()]]))
+        before = rec.date
+    _save(s, current, before, previous, prev_date)
+    return current
@@ -0,0 +1,167 @@
+"""Arrow IPC snapshot of the day table, shared by every app process on the host.
+
+With several Streamlit servers behind a load balancer, each would otherwise
+hold its own copy of the history and rebuild the same frames. The first
+read after a write (normally the maintenance ``warm`` job, off the request
+path) publishes the frames the repo hands out (the days and the anomaly
+flags) as Arrow IPC files in ``data/shared/v-<version>/``. It then points
+``data/shared/CURRENT`` at that directory with one atomic rename.
+Readers memory-map the files. Numeric and date columns become read-only
+NumPy views of the mapped pages, so all replicas share one copy in the OS
+page cache. A process re-maps only when ``CURRENT`` names a new version.
+
+The version is the database file's inode plus the change-log cursor. It
+changes on every write, including writes made by other processes or outside
+the app, and on a restore. A snapshot whose version does not match the
+database is never used.
+
+Needs ``pyarrow``; set ``HABITS_SHARED_SNAPSHOT=0`` to turn it off.
+"""
+from __future__ import annotations
+
+import importlib.util
+import os
+import shutil
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from . import db, instrument
+from .instrument import timed
+
+DIR_NAME = "shared"
+POINTER = "CURRENT"
+KEEP_VERSIONS = 2  # the current one plus the one readers may still be opening
+
+_LOCK = threading.Lock()
+# version -> frames backed by the mapped files (kept alive while in use)
+_MAPPED: Tuple[Optional[str], Dict[str, pd.DataFrame]] = (None, {})
+
+
+@lru_cache(maxsize=1)
+def _pyarrow_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def enabled() -> bool:
+    return _pyarrow_available() and os.getenv("HABITS_SHARED_SNAPSHOT", "1") not in ("0", "false", "no")
+
+
+def directory() -> Path:
+    return db.DB_PATH.parent / DIR_NAME
+
+
+def version(cursor: int) -> str:
+    """Snapshot version for the database as of change-log ``cursor``."""
+    try:
+        ino = db.DB_PATH.stat().st_ino
+    except FileNotFoundError:
+        ino = 0
+    return f"{ino}-{cursor}"
+
+
+def current() -> Optional[str]:
+    """Version named by the pointer file, if any."""
+    try:
+        return (directory() / POINTER).read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _to_table(df: pd.DataFrame):
+    import pyarrow as pa
+
+    cols = {}
+    for name in df.columns:
+        col = df[name]
+        if col.dtype.kind in "iuf":
+            # Plain values (NaN stays a float, not a null): read back as a view.
+            cols[name] = pa.array(col.to_numpy(), from_pandas=False)
+        else:
+            cols[name] = pa.array(col)
+    # pandas metadata restores the exact dtypes (e.g. which string flavour) on read.
+    return pa.table(cols).replace_schema_metadata(pa.Schema.from_pandas(df, preserve_index=False).metadata)
+
+
+def _write(path: Path, df: pd.DataFrame) -> None:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    table = _to_table(df)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+    try:
+        with pa.OSFile(str(tmp), "wb") as f, ipc.new_file(f, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+@timed("shared")
+def publish(ver: str, frames: Dict[str, pd.DataFrame]) -> Path:
+    """Write ``frames`` as snapshot ``ver`` and make it current."""
+    root = directory()
+    target = root / f"v-{ver}"
+    target.mkdir(parents=True, exist_ok=True)
+    for name, df in frames.items():
+        _write(target / f"{name}.arrow", df)
+    tmp = root / f".{POINTER}.{os.getpid()}.{threading.get_ident()}"
+    tmp.write_text(ver, encoding="utf-8")
+    os.replace(tmp, root / POINTER)
+    instrument.count("shared.publish")
+    _prune(root, ver)
+    return target
+
+
+def _prune(root: Path, keep: str) -> None:
+    versions = sorted((p for p in root.glob("v-*") if p.is_dir()), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in [p for p in versions if p.name != f"v-{keep}"][KEEP_VERSIONS - 1:]:
+        # Open maps survive the unlink; only new readers need the files.
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def _read(path: Path) -> pd.DataFrame:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    return ipc.open_file(pa.memory_map(str(path))).read_all().to_pandas(split_blocks=True)
+
+
+@timed("shared")
+def load(ver: str, name: str) -> Optional[pd.DataFrame]:
+    """Frame ``name`` of snapshot ``ver``, or None when that version is not published.
+
+    The columns are read-only views of the mapped file. Each call returns a
+    shallow copy, so a caller that writes to it gets its own copy of just
+    the columns it changes (copy-on-write).
+    """
+    global _MAPPED
+    if current() != ver:
+        instrument.count("shared.misses")
+        return None
+    with _LOCK:
+        mapped_ver, frames = _MAPPED
+        if mapped_ver == ver and name in frames:
+            instrument.count("shared.hits")
+            return frames[name].copy(deep=False)
+    try:
+        df = _read(directory() / f"v-{ver}" / f"{name}.arrow")
+    except OSError:
+        instrument.count("shared.misses")
+        return None
+    with _LOCK:
+        if _MAPPED[0] != ver:
+            _MAPPED = (ver, {})
+        _MAPPED[1][name] = df
+    instrument.count("shared.maps")
+    return df.copy(deep=False)
+
+
+def forget() -> None:
+    """Drop this process's mapped frames (e.g. in tests)."""
+    global _MAPPED
+    with _LOCK:
+        _MAPPED = (None, {})
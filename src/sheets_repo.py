@@ -1,20 +1,25 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import date, datetime
-from typing import Optional, List, Dict, Any
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Tuple
 
 import pandas as pd
 
-try:
-    import streamlit as st  # for secrets, optional at runtime
-except Exception:  # pragma: no cover
-    st = None  # type: ignore
-
+import importlib.util
 import os
+import sys
 import json
-import gspread
-from google.oauth2.service_account import Credentials
+import re
+import threading
+import time
+from functools import lru_cache
+
+from .hashing import content_hash
+from .instrument import CountingProxy, timed
+
+if TYPE_CHECKING:  # gspread and google-auth are imported on first connect
+    import gspread
 
 # Columns contract aligned with SQL model
 HEADERS = [
@@ -30,14 +35,31 @@ HEADERS = [
 ]
 
 
+SUMMARY_METRICS = ["sugar_intake_g", "water_ml", "fap_count", "productive_hours", "weight_kg"]
+# One row per archived month: days logged, then sum and count of each metric.
+SUMMARY_HEADERS = ["month", "days"] + [f"{m}_{stat}" for m in SUMMARY_METRICS for stat in ("sum", "n")]
+
+HOT_DAYS = 120  # whole months older than this move from the hot worksheet to the archives
+HOT_ROWS = 2000
+ARCHIVE_ROWS = 400  # a year of days plus the header
+CATALOG_TTL = 300  # seconds; re-read the partition list in case another process archived
+
+
 @dataclass
 class SheetsConfig:
     spreadsheet_id: str
     worksheet_name: str = "DailyMetrics"
 
 
+@lru_cache(maxsize=1)
+def client_available() -> bool:
+    """True when gspread and google-auth are installed (checked without importing them)."""
+    return all(importlib.util.find_spec(m) is not None for m in ("gspread", "google.oauth2"))
+
+
 def _load_service_account_dict() -> Optional[dict]:
-    # 1) Streamlit secrets: gcp_service_account
+    # 1) Streamlit secrets: gcp_service_account (only when running inside Streamlit)
+    st = sys.modules.get("streamlit")
     if st is not None:
         try:
             sa = st.secrets.get("gcp_service_account")  # type: ignore[attr-defined]
@@ -60,7 +82,10 @@ def _load_service_account_dict() -> Optional[dict]:
     return None
 
 
-def _get_client() -> gspread.Client:
+def _get_client() -> "gspread.Client":
+    import gspread
+    from google.oauth2.service_account import Credentials
+
     sa_dict = _load_service_account_dict()
     if not sa_dict:
         raise RuntimeError(
@@ -74,17 +99,86 @@ def _get_client() -> gspread.Client:
     return gspread.authorize(creds)
 
 
+def _month_after(month: str) -> date:
+    y, m = int(month[:4]), int(month[5:7])
+    return date(y + m // 12, m % 12 + 1, 1)
+
+
+def _frame(rows: List[List[str]]) -> pd.DataFrame:
+    """Sheet rows (header excluded) as a frame with the HEADERS columns."""
+    return pd.DataFrame([r + [""] * (len(HEADERS) - len(r)) for r in rows], columns=HEADERS)
+
+
+def _summarise(df: pd.DataFrame, months: List[str]) -> List[List[Any]]:
+    """Summary rows for ``months`` (``YYYY-MM``) from the days in ``df``; empty months included."""
+    if df.empty:
+        df = _frame([])
+    month = df["date"].astype(str).str[:7]
+    out = []
+    for mo in months:
+        part = df[month == mo]
+        row: List[Any] = [mo, int(len(part))]
+        for m in SUMMARY_METRICS:
+            values = pd.to_numeric(part[m], errors="coerce")  # blank cells are missing values
+            row += [float(values.sum()), int(values.count())]
+        out.append(row)
+    return out
+
+
+def _months(first: date, stop: date) -> List[str]:
+    """``YYYY-MM`` for every month from ``first`` up to, not including, ``stop``."""
+    out, d = [], first.replace(day=1)
+    while d < stop:
+        out.append(d.isoformat()[:7])
+        d = _month_after(out[-1])
+    return out
+
+
 class GoogleSheetRepo:
-    def __init__(self, cfg: SheetsConfig):
+    """Days in a small hot worksheet plus one archive worksheet per year.
+
+    ``<name>`` holds the days from the watermark on, ``<name> YYYY`` the
+    older days of that year, and ``<name> Summary`` one row per archived
+    month; the month after its last row is the watermark. Each read or write
+    goes only to the partitions its dates fall in, and archive frames are
+    cached, so the everyday cost tracks the hot sheet rather than the
+    history. :meth:`archive` (run daily by the maintenance scheduler) moves
+    whole months older than HOT_DAYS out of the hot sheet.
+    """
+
+    def __init__(self, cfg: SheetsConfig, client: Any = None):
+        """``client`` defaults to an authorised gspread client; tests and benchmarks
+        pass a :class:`src.sheets_sim.SimClient` instead."""
+        import gspread
+
+        self._not_found = gspread.WorksheetNotFound
         self.cfg = cfg
-        self.gc = _get_client()
-        self.sh = self.gc.open_by_key(cfg.spreadsheet_id)
-        try:
-            self.ws = self.sh.worksheet(cfg.worksheet_name)
-        except gspread.WorksheetNotFound:
-            self.ws = self.sh.add_worksheet(title=cfg.worksheet_name, rows=2000, cols=len(HEADERS))
+        # Every gspread call goes through a counting proxy: one call == one API round trip.
+        self.gc = CountingProxy(client if client is not None else _get_client(), "sheets.api")
+        self.sh = CountingProxy(self.gc.open_by_key(cfg.spreadsheet_id), "sheets.api")
+        self.ws: Any = None
+        self._lock = threading.RLock()  # archive() rewrites the hot sheet; keep writes out meanwhile
+        self._archives: Dict[int, Any] = {}
+        self._archive_frames: Dict[int, pd.DataFrame] = {}
+        self._summary_ws: Any = None
+        self._summary: List[List[Any]] = []
+        self.watermark: Optional[date] = None
+        self._catalog_at = 0.0
+        self._load_catalog()
+        if self.ws is None:
+            ws = self.sh.add_worksheet(title=cfg.worksheet_name, rows=HOT_ROWS, cols=len(HEADERS))
+            self.ws = CountingProxy(ws, "sheets.api")
         self._ensure_headers()
 
+    def _open(self, title: str, rows: int, cols: int, create: bool = True) -> Any:
+        try:
+            ws = self.sh.worksheet(title)
+        except self._not_found:
+            if not create:
+                return None
+            ws = self.sh.add_worksheet(title=title, rows=rows, cols=cols)
+        return CountingProxy(ws, "sheets.api")
+
     def _ensure_headers(self) -> None:
         values = self.ws.get_all_values()
         if not values:
@@ -95,6 +189,63 @@ class GoogleSheetRepo:
                 # rewrite headers to match contract
                 self.ws.update("A1", [HEADERS])
 
+    # -- partitions ----------------------------------------------------
+    @property
+    def _summary_title(self) -> str:
+        return f"{self.cfg.worksheet_name} Summary"
+
+    def _load_catalog(self) -> None:
+        """Find the hot sheet, the archives and the watermark (one call, two once archived)."""
+        pattern = re.compile(re.escape(self.cfg.worksheet_name) + r" (\d{4})")
+        self._archives, self._summary_ws = {}, None
+        for ws in self.sh.worksheets():
+            m = pattern.fullmatch(ws.title)
+            if ws.title == self.cfg.worksheet_name:
+                self.ws = CountingProxy(ws, "sheets.api")
+            elif m:
+                self._archives[int(m.group(1))] = CountingProxy(ws, "sheets.api")
+            elif ws.title == self._summary_title:
+                self._summary_ws = CountingProxy(ws, "sheets.api")
+        self._summary = self._summary_ws.get_all_values()[1:] if self._summary_ws is not None else []
+        self.watermark = _month_after(self._summary[-1][0]) if self._summary else None
+        self._archive_frames.clear()
+        self._catalog_at = time.monotonic()
+
+    def _fresh_catalog(self) -> None:
+        if time.monotonic() - self._catalog_at > CATALOG_TTL:
+            self._load_catalog()
+
+    def _archive_ws(self, year: int, create: bool = False) -> Any:
+        if year not in self._archives:
+            ws = self._open(f"{self.cfg.worksheet_name} {year}", ARCHIVE_ROWS, len(HEADERS), create)
+            if ws is None:
+                return None
+            if not ws.row_values(1):
+                ws.update("A1", [HEADERS])
+            self._archives[year] = ws
+        return self._archives[year]
+
+    def _partition(self, d: date, create: bool = False) -> Tuple[Any, Optional[int]]:
+        """Worksheet holding ``d`` and its archive year (None for the hot sheet)."""
+        self._fresh_catalog()
+        if self.watermark is None or d >= self.watermark:
+            return self.ws, None
+        return self._archive_ws(d.year, create), d.year
+
+    def _write_summary(self, rows: List[List[Any]]) -> None:
+        merged = {r[0]: r for r in self._summary}
+        merged.update({r[0]: r for r in rows})
+        self._summary = [merged[k] for k in sorted(merged)]
+        if self._summary_ws is None:
+            self._summary_ws = self._open(self._summary_title, 240, len(SUMMARY_HEADERS))
+        self._summary_ws.update("A1", [SUMMARY_HEADERS] + self._summary)
+
+    def _archive_changed(self, year: int, d: date) -> None:
+        """Re-read an archive after a write to it and refresh that month's summary row."""
+        df = self._archive_frames[year] = self._records_df(self._archives[year])
+        self._write_summary(_summarise(df, [d.isoformat()[:7]]))
+
+    # -- rows ----------------------------------------------------------
     def _now(self) -> datetime:
         return datetime.utcnow()
 
@@ -111,53 +262,105 @@ class GoogleSheetRepo:
             self._now().isoformat(timespec="seconds") + "Z",
         ]
 
-    def _get_all_records_df(self) -> pd.DataFrame:
-        records = self.ws.get_all_records()
+    @timed("sheets", "sheets._records_df")
+    def _records_df(self, ws: Any) -> pd.DataFrame:
+        records = ws.get_all_records()
         df = pd.DataFrame(records)
         if not df.empty:
             if "date" in df.columns:
                 df["date"] = pd.to_datetime(df["date"]).dt.date
         return df
 
-    def to_dataframe(self) -> pd.DataFrame:
-        df = self._get_all_records_df()
-        if not df.empty:
-            df = df.sort_values("date")
-            df["date"] = pd.to_datetime(df["date"])  # back to datetime64 for charts
-        return df
+    @timed("sheets", "sheets.to_dataframe")
+    def to_dataframe(self, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+        """Days between ``start`` and ``end`` (inclusive, either open), reading only the partitions they overlap.
+
+        The archives answer for days before the watermark and the hot sheet for
+        the rest, so rows left behind by an interrupted :meth:`archive` are ignored.
+        """
+        self._fresh_catalog()
+        mark = self.watermark
+        parts = []
+        for year, ws in sorted(self._archives.items()):
+            if mark is None or year > mark.year or (end and year > end.year):
+                continue
+            if start and (year < start.year or start >= mark):
+                continue
+            if year not in self._archive_frames:
+                self._archive_frames[year] = self._records_df(ws)
+            df = self._archive_frames[year]
+            parts.append(df[df["date"] < mark] if not df.empty else df)
+        if end is None or mark is None or end >= mark:
+            df = self._records_df(self.ws)
+            if not df.empty:
+                # First copy wins, as in upserts: later copies are leftovers of an interrupted archive().
+                df = df.drop_duplicates("date")
+                df = df[df["date"] >= mark] if mark is not None else df
+            parts.append(df)
+        parts = [p for p in parts if not p.empty]
+        if not parts:
+            return pd.DataFrame()
+        df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        if start or end:
+            df = df[(df["date"] >= (start or date.min)) & (df["date"] <= (end or date.max))]
+        df = df.sort_values("date")
+        df["date"] = pd.to_datetime(df["date"])  # back to datetime64 for charts
+        return df.reset_index(drop=True)
 
-    def _find_row_index_by_date(self, d: date) -> Optional[int]:
+    def summary(self) -> pd.DataFrame:
+        """The precomputed per-month summary of the archived days."""
+        self._fresh_catalog()
+        df = pd.DataFrame(self._summary, columns=SUMMARY_HEADERS)
+        return df.astype({c: float for c in SUMMARY_HEADERS[2:]}).astype({"days": int})
+
+    @timed("sheets", "sheets._find_row_index_by_date")
+    def _find_row_index_by_date(self, d: date, ws: Any = None) -> Optional[int]:
         # Row index in Sheets is 1-based; headers occupy row 1
         # We'll scan the first column quickly
-        col = self.ws.col_values(1)  # includes header in [0]
+        col = (ws or self.ws).col_values(1)  # includes header in [0]
         target = d.isoformat()
         for idx, val in enumerate(col[1:], start=2):  # start at row 2
             if val == target:
                 return idx
         return None
 
-    def upsert_day(self, payload: Dict[str, Any]) -> None:
-        d = payload["date"]
-        if isinstance(d, str):
-            d = date.fromisoformat(d)
-            payload["date"] = d
-        row_idx = self._find_row_index_by_date(d)
-        if row_idx:
-            # preserve original created_at
-            existing = self.ws.row_values(row_idx)
-            created_at = existing[HEADERS.index("created_at")] if len(existing) >= len(HEADERS) else None
-            row = self._to_row(payload, created_at=created_at)
-            rng = f"A{row_idx}:{chr(ord('A') + len(HEADERS) - 1)}{row_idx}"
-            self.ws.update(rng, [row])
-        else:
-            row = self._to_row(payload)
-            self.ws.append_row(row, value_input_option="USER_ENTERED")
+    @timed("sheets", "sheets.upsert_day")
+    def upsert_day(self, payload: Dict[str, Any]) -> str:
+        """Write one day; returns ``"inserted"``, ``"updated"`` or ``"unchanged"``.
 
+        A row whose values already match is left alone (no ``update`` call).
+        """
+        with self._lock:
+            d = payload["date"]
+            if isinstance(d, str):
+                d = date.fromisoformat(d)
+                payload["date"] = d
+            ws, year = self._partition(d, create=True)
+            row_idx = self._find_row_index_by_date(d, ws)
+            if row_idx:
+                existing = ws.row_values(row_idx)
+                if content_hash(dict(zip(HEADERS, existing))) == content_hash(payload):
+                    return "unchanged"
+                # preserve original created_at
+                created_at = existing[HEADERS.index("created_at")] if len(existing) >= len(HEADERS) else None
+                row = self._to_row(payload, created_at=created_at)
+                rng = f"A{row_idx}:{chr(ord('A') + len(HEADERS) - 1)}{row_idx}"
+                ws.update(rng, [row])
+                outcome = "updated"
+            else:
+                ws.append_row(self._to_row(payload), value_input_option="USER_ENTERED")
+                outcome = "inserted"
+            if year is not None:
+                self._archive_changed(year, d)
+            return outcome
+
+    @timed("sheets", "sheets.get_day")
     def get_day(self, d: date) -> Optional[Dict[str, Any]]:
-        row_idx = self._find_row_index_by_date(d)
+        ws, _ = self._partition(d)
+        row_idx = self._find_row_index_by_date(d, ws) if ws is not None else None
         if not row_idx:
             return None
-        vals = self.ws.row_values(row_idx)
+        vals = ws.row_values(row_idx)
         data = dict(zip(HEADERS, vals))
         # normalize types
         out: Dict[str, Any] = {
@@ -171,9 +374,62 @@ class GoogleSheetRepo:
         }
         return out
 
+    @timed("sheets", "sheets.delete_day")
     def delete_day(self, d: date) -> bool:
-        row_idx = self._find_row_index_by_date(d)
-        if not row_idx:
-            return False
-        self.ws.delete_rows(row_idx)
-        return True
+        with self._lock:
+            ws, year = self._partition(d)
+            row_idx = self._find_row_index_by_date(d, ws) if ws is not None else None
+            if not row_idx:
+                return False
+            ws.delete_rows(row_idx)
+            if year is not None:
+                self._archive_changed(year, d)
+            return True
+
+    @timed("sheets", "sheets.archive")
+    def archive(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """Move whole months older than HOT_DAYS from the hot sheet to the yearly archives.
+
+        Rows are appended to the archives (skipping dates already there), then
+        the summary is extended, which advances the watermark, and only then
+        is the hot sheet rewritten: the kept rows go over the top of it and
+        the rows left below are deleted, so no call ever leaves it without its
+        recent rows. A run cut short leaves rows in both places; the watermark
+        decides which copy reads use and the next run tidies up.
+        """
+        with self._lock:
+            self._load_catalog()
+            cutoff = ((today or date.today()) - timedelta(days=HOT_DAYS)).replace(day=1)
+            if self.watermark is not None:
+                cutoff = max(cutoff, self.watermark)
+            advance = self.watermark is None or cutoff > self.watermark
+            rows = self.ws.get_all_values()[1:]
+            old, keep, seen = [], [], set()
+            for r in rows:
+                day = r[0] if r else ""
+                if day and day < cutoff.isoformat():
+                    old.append(r)
+                elif not day or day not in seen:  # a copy left by an interrupted rewrite goes
+                    seen.add(day)
+                    keep.append(r + [""] * (len(HEADERS) - len(r)))
+            by_year: Dict[int, List[List[str]]] = {}
+            for r in old:
+                by_year.setdefault(int(r[0][:4]), []).append(r)
+            for year, year_rows in sorted(by_year.items()):
+                ws = self._archive_ws(year, create=True)
+                there = set(ws.col_values(1)[1:])
+                new = [r for r in year_rows if r[0] not in there]
+                if new:
+                    ws.append_rows(new, value_input_option="RAW")
+                self._archive_frames.pop(year, None)
+            if advance and (old or self.watermark is not None):
+                if self._summary:
+                    first = _month_after(self._summary[-1][0])
+                else:
+                    first = date.fromisoformat(min(r[0] for r in old))
+                self._write_summary(_summarise(_frame(old), _months(first, cutoff)))
+                self.watermark = cutoff
+            if len(keep) < len(rows):
+                self.ws.update("A1", [HEADERS] + keep)
+                self.ws.delete_rows(len(keep) + 2, len(rows) + 1)
+            return {"moved": len(old), "years": sorted(by_year), "watermark": self.watermark}
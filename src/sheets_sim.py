@@ -0,0 +1,281 @@
+"""In-process stand-in for the parts of gspread that ``GoogleSheetRepo`` uses.
+
+``SimClient().open_by_key(...)`` returns a spreadsheet whose worksheets keep
+their cells in memory. Every method call counts as one API round trip, and
+each call is charged a simulated latency: a fixed cost plus a cost per cell
+moved. The simulator also enforces per-minute read and write quotas by
+answering HTTP 429, as the real API does, and can fail a share of calls at
+random with a 5xx. Time is virtual by default, so benchmarks and tests run
+instantly but still report what the calls would have cost. Pass
+``sleep=True`` to really wait.
+
+Usage::
+
+    repo = GoogleSheetRepo(SheetsConfig("sim"), client=SimClient(SimConfig(latency_ms=150)))
+"""
+from __future__ import annotations
+
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+READ_METHODS = frozenset({
+    "open_by_key", "worksheet", "worksheets", "get_all_values", "get_all_records", "col_values", "row_values",
+})
+
+_A1 = re.compile(r"^([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?$")
+
+
+class SimAPIError(Exception):
+    """A failed call, shaped like gspread's APIError (``code`` is the HTTP status)."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"APIError: [{code}]: {message}")
+        self.code = code
+
+
+@dataclass
+class SimConfig:
+    latency_ms: float = 120.0  # fixed cost of one round trip
+    per_cell_ms: float = 0.002  # transfer cost per cell read or written
+    jitter_ms: float = 0.0  # uniform +/- noise on each call
+    read_quota_per_min: Optional[int] = 300  # None = unlimited
+    write_quota_per_min: Optional[int] = 300
+    error_rate: float = 0.0  # share of calls failing with a random code from error_codes
+    error_codes: Sequence[int] = (500, 503)
+    seed: Optional[int] = 0
+    sleep: bool = False  # really wait out the latency instead of only counting it
+
+
+@dataclass
+class SimStats:
+    calls: Counter = field(default_factory=Counter)  # per method
+    reads: int = 0
+    writes: int = 0
+    cells: int = 0
+    errors: int = 0
+    throttled: int = 0
+    simulated_ms: float = 0.0
+
+    @property
+    def round_trips(self) -> int:
+        return sum(self.calls.values())
+
+
+class _Backend:
+    """Shared clock, quotas, error injection and stats for one simulated client."""
+
+    def __init__(self, cfg: SimConfig):
+        self.cfg = cfg
+        self.stats = SimStats()
+        self.clock_ms = 0.0  # virtual time; advances with every call
+        self._rng = random.Random(cfg.seed)
+        self._window: Dict[str, Deque[float]] = {"read": deque(), "write": deque()}
+        self._lock = threading.Lock()
+        self.fail_next: List[Optional[int]] = []  # outcome of the next calls, in order (None = succeed)
+
+    def call(self, method: str, cells: int = 0) -> None:
+        kind = "read" if method in READ_METHODS else "write"
+        quota = self.cfg.read_quota_per_min if kind == "read" else self.cfg.write_quota_per_min
+        with self._lock:
+            self.stats.calls[method] += 1
+            cost = self.cfg.latency_ms + cells * self.cfg.per_cell_ms
+            if self.cfg.jitter_ms:
+                cost = max(0.0, cost + self._rng.uniform(-self.cfg.jitter_ms, self.cfg.jitter_ms))
+            self.clock_ms += cost
+            self.stats.simulated_ms += cost
+            window = self._window[kind]
+            while window and window[0] <= self.clock_ms - 60_000:
+                window.popleft()
+            if quota is not None and len(window) >= quota:
+                self.stats.throttled += 1
+                raise SimAPIError(429, f"Quota exceeded for {kind} requests per minute")
+            window.append(self.clock_ms)
+            code = self.fail_next.pop(0) if self.fail_next else None
+            if code is None and self.cfg.error_rate and self._rng.random() < self.cfg.error_rate:
+                code = self._rng.choice(list(self.cfg.error_codes))
+            if code is not None:
+                self.stats.errors += 1
+                raise SimAPIError(code, "Simulated backend error")
+            if kind == "read":
+                self.stats.reads += 1
+            else:
+                self.stats.writes += 1
+            self.stats.cells += cells
+        if self.cfg.sleep:
+            time.sleep(cost / 1000.0)
+
+    def advance(self, seconds: float) -> None:
+        """Move the virtual clock on, e.g. to let quota windows drain."""
+        with self._lock:
+            self.clock_ms += seconds * 1000.0
+
+
+def _col_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch) - ord("A") + 1)
+    return n
+
+
+def _cell_text(v: Any) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def _numericise(v: str) -> Any:
+    # What get_all_records does to each cell by default.
+    if v == "":
+        return ""
+    try:
+        return int(v)
+    except ValueError:
+        pass
+    try:
+        return float(v)
+    except ValueError:
+        return v
+
+
+class SimWorksheet:
+    def __init__(self, backend: _Backend, title: str, rows: int = 1000, cols: int = 26):
+        self._b = backend
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self._rows: List[List[str]] = []
+
+    def load(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Replace the contents without charging any calls (for seeding fixtures)."""
+        self._rows = [[_cell_text(v) for v in r] for r in rows]
+
+    # -- reads ---------------------------------------------------------
+    def get_all_values(self) -> List[List[str]]:
+        self._b.call("get_all_values", sum(map(len, self._rows)))
+        return [list(r) for r in self._rows]
+
+    def get_all_records(self) -> List[Dict[str, Any]]:
+        self._b.call("get_all_records", sum(map(len, self._rows)))
+        if not self._rows:
+            return []
+        header = self._rows[0]
+        return [
+            {h: _numericise(r[i] if i < len(r) else "") for i, h in enumerate(header)}
+            for r in self._rows[1:]
+        ]
+
+    def col_values(self, col: int) -> List[str]:
+        self._b.call("col_values", len(self._rows))
+        out = [r[col - 1] if col - 1 < len(r) else "" for r in self._rows]
+        while out and out[-1] == "":
+            out.pop()
+        return out
+
+    def row_values(self, row: int) -> List[str]:
+        values = list(self._rows[row - 1]) if 0 < row <= len(self._rows) else []
+        while values and values[-1] == "":
+            values.pop()
+        self._b.call("row_values", len(values))
+        return values
+
+    # -- writes --------------------------------------------------------
+    def update(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        # gspread 6 takes (values, range_name); older code passes (range_name, values).
+        values = kwargs.get("values")
+        range_name = kwargs.get("range_name")
+        for a in args:
+            if isinstance(a, str):
+                range_name = a
+            else:
+                values = a
+        m = _A1.match(range_name or "A1")
+        if m is None:
+            raise ValueError(f"unsupported range: {range_name}")
+        row0, col0 = int(m.group(2)), _col_index(m.group(1))
+        values = [[_cell_text(v) for v in r] for r in (values or [])]
+        self._b.call("update", sum(map(len, values)))
+        for i, vals in enumerate(values):
+            r = row0 - 1 + i
+            while len(self._rows) <= r:
+                self._rows.append([])
+            row = self._rows[r]
+            need = col0 - 1 + len(vals)
+            if len(row) < need:
+                row.extend([""] * (need - len(row)))
+            row[col0 - 1:need] = vals
+        return {"updatedCells": sum(map(len, values))}
+
+    def append_row(self, values: Sequence[Any], value_input_option: str = "RAW", **kwargs: Any) -> Dict[str, Any]:
+        self._b.call("append_row", len(values))
+        self._rows.append([_cell_text(v) for v in values])
+        return {"updates": {"updatedRows": 1}}
+
+    def append_rows(
+        self, values: Sequence[Sequence[Any]], value_input_option: str = "RAW", **kwargs: Any
+    ) -> Dict[str, Any]:
+        self._b.call("append_rows", sum(map(len, values)))
+        self._rows.extend([_cell_text(v) for v in r] for r in values)
+        return {"updates": {"updatedRows": len(values)}}
+
+    def clear(self) -> Dict[str, Any]:
+        self._b.call("clear")
+        self._rows = []
+        return {}
+
+    def delete_rows(self, start_index: int, end_index: Optional[int] = None) -> Dict[str, Any]:
+        end = end_index or start_index
+        self._b.call("delete_rows")
+        del self._rows[start_index - 1:end]
+        return {}
+
+
+class SimSpreadsheet:
+    def __init__(self, backend: _Backend, key: str):
+        self._b = backend
+        self.id = key
+        self._sheets: Dict[str, SimWorksheet] = {}
+
+    def worksheet(self, title: str) -> SimWorksheet:
+        self._b.call("worksheet")
+        if title not in self._sheets:
+            import gspread
+
+            raise gspread.WorksheetNotFound(title)
+        return self._sheets[title]
+
+    def worksheets(self) -> List[SimWorksheet]:
+        self._b.call("worksheets")
+        return list(self._sheets.values())
+
+    def add_worksheet(self, title: str, rows: int, cols: int, **kwargs: Any) -> SimWorksheet:
+        self._b.call("add_worksheet")
+        ws = self._sheets[title] = SimWorksheet(self._b, title, rows, cols)
+        return ws
+
+
+class SimClient:
+    """Drop-in for ``gspread.Client`` as far as ``GoogleSheetRepo`` is concerned."""
+
+    def __init__(self, cfg: Optional[SimConfig] = None):
+        self.backend = _Backend(cfg or SimConfig())
+        self._books: Dict[str, SimSpreadsheet] = {}
+
+    @property
+    def stats(self) -> SimStats:
+        return self.backend.stats
+
+    def reset_stats(self) -> None:
+        self.backend.stats = SimStats()
+
+    def open_by_key(self, key: str) -> SimSpreadsheet:
+        self.backend.call("open_by_key")
+        if key not in self._books:
+            self._books[key] = SimSpreadsheet(self.backend, key)
+        return self._books[key]
@@ -0,0 +1,102 @@
+"""Whole-database snapshots of the SQLite store, and atomic restore.
+
+Snapshots use SQLite's online backup API. In WAL mode the copy reads one
+consistent version of the database without blocking the app's writers.
+Restore copies the snapshot into a temporary file next to the database,
+checks it, and swaps it in with a single rename (:func:`src.db.replace_database`).
+The database is either fully the snapshot or untouched, whatever the row count.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from . import db
+from .instrument import timed
+
+SNAPSHOT_DIR = Path("backups")
+SNAPSHOT_GLOB = "habits-*.db"
+KEEP_SNAPSHOTS = 20
+REQUIRED_TABLES = ("daily_metrics",)
+
+
+def _copy(src: Path, dest: Path) -> None:
+    source = sqlite3.connect(f"file:{src}?mode=ro", uri=True, timeout=db.BUSY_TIMEOUT_S)
+    target = sqlite3.connect(dest)
+    try:
+        source.backup(target)  # one step: a single read transaction on the source
+        target.execute("PRAGMA journal_mode=DELETE")  # a self-contained file, no -wal
+    finally:
+        target.close()
+        source.close()
+
+
+def verify(path: Path) -> None:
+    """Raise ValueError unless ``path`` is a sound SQLite file with our tables."""
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            check = conn.execute("PRAGMA quick_check").fetchone()[0]
+            tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as exc:
+        raise ValueError(f"{path.name} is not a usable snapshot: {exc}") from exc
+    if check != "ok":
+        raise ValueError(f"{path.name} failed integrity check: {check}")
+    missing = [t for t in REQUIRED_TABLES if t not in tables]
+    if missing:
+        raise ValueError(f"{path.name} is missing tables: {', '.join(missing)}")
+
+
+@timed("snapshot")
+def create(path: Optional[Path] = None) -> Path:
+    """Snapshot the live database to ``path`` (default: a timestamped file in SNAPSHOT_DIR)."""
+    if path is None:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        path = SNAPSHOT_DIR / f"habits-{datetime.utcnow():%Y%m%d-%H%M%S-%f}.db"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db.get_engine()  # make sure the file exists
+    tmp = path.with_name(path.name + ".part")
+    try:
+        _copy(db.DB_PATH, tmp)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return path
+
+
+def list_snapshots(directory: Optional[Path] = None) -> List[Path]:
+    """Snapshots in ``directory``, newest first."""
+    return sorted((directory or SNAPSHOT_DIR).glob(SNAPSHOT_GLOB), reverse=True)
+
+
+def prune(keep: int = KEEP_SNAPSHOTS, directory: Optional[Path] = None) -> List[Path]:
+    """Delete all but the ``keep`` newest snapshots; returns the deleted paths."""
+    old = list_snapshots(directory)[keep:]
+    for p in old:
+        p.unlink(missing_ok=True)
+    return old
+
+
+@timed("snapshot")
+def restore(path: Path) -> None:
+    """Replace the live database with the snapshot at ``path``, all or nothing.
+
+    Callers must make sure nothing is writing (see ``repo.restore_snapshot``).
+    """
+    verify(path)
+    db.DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(prefix=".restore-", suffix=".db", dir=db.DB_PATH.parent)
+    os.close(fd)
+    tmp = Path(name)
+    try:
+        _copy(path, tmp)
+        verify(tmp)
+        db.replace_database(tmp)
+    finally:
+        tmp.unlink(missing_ok=True)
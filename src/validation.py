@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 from datetime import date
-from typing import Dict, Tuple
+from typing import Dict, List, Optional
 
+import numpy as np
+import pandas as pd
 
-LAST_DAY = date(2025, 12, 31)
+
+def last_day() -> date:
+    """Latest date a day may be logged for: today, or ``HABITS_LAST_DAY`` (ISO date) when set."""
+    raw = os.getenv("HABITS_LAST_DAY")
+    return date.fromisoformat(raw) if raw else date.today()
 
 
 @dataclass
@@ -22,22 +29,131 @@ RANGES = {
     "weight_kg": (50.0, 100.0),
 }
 
+# Columns that may be left empty; the rest fall back to defaults only when absent.
+OPTIONAL = {"weight_kg"}
+
+ERROR_COLUMNS = ["row", "column", "value", "reason"]
+
+
+@dataclass
+class ValidationReport:
+    """Outcome of :func:`validate_frame`.
+
+    ``errors`` has one row per failed check (``row`` is the positional row in
+    the input frame); ``valid`` is a boolean mask over the input rows.
+    """
+
+    n_rows: int
+    valid: np.ndarray
+    errors: pd.DataFrame
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.valid.all())
+
+    @property
+    def bad_rows(self) -> np.ndarray:
+        return np.flatnonzero(~self.valid)
+
+    def first_message(self) -> str:
+        return "" if self.errors.empty else str(self.errors["reason"].iloc[0])
+
+    def summary(self) -> pd.DataFrame:
+        """Failure counts per column and reason."""
+        if self.errors.empty:
+            return pd.DataFrame(columns=["column", "reason", "rows"])
+        kind = self.errors["reason"].str.split(":").str[0]
+        return (
+            self.errors.assign(reason=kind)
+            .groupby(["column", "reason"], sort=False)
+            .size()
+            .rename("rows")
+            .reset_index()
+        )
+
+
+def _future_message(last: date) -> str:
+    return f"No future dates beyond {last.isoformat()} allowed."
+
 
-def validate_date(d: date) -> ValidationResult:
-    if d > LAST_DAY:
-        return ValidationResult(False, "No future dates beyond 2025-12-31 allowed.")
-    return ValidationResult(True)
+def validate_frame(df: pd.DataFrame, last: Optional[date] = None) -> ValidationReport:
+    """Check every date and range rule for all rows at once.
+
+    Each rule is a boolean mask over the rows (ranges are one ``rows x metrics``
+    matrix), so the cost is a handful of NumPy operations regardless of size.
+    Dates after ``last`` (default :func:`last_day`) are rejected.
+    """
+    last = last or last_day()
+    n = len(df)
+    parts: List[pd.DataFrame] = []
+
+    def collect(mask: np.ndarray, column: str, values: np.ndarray, reason) -> None:
+        rows = np.flatnonzero(mask)
+        if rows.size:
+            why = [reason(v) for v in values[rows]] if callable(reason) else reason
+            parts.append(
+                pd.DataFrame({"row": rows, "column": column, "value": values[rows], "reason": why})
+            )
+
+    if "date" in df.columns:
+        raw = df["date"].to_numpy(dtype=object)
+        dates = pd.to_datetime(df["date"], errors="coerce")
+        collect(dates.isna().to_numpy(), "date", raw, "invalid date")
+        # Whole days: a time of day on the last allowed date is not in the future.
+        future = (dates.dt.normalize() > pd.Timestamp(last)).to_numpy()
+        collect(future, "date", raw, _future_message(last))
+
+    keys = [k for k in RANGES if k in df.columns]
+    if keys and n:
+        raw = df[keys].to_numpy(dtype=object)
+        values = np.column_stack(
+            [pd.to_numeric(df[k], errors="coerce").to_numpy(dtype=float) for k in keys]
+        )
+        missing = df[keys].isna().to_numpy()
+        low = np.array([RANGES[k][0] for k in keys], dtype=float)
+        high = np.array([RANGES[k][1] for k in keys], dtype=float)
+        optional = np.array([k in OPTIONAL for k in keys])
+
+        required = missing & ~optional
+        not_number = np.isnan(values) & ~missing
+        out_of_bounds = ~np.isnan(values) & ((values < low) | (values > high))
+
+        for j, key in enumerate(keys):
+            lo, hi = RANGES[key]
+            collect(required[:, j], key, raw[:, j], f"{key} is required")
+            collect(not_number[:, j], key, raw[:, j], f"{key} is not a number")
+            collect(
+                out_of_bounds[:, j], key, raw[:, j],
+                lambda v, key=key, lo=lo, hi=hi: f"{key} out of bounds [{lo}, {hi}]: {v}",
+            )
+
+    if parts:
+        errors = pd.concat(parts, ignore_index=True)
+        # Row order first, then rule order, so the first message matches a row-by-row check.
+        errors = errors.sort_values("row", kind="stable").reset_index(drop=True)
+    else:
+        errors = pd.DataFrame(columns=ERROR_COLUMNS)
+    valid = np.ones(n, dtype=bool)
+    if not errors.empty:
+        valid[errors["row"].to_numpy(dtype=int)] = False
+    return ValidationReport(n_rows=n, valid=valid, errors=errors)
+
+
+def _single(payload: Dict, last: Optional[date] = None) -> ValidationResult:
+    report = validate_frame(pd.DataFrame([payload]), last)
+    if report.ok:
+        return ValidationResult(True)
+    return ValidationResult(False, report.first_message())
+
+
+def validate_date(d: date, last: Optional[date] = None) -> ValidationResult:
+    return _single({"date": d}, last)
 
 
 def validate_ranges(payload: Dict) -> ValidationResult:
-    for key, (low, high) in RANGES.items():
-        if payload.get(key) is None:
-            # allow None for weight, notes, etc.
-            if key == "weight_kg":
-                continue
-        val = payload.get(key)
-        if val is None:
-            continue
-        if not (low <= float(val) <= high):
-            return ValidationResult(False, f"{key} out of bounds [{low}, {high}]: {val}")
-    return ValidationResult(True)
+    return _single({k: payload[k] for k in RANGES if k in payload})
+
+
+def validate_payload(payload: Dict, last: Optional[date] = None) -> ValidationResult:
+    """Date and range checks for a single upsert payload."""
+    return _single({k: payload[k] for k in ("date", *RANGES) if k in payload}, last)
@@ -0,0 +1,130 @@
+"""Single writer thread with group commit for the SQLite backend.
+
+Streamlit runs every browser session in its own thread. Instead of each one
+opening a write transaction (and racing for SQLite's single write lock), the
+repo hands writes to one :class:`Writer`. It drains whatever is queued, runs
+the jobs in one transaction and commits once, then hands each caller its own
+result or exception.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from . import instrument
+from .db import session_scope
+
+log = logging.getLogger(__name__)
+
+Job = Callable[[Any], Any]  # receives the open session
+
+
+@dataclass
+class _Pending:
+    fn: Job
+    future: Future = field(default_factory=Future)
+
+
+class Writer:
+    def __init__(self, max_batch: int = 64, linger: float = 0.002, finish: Optional[Job] = None):
+        self.max_batch = max_batch
+        self.finish = finish  # runs once per transaction, after the batch's jobs
+        self.linger = linger  # how long to wait for more jobs once one arrived
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"batches": 0, "jobs": 0, "largest": 0, "retried": 0}
+
+    def submit(self, fn: Job) -> Future:
+        """Queue ``fn(session)``; the future resolves once its batch is committed."""
+        self.start()
+        job = _Pending(fn)
+        self._queue.put(job)
+        return job.future
+
+    def run(self, fn: Job) -> Any:
+        """Submit and wait: the blocking call the repo uses."""
+        return self.submit(fn).result()
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                return
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            batch = [job]
+            stop = False
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.max_batch:
+                try:
+                    nxt = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch: List[_Pending]) -> None:
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["jobs"] += len(batch)
+            self._stats["largest"] = max(self._stats["largest"], len(batch))
+        instrument.count("writer.batches")
+        instrument.count("writer.jobs", len(batch))
+        try:
+            with instrument.span("writer.commit", "sqlite"), session_scope() as s:
+                results = [job.fn(s) for job in batch]
+                if self.finish is not None:
+                    self.finish(s)
+        except Exception as exc:
+            if len(batch) == 1:
+                batch[0].future.set_exception(exc)
+                return
+            # One job spoiled the group commit: rerun each alone so only it fails.
+            with self._stats_lock:
+                self._stats["retried"] += len(batch)
+            for job in batch:
+                self._run_one(job)
+            return
+        for job, result in zip(batch, results):
+            job.future.set_result(result)
+
+    def _run_one(self, job: _Pending) -> None:
+        try:
+            with session_scope() as s:
+                result = job.fn(s)
+                if self.finish is not None:
+                    self.finish(s)
+        except Exception as exc:
+            log.debug("writer: job failed: %s", exc)
+            job.future.set_exception(exc)
+            return
+        job.future.set_result(result)
@@ -2,6 +2,20 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 root = Path(__file__).resolve().parents[1]
 if str(root) not in sys.path:
     sys.path.insert(0, str(root))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_db(tmp_path, monkeypatch):
+    """Point the SQLite layer at a fresh database for every test."""
+    from src import db, repo
+
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "data" / "habits.db")
+    db.reset_engine()
+    repo.reset_caches()
+    yield
+    db.reset_engine()
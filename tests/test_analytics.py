@@ -1,7 +1,21 @@
+import numpy as np
 import pandas as pd
+import pytest
 from datetime import date, timedelta
 
-from src.analytics import add_rolling, compute_streak
+from src.analytics import (
+    ScoreRule,
+    add_rolling,
+    best_of_sweep,
+    composite_score,
+    compute_streak,
+    rank_sweep,
+    resample,
+    score_sweep,
+    sweep_grid,
+    weekly_breakdown,
+    weight_grid,
+)
 
 
 def test_rolling_avg():
@@ -23,3 +37,100 @@ def test_streaks():
         "weight_kg": [70]*7,
     })
     assert compute_streak(df) == 5
+
+
+def _frame(n=40):
+    d0 = pd.date_range("2025-09-20", periods=n, freq="D")
+    return pd.DataFrame({
+        "date": d0,
+        "sugar_intake_g": list(range(n)),
+        "water_ml": [1000] * n,
+        "productive_hours": [1.5] * n,
+        "fap_count": [0] * n,
+        "weight_kg": [70.0 if i % 2 else None for i in range(n)],
+    })
+
+
+def test_weekly_breakdown_starts_monday():
+    wk = weekly_breakdown(_frame())
+    assert (wk["week"].dt.weekday == 0).all()
+    assert list(wk.columns) == ["week", "sugar_intake_g", "water_ml", "productive_hours", "fap_count"]
+    assert wk["sugar_intake_g"].sum() == sum(range(40))
+
+
+@pytest.mark.parametrize("anchor, rule", [("MON", "W-MON"), ("SUN", "W-SUN"), ("THU", "W-THU")])
+def test_resample_matches_pandas_weekly(anchor, rule):
+    df = _frame()
+    ours = resample(df, "W", ["sugar_intake_g"], "sum", anchor=anchor)
+    ref = df.set_index("date")["sugar_intake_g"].resample(rule, label="left", closed="left").sum()
+    assert ours["sugar_intake_g"].tolist() == ref.tolist()
+    assert ours["bucket"].dt.strftime("%F").tolist() == ref.index.strftime("%F").tolist()
+
+
+def test_resample_monthly_aggs_and_coverage():
+    out = resample(_frame(), "M", ["weight_kg"], ["mean", "count", "coverage", "max"])
+    assert out["bucket"].dt.strftime("%F").tolist() == ["2025-09-01", "2025-10-01"]
+    # Sep 20-30 has 11 days, odd offsets carry a weight -> 5 values out of 30 days
+    assert out["weight_kg_count"].tolist() == [5, 15]
+    assert out["weight_kg_coverage"].tolist() == pytest.approx([5 / 30, 15 / 31])
+
+
+def test_resample_custom_buckets():
+    out = resample(_frame(), 10, ["sugar_intake_g"], "count", origin=date(2025, 9, 20))
+    assert out["sugar_intake_g"].tolist() == [10, 10, 10, 10]
+
+
+def _score_frame():
+    d0 = pd.date_range("2025-09-22", periods=6, freq="D")
+    return pd.DataFrame({
+        "date": d0,
+        "productive_hours": [0, 2, 4, 6, 12, 14],
+        "water_ml": [0, 1000, 2000, 3000, 4000, 800],
+        "sugar_intake_g": [200, 150, 75, 30, 0, 10],
+    })
+
+
+def test_composite_score_defaults_and_custom_rules():
+    df = _score_frame()
+    sc = composite_score(df)
+    assert sc.index.equals(df.index)
+    assert sc.iloc[0] == 0.0 and sc.iloc[4] == pytest.approx(1.0)
+    only_prod = composite_score(df, [ScoreRule("productive_hours", 1.0, 0, 8)])
+    assert only_prod.tolist() == pytest.approx([0, 0.25, 0.5, 0.75, 1, 1])
+
+
+def test_score_sweep_matches_composite_score_per_combo():
+    df = _score_frame()
+    weights, highs = sweep_grid(weight_grid(3, 0.25), np.array([[12, 4000, 150], [8, 3000, 100]]))
+    res = score_sweep(df, weights, highs)
+    assert res.scores.shape == (len(weights), len(df))
+    for i in (0, 7, len(weights) - 1):
+        expected = composite_score(df, res.rules_for(i)).to_numpy()
+        assert res.scores[i] == pytest.approx(expected)
+    ranked = rank_sweep(res, df["productive_hours"].to_numpy())
+    top = ranked.iloc[0]
+    assert top["w_productive_hours"] == 1.0 and top["corr"] == pytest.approx(
+        np.corrcoef(res.scores[ranked.index[0]], df["productive_hours"])[0, 1]
+    )
+
+
+def test_best_of_sweep_keeps_the_top_rows_of_the_full_ranking(monkeypatch):
+    import src.analytics as analytics
+
+    df = _score_frame()
+    weights, highs = sweep_grid(weight_grid(3, 0.1), np.array([[12, 4000, 150], [8, 3000, 100], [10, 2500, 120]]))
+    full = rank_sweep(score_sweep(df, weights, highs), df["productive_hours"].to_numpy())
+    monkeypatch.setattr(analytics, "SWEEP_CHUNK_ELEMENTS", len(df) * 3 * 7)  # several chunks
+    ranked, kept = best_of_sweep(df, weights, highs, df["productive_hours"].to_numpy(), k=5)
+    assert len(ranked) == 5 and kept.scores.shape == (5, len(df))
+    np.testing.assert_allclose(ranked["corr"], full["corr"].head(5))
+    for i in range(5):
+        assert kept.scores[i] == pytest.approx(composite_score(df, kept.rules_for(i)).to_numpy())
+
+
+def test_sweep_grid_samples_above_the_limit():
+    weights, highs = weight_grid(4, 0.02), np.arange(2000.0).reshape(-1, 4)
+    w, h = sweep_grid(weights, highs, limit=1000)
+    assert w.shape == (1000, 4) and h.shape == (1000, 4)
+    assert len(np.unique(np.hstack([w, h]), axis=0)) == 1000
+    assert set(map(tuple, h)) <= set(map(tuple, highs))
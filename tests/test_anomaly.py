@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.anomaly import ANOMALY_METRICS, Detector, flagged_frame, score_history
+from src.db import get_engine
+from src.repo import delete_day, get_anomalies, import_frame, init_db, to_dataframe, upsert_day
+
+
+def _history(n=60, start=date(2025, 9, 1)):
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        "date": [start + timedelta(days=i) for i in range(n)],
+        "sugar_intake_g": rng.normal(60, 10, n).round(),
+        "water_ml": rng.normal(2200, 300, n).round(),
+        "fap_count": 0,
+        "productive_hours": rng.normal(5, 1, n).round(1),
+    })
+    if n > 40:
+        df.loc[40, "sugar_intake_g"] = 220  # the kind of spike the seed script injects
+    return df
+
+
+def test_streaming_matches_the_vectorized_backfill():
+    df = _history()
+    scores, final, _ = score_history(df)
+    det = Detector()
+    streamed = []
+    for row in df.to_dict("records"):
+        s = det.observe(row["date"], row)
+        streamed += [(row["date"], m, s[m]) for m in ANOMALY_METRICS]
+    streamed = pd.DataFrame(streamed, columns=["date", "metric", "score"])
+    merged = scores.merge(streamed, on=["date", "metric"], suffixes=("", "_stream"))
+    np.testing.assert_array_equal(merged["score"], merged["score_stream"])
+    assert det.to_dict() == final.to_dict()
+
+    flags = flagged_frame(scores)
+    assert ((flags["date"] == date(2025, 10, 11)) & (flags["metric"] == "sugar_intake_g")).any()
+
+
+def _expected():
+    return flagged_frame(score_history(to_dataframe())[0])
+
+
+def _assert_flags_current():
+    got, want = get_anomalies(), _expected()
+    pd.testing.assert_frame_equal(got[["date", "metric"]], want[["date", "metric"]])
+    np.testing.assert_allclose(got["score"], want["score"])
+
+
+def test_writes_keep_stored_flags_equal_to_a_rescore():
+    init_db()
+    import_frame(_history(40))
+    _assert_flags_current()
+    for i, sugar in enumerate([60, 250, 55]):  # appended days take the O(1) path
+        upsert_day({"date": date(2025, 10, 10 + i), "sugar_intake_g": sugar, "water_ml": 2200, "fap_count": 0, "productive_hours": 5.0})
+    flags = get_anomalies()
+    assert ((flags["date"] == date(2025, 10, 11)) & (flags["metric"] == "sugar_intake_g")).any()
+    _assert_flags_current()
+
+    upsert_day({"date": date(2025, 10, 12), "sugar_intake_g": 400, "water_ml": 2200, "fap_count": 0, "productive_hours": 5.0})
+    upsert_day({"date": date(2025, 9, 20), "sugar_intake_g": 0, "water_ml": 2200, "fap_count": 0, "productive_hours": 5.0})
+    delete_day(date(2025, 10, 11))
+    _assert_flags_current()
+
+
+def test_rows_written_outside_the_repo_are_rescored():
+    init_db()
+    import_frame(_history(40))
+    get_anomalies()
+    with get_engine().begin() as conn:
+        conn.exec_driver_sql("UPDATE daily_metrics SET productive_hours = 0 WHERE date = '2025-10-08'")
+    _assert_flags_current()
@@ -0,0 +1,93 @@
+import gzip
+import io
+import json
+from datetime import date, timedelta
+
+from src.api import app
+from src.repo import goal_report, init_db, upsert_day
+
+
+def call(method, path, query="", body=None, headers=None):
+    raw = json.dumps(body).encode() if body is not None else b""
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "CONTENT_LENGTH": str(len(raw)),
+        "wsgi.input": io.BytesIO(raw),
+    }
+    for k, v in (headers or {}).items():
+        environ["HTTP_" + k.upper().replace("-", "_")] = v
+    seen = {}
+
+    def start_response(status, hdrs):
+        seen["status"] = int(status.split()[0])
+        seen["headers"] = dict(hdrs)
+
+    data = b"".join(app(environ, start_response))
+    if seen["headers"].get("Content-Encoding") == "gzip":
+        data = gzip.decompress(data)
+    return seen["status"], seen["headers"], (json.loads(data) if data else None)
+
+
+def _seed(n=30):
+    for i in range(n):
+        upsert_day({"date": date(2025, 9, 1) + timedelta(days=i), "sugar_intake_g": 40 + i, "water_ml": 2000,
+                    "fap_count": 0, "productive_hours": 5.0, "notes": f"day {i}"})
+
+
+def test_day_crud_round_trip():
+    init_db()
+    status, _, body = call("PUT", "/api/days/2025-10-01", body={"sugar_intake_g": 30, "water_ml": 2500, "productive_hours": 6})
+    assert status == 201 and body["water_ml"] == 2500
+    status, _, body = call("PUT", "/api/days/2025-10-01", body={"notes": "gym"})
+    assert status == 200 and body["notes"] == "gym" and body["water_ml"] == 2500
+    assert call("GET", "/api/days/2025-10-01")[2]["sugar_intake_g"] == 30
+    assert call("PUT", "/api/days/2025-10-02", body={"water_ml": 99999})[0] == 422
+    assert call("DELETE", "/api/days/2025-10-01")[0] == 204
+    assert call("GET", "/api/days/2025-10-01")[0] == 404
+    today, tomorrow = date.today(), date.today() + timedelta(days=1)
+    assert call("PUT", f"/api/days/{today.isoformat()}", body={"water_ml": 2000})[0] == 201
+    assert call("PUT", f"/api/days/{tomorrow.isoformat()}", body={"water_ml": 2000})[0] == 422
+
+
+def test_keyset_pages_cover_the_range_once():
+    init_db()
+    _seed()
+    seen, after = [], ""
+    while True:
+        status, _, body = call("GET", "/api/days", f"limit=7&start=2025-09-03{after}")
+        assert status == 200
+        seen += [item["date"] for item in body["items"]]
+        if body["next_after"] is None:
+            break
+        after = f"&after={body['next_after']}"
+    assert seen == [(date(2025, 9, 3) + timedelta(days=i)).isoformat() for i in range(28)]
+
+
+def test_conditional_get_and_compression():
+    init_db()
+    _seed()
+    status, headers, body = call("GET", "/api/days", "limit=30", headers={"Accept-Encoding": "gzip"})
+    assert status == 200 and headers["Content-Encoding"] == "gzip" and len(body["items"]) == 30
+    etag, modified = headers["ETag"], headers["Last-Modified"]
+
+    assert call("GET", "/api/days", "limit=30", headers={"If-None-Match": etag})[0] == 304
+    assert call("GET", "/api/days", "limit=30", headers={"If-Modified-Since": modified})[0] == 304
+    assert call("GET", "/api/days", "limit=5", headers={"If-None-Match": etag})[0] == 200
+
+    call("PUT", "/api/days/2025-09-05", body={"water_ml": 3000})
+    assert call("GET", "/api/days", "limit=30", headers={"If-None-Match": etag})[0] == 200
+
+
+def test_breakdown_and_summary():
+    init_db()
+    _seed()
+    status, _, body = call("GET", "/api/breakdown", "freq=M&aggs=sum,count&metrics=sugar_intake_g")
+    assert status == 200 and body["items"][0]["sugar_intake_g_count"] == 30
+    assert call("GET", "/api/breakdown", "aggs=median")[0] == 400
+    status, _, body = call("GET", "/api/breakdown", "freq=0")
+    assert status == 400 and "freq" in body["error"]
+    status, _, body = call("GET", "/api/summary")
+    assert status == 200 and body["days"] == 30 and body["last"] == "2025-09-30"
+    assert body["streak"] == goal_report().streak()
@@ -0,0 +1,69 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import update
+
+from src.changes import changes_since, latest_cursor, prune_changes
+from src.db import get_engine, session_scope
+from src.models import ChangeLogEntry
+from src.repo import data_version, delete_day, init_db, upsert_day
+
+
+def _day(d, **kw):
+    payload = {"date": d, "sugar_intake_g": 10, "water_ml": 2000, "fap_count": 0, "productive_hours": 4.0}
+    payload.update(kw)
+    upsert_day(payload)
+
+
+def test_changes_are_compacted_per_date():
+    init_db()
+    start = latest_cursor()
+    _day(date(2025, 3, 1))
+    _day(date(2025, 3, 1), water_ml=2500)
+    _day(date(2025, 3, 2))
+    _day(date(2025, 3, 3))
+    delete_day(date(2025, 3, 3))
+
+    batch = changes_since(start)
+    assert {c.date: c.op for c in batch.changes} == {
+        date(2025, 3, 1): "insert",
+        date(2025, 3, 2): "insert",
+        date(2025, 3, 3): "delete",
+    }
+    assert batch.cursor == latest_cursor() and not batch.has_more
+
+    _day(date(2025, 3, 2), water_ml=100)
+    nxt = changes_since(batch.cursor)
+    assert [(c.date, c.op) for c in nxt.changes] == [(date(2025, 3, 2), "update")]
+
+
+def test_limit_pages_through_the_log():
+    init_db()
+    for i in range(1, 6):
+        _day(date(2025, 4, i))
+    first = changes_since(0, limit=3)
+    assert len(first.changes) == 3 and first.has_more
+    rest = changes_since(first.cursor, limit=3)
+    assert rest.dates == [date(2025, 4, 4), date(2025, 4, 5)] and not rest.has_more
+
+
+def test_writes_outside_the_repo_are_captured_and_move_data_version():
+    init_db()
+    _day(date(2025, 5, 1))
+    before, cursor = data_version(), latest_cursor()
+    with get_engine().begin() as conn:
+        conn.exec_driver_sql("DELETE FROM daily_metrics WHERE date = '2025-05-01'")
+    assert [(c.date, c.op) for c in changes_since(cursor).changes] == [(date(2025, 5, 1), "delete")]
+    assert data_version() != before
+
+
+def test_pruned_history_reports_truncation():
+    init_db()
+    _day(date(2025, 6, 1))
+    cursor = latest_cursor()
+    _day(date(2025, 6, 2))
+    _day(date(2025, 6, 3))
+    with session_scope() as s:
+        s.execute(update(ChangeLogEntry).values(changed_at=datetime.utcnow() - timedelta(days=200)))
+    assert prune_changes(keep_days=90) == 3
+    batch = changes_since(cursor)
+    assert batch.truncated and batch.changes == [] and batch.cursor == latest_cursor()
@@ -2,7 +2,7 @@ from pathlib import Path
 import pandas as pd
 from datetime import date
 
-from src.repo import init_db, import_csv, to_dataframe, upsert_day
+from src.repo import data_version, init_db, import_csv, to_dataframe, upsert_day
 
 
 def test_csv_ingest_and_validation(tmp_path: Path):
@@ -22,3 +22,12 @@ def test_csv_ingest_and_validation(tmp_path: Path):
         assert False, "should have raised"
     except Exception:
         pass
+
+
+def test_data_version_changes_on_write():
+    init_db()
+    v0 = data_version()
+    upsert_day({"date": date(2025, 10, 1), "sugar_intake_g": 1, "water_ml": 100, "fap_count": 0, "productive_hours": 1.0})
+    v1 = data_version()
+    assert v1 != v0
+    assert data_version() == v1
@@ -22,3 +22,71 @@ def test_export_import_roundtrip(tmp_path: Path):
     assert n >= 1
     df = to_dataframe()
     assert not df.empty
+
+
+def test_reimport_skips_unchanged_rows(tmp_path: Path):
+    from src.changes import latest_cursor
+    from src.repo import get_day, import_csv_report
+
+    init_db()
+    for day in range(1, 6):
+        upsert_day({"date": date(2025, 9, day), "sugar_intake_g": day, "water_ml": 2000, "fap_count": 0,
+                    "productive_hours": 4.5, "weight_kg": 71.3, "notes": "gym" if day == 2 else None})
+    assert upsert_day({"date": date(2025, 9, 1), "sugar_intake_g": 1}) == "unchanged"
+    out = export_csv(tmp_path / "out.csv")
+    stamp, cursor = get_day(date(2025, 9, 3)).updated_at, latest_cursor()
+
+    res = import_csv_report(out)
+    assert (res.imported, res.inserted, res.updated, res.unchanged) == (5, 0, 0, 5)
+    assert latest_cursor() == cursor and get_day(date(2025, 9, 3)).updated_at == stamp
+
+    df = to_dataframe()
+    df.loc[df["date"] == "2025-09-04", "water_ml"] = 2500
+    df.to_csv(out, index=False)
+    with open(out, "a") as f:
+        f.write("2025-09-06,10,1800,0,3.0,,,,\n")
+    res = import_csv_report(out)
+    assert (res.inserted, res.updated, res.unchanged) == (1, 1, 4)
+    assert latest_cursor() == cursor + 2
+
+    # A repeated date counts once more: updated if it differs from the earlier row, else unchanged.
+    with open(out, "a") as f:
+        f.write("2025-09-07,1,1000,0,1.0,,,,\n2025-09-07,2,1000,0,1.0,,,,\n2025-09-06,10,1800,0,3.0,,,,\n")
+    res = import_csv_report(out)
+    assert (res.imported, res.inserted, res.updated, res.unchanged) == (9, 1, 1, 7)
+    assert get_day(date(2025, 9, 7)).sugar_intake_g == 2
+
+
+def test_sheets_import_counts_a_repeated_date_once(monkeypatch):
+    import pandas as pd
+
+    from src import repo
+    from src.sheets_repo import GoogleSheetRepo, SheetsConfig
+    from src.sheets_sim import SimClient
+
+    init_db()
+    sheets = GoogleSheetRepo(SheetsConfig("test"), client=SimClient())
+    monkeypatch.setattr(repo, "_sheets_enabled", lambda: True)
+    monkeypatch.setattr(repo, "_SHEETS_REPO", sheets)
+    monkeypatch.setenv("HABITS_WRITE_BEHIND", "0")
+    day = {"sugar_intake_g": 1, "water_ml": 1000, "fap_count": 0, "productive_hours": 1.0}
+    df = pd.DataFrame([{"date": "2025-09-01", **day}, {"date": "2025-09-01", **day, "water_ml": 1200},
+                       {"date": "2025-09-01", **day, "water_ml": 1200}])
+    res = repo.import_frame(df)
+    assert (res.imported, res.inserted, res.updated, res.unchanged) == (3, 1, 1, 1)
+    assert sheets.get_day(date(2025, 9, 1))["water_ml"] == 1200
+
+
+def test_create_all_adds_content_hash_to_older_databases():
+    from src import db
+
+    with db.get_engine().begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE daily_metrics (date DATE PRIMARY KEY, sugar_intake_g INTEGER NOT NULL, water_ml INTEGER NOT NULL,"
+            " fap_count INTEGER NOT NULL, productive_hours FLOAT NOT NULL, weight_kg FLOAT, notes VARCHAR,"
+            " created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL)"
+        )
+        conn.exec_driver_sql("INSERT INTO daily_metrics VALUES ('2025-09-01', 5, 2000, 0, 4.0, NULL, NULL, '2025-09-01', '2025-09-01')")
+    init_db()
+    assert upsert_day({"date": date(2025, 9, 1), "sugar_intake_g": 5, "water_ml": 2000}) == "unchanged"
+    assert upsert_day({"date": date(2025, 9, 1), "sugar_intake_g": 6}) == "updated"
@@ -0,0 +1,44 @@
+import json
+
+import pandas as pd
+import plotly.io as pio
+
+from src import figcache
+from src.charts import time_series
+
+
+def _frame(n=30):
+    return pd.DataFrame({"date": pd.date_range("2025-01-01", periods=n), "water_ml": range(n)})
+
+
+def test_hit_skips_the_builder_and_returns_the_same_figure():
+    figcache.clear()
+    calls = []
+
+    def build():
+        calls.append(1)
+        return time_series(_frame(), ["water_ml"])
+
+    first = figcache.cached("time_series", "water_ml", "v1", build)
+    again = figcache.cached("time_series", "water_ml", "v1", build)
+    assert len(calls) == 1
+    assert json.loads(pio.to_json(again)) == json.loads(pio.to_json(first))
+    figcache.cached("time_series", "water_ml", "v2", build)  # new data version
+    assert len(calls) == 2
+    st = figcache.stats()
+    assert (st["hits"], st["misses"]) == (1, 2)
+    assert st["hit_rate"] == 1 / 3 and st["bytes_saved"] > 0
+
+
+def test_lru_eviction_keeps_the_cache_within_its_byte_budget(monkeypatch):
+    figcache.clear()
+    figcache.cached("time_series", "a", "v", lambda: time_series(_frame(), ["water_ml"]))
+    one = figcache.stats()["bytes"]
+    monkeypatch.setattr(figcache, "MAX_BYTES", int(one * 2.5))
+    for key in ("b", "c"):
+        figcache.cached("time_series", key, "v", lambda: time_series(_frame(), ["water_ml"]))
+    st = figcache.stats()
+    assert st["entries"] == 2 and st["evictions"] == 1 and st["bytes"] <= figcache.MAX_BYTES
+    figcache.cached("time_series", "c", "v", lambda: None)  # newest entry survived
+    assert figcache.stats()["hits"] == 1
+    figcache.clear()
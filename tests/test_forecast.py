@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.forecast import HoltState, fit
+from src.repo import get_forecast, import_frame, init_db, to_dataframe, upsert_day
+
+
+def _history(n=50, start=date(2025, 9, 1)):
+    rng = np.random.default_rng(11)
+    days = [start + timedelta(days=i) for i in range(n) if i % 9 != 4]  # a few missing days
+    k = len(days)
+    weight = 78 - 0.05 * np.arange(k) + rng.normal(0, 0.3, k)
+    weight[::5] = np.nan  # skipped weigh-ins
+    return pd.DataFrame({
+        "date": days,
+        "sugar_intake_g": 50,
+        "water_ml": 2000,
+        "fap_count": 0,
+        "productive_hours": (5 + rng.normal(0, 1, k)).clip(0, 12).round(1),
+        "weight_kg": weight.round(1),
+    })
+
+
+def test_linear_series_is_projected_exactly():
+    st = HoltState(0.3, 0.1)
+    for i in range(10):
+        st.update(date(2025, 10, 1) + timedelta(days=2 * i), 70.0 - 0.2 * i)
+    fc = st.forecast(4)
+    np.testing.assert_allclose(fc["yhat"], 70.0 - 1.8 - 0.1 * np.arange(1, 5))
+    np.testing.assert_allclose(fc["upper"] - fc["lower"], 0.0, atol=1e-9)
+    assert fc["date"].iloc[0] == pd.Timestamp("2025-10-20")
+
+
+def test_incremental_fit_agrees_with_batch_refit():
+    init_db()
+    hist = _history()
+    import_frame(hist.iloc[:20])
+    for row in hist.iloc[20:].to_dict("records"):  # appended one day at a time
+        row["weight_kg"] = None if pd.isna(row["weight_kg"]) else row["weight_kg"]
+        upsert_day(row)
+    batch, _ = fit(to_dataframe())
+    for metric in ("weight_kg", "productive_hours"):
+        pd.testing.assert_frame_equal(get_forecast(metric), batch.states[metric].forecast())
+
+    # Editing a past day forces a refit, which must land on the same fit.
+    upsert_day({"date": date(2025, 9, 3), "sugar_intake_g": 50, "water_ml": 2000, "fap_count": 0, "productive_hours": 11.0})
+    batch, _ = fit(to_dataframe())
+    pd.testing.assert_frame_equal(get_forecast("productive_hours"), batch.states["productive_hours"].forecast())
+    assert get_forecast("weight_kg")["lower"].lt(get_forecast("weight_kg")["yhat"]).all()
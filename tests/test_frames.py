@@ -0,0 +1,64 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from src import analytics, frames
+from src.repo import init_db, to_dataframe, upsert_day
+
+
+def _legacy(n=400):
+    rng = np.random.default_rng(1)
+    stamps = pd.date_range("2024-01-01 21:00", periods=n, freq="D").strftime("%Y-%m-%dT%H:%M:%S")
+    return pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=n, freq="D"),
+        "sugar_intake_g": rng.integers(0, 150, n),
+        "water_ml": rng.integers(500, 4000, n),
+        "fap_count": rng.integers(0, 3, n),
+        "productive_hours": rng.integers(0, 25, n) / 2.0,
+        "weight_kg": np.round(rng.normal(75, 2, n), 1),
+        "notes": ["gym" if i % 3 else None for i in range(n)],
+        "created_at": stamps,
+        "updated_at": stamps,
+    })
+
+
+def test_compact_shrinks_types_without_changing_values():
+    legacy = _legacy()
+    df = frames.compact(legacy.copy())
+    assert df["fap_count"].dtype == np.int8 and df["water_ml"].dtype == np.int16
+    assert df["productive_hours"].dtype == np.float32  # halves are exact in float32
+    assert df["weight_kg"].dtype == np.float64  # 75.3 is not
+    assert pd.api.types.is_datetime64_any_dtype(df["created_at"])
+    assert pd.api.types.is_string_dtype(df["notes"]) and df["notes"].isna().sum() == legacy["notes"].isna().sum()
+    assert frames.memory_bytes(df) < frames.memory_bytes(legacy)
+    for c in ("sugar_intake_g", "water_ml", "productive_hours", "weight_kg"):
+        assert (df[c].to_numpy(np.float64) == legacy[c].to_numpy(np.float64)).all()
+
+
+def test_analytics_match_on_compact_frames():
+    legacy = _legacy()
+    df = frames.compact(legacy.copy())
+    for freq in ("W", "M"):
+        pd.testing.assert_frame_equal(
+            analytics.resample(df, freq, None, ["sum", "mean", "min", "coverage"]),
+            analytics.resample(legacy, freq, None, ["sum", "mean", "min", "coverage"]),
+        )
+    pd.testing.assert_series_equal(analytics.weekday_avg_productivity(df), analytics.weekday_avg_productivity(legacy))
+    pd.testing.assert_frame_equal(analytics.correlation_matrix(df), analytics.correlation_matrix(legacy))
+    pd.testing.assert_frame_equal(
+        analytics.add_rolling(df)[["prod_7", "prod_30"]], analytics.add_rolling(legacy)[["prod_7", "prod_30"]]
+    )
+    pd.testing.assert_series_equal(analytics.composite_score(df), analytics.composite_score(legacy))
+    assert analytics.compute_streak(df) == analytics.compute_streak(legacy)
+
+
+def test_repo_frames_are_compact():
+    init_db()
+    upsert_day({"date": date(2025, 3, 1), "sugar_intake_g": 20, "water_ml": 2500, "fap_count": 1,
+                "productive_hours": 6.5, "weight_kg": 72.0, "notes": "ok"})
+    df = to_dataframe()
+    assert df["fap_count"].dtype == np.int8
+    assert df["productive_hours"].dtype == np.float32
+    assert pd.api.types.is_datetime64_any_dtype(df["updated_at"])
+    assert df.loc[0, "notes"] == "ok"
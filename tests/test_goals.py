@@ -0,0 +1,58 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import goals
+from src.goals import Goal
+from src.repo import delete_goal, get_goals, goal_report, init_db, save_goal, upsert_day
+
+
+def _frame():
+    days = pd.date_range("2025-09-01", periods=14)  # starts on a Monday
+    return pd.DataFrame({
+        "date": days,
+        "sugar_intake_g": [10, 60, 20, 30, 80, 5, 5, 40, 45, 50, 55, 10, 10, 10],
+        "water_ml": [2500, 2500, 1000, 2500, 2500, 500, 500, 2500, 2500, 2500, 2500, 2500, 0, 0],
+        "productive_hours": np.r_[np.full(13, 5.0), np.nan],
+    })
+
+
+def test_every_goal_is_evaluated_in_one_pass():
+    report = goals.evaluate(_frame(), [
+        Goal("sugar", "sugar_intake_g", "<=", 50),
+        Goal("water weekdays", "water_ml", ">=", 2000, days="weekdays"),
+        Goal("prod 5 of 7", "productive_hours", ">=", 4, window_k=5, window_n=7),
+    ])
+    m = report.matrix()
+    assert m["sugar"].tolist() == [True, False, True, True, False] + [True] * 5 + [False, True, True, True]
+    assert m["water weekdays"].isna().tolist() == [False] * 5 + [True, True] + [False] * 5 + [True, True]
+    assert m["water weekdays"].iloc[2] == False  # noqa: E712
+    assert m["prod 5 of 7"].iloc[3] == False and m["prod 5 of 7"].iloc[4] == True  # noqa: E712
+    s = report.summary().set_index("goal")
+    assert s.loc["sugar", "hits"] == 11 and s.loc["sugar", "streak"] == 3 and s.loc["sugar", "best_streak"] == 5
+    assert s.loc["water weekdays", "days"] == 10 and s.loc["water weekdays", "hit_rate"] == 0.9
+    # Weekends do not break the weekday goal; sugar failed on day 11.
+    assert report.streak() == 3
+
+
+def test_goal_validation():
+    with pytest.raises(ValueError):
+        Goal("x", "steps", ">=", 1)
+    with pytest.raises(ValueError):
+        Goal("x", "water_ml", ">=", 1, window_k=8, window_n=7)
+    assert goals.weekday_set("mon, Fri") == (0, 4)
+
+
+def test_goals_are_stored_and_feed_the_report():
+    init_db()
+    assert [g.name for g in get_goals()] == [n for n, *_ in goals.DEFAULT_GOALS]
+    for i in range(5):
+        upsert_day({"date": date(2025, 9, 1) + timedelta(days=i), "sugar_intake_g": 70 - 10 * i, "water_ml": 2500,
+                    "fap_count": 0, "productive_hours": 5.0})
+    assert goal_report().streak() == 5
+    gid = save_goal(Goal("sugar", "sugar_intake_g", "<=", 50))
+    assert goal_report().streak() == 3
+    assert delete_goal(gid) and goal_report().streak() == 5
+    assert [g.name for g in get_goals()] == [n for n, *_ in goals.DEFAULT_GOALS]
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Cold import of the data layer must stay under this budget (pandas + SQLAlchemy dominate).
+BUDGET_MS = float(os.getenv("HABITS_IMPORT_BUDGET_MS", "1500"))
+LAZY = ("streamlit", "gspread", "google.oauth2", "plotly")
+
+
+def _importtime(stmt: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", stmt],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    out = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time: <self us> | <cumulative us> | <indented module name>"
+        _, cumulative_us, name = line.split("|")
+        out[name.strip()] = int(cumulative_us) / 1000.0
+    return out
+
+
+def test_repo_import_is_lazy_and_within_budget():
+    mods = _importtime("import src.repo, src.analytics, src.charts")
+    eager = [m for m in mods if m.split(".")[0] in LAZY or m.startswith(LAZY)]
+    assert eager == [], f"imported eagerly: {eager[:5]}"
+    assert mods["src.repo"] < BUDGET_MS, f"src.repo took {mods['src.repo']:.0f} ms"
+
+
+def test_import_has_no_engine_side_effect():
+    code = "import src.repo, src.db as db; assert db._ENGINE is None"
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
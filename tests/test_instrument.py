@@ -0,0 +1,98 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from src import instrument
+from src.analytics import composite_score
+
+
+def _df():
+    d0 = pd.date_range("2025-09-22", periods=5, freq="D")
+    return pd.DataFrame({
+        "date": d0,
+        "productive_hours": [4.0] * 5,
+        "water_ml": [2000] * 5,
+        "sugar_intake_g": [30] * 5,
+    })
+
+
+def test_disabled_records_nothing():
+    instrument.enable(False)
+    instrument.reset()
+    composite_score(_df())
+    instrument.count("x")
+    snap = instrument.snapshot()
+    assert snap["stats"] == {} and snap["counters"] == {}
+
+
+def test_spans_counters_and_page_totals(tmp_path: Path):
+    instrument.enable(True)
+    instrument.reset()
+    try:
+        instrument.begin_page("Test")
+        with instrument.span("outer", "repo"):
+            composite_score(_df())
+            instrument.count("sheets.api", 2)
+        run = instrument.end_page(render_sidebar=False)
+
+        snap = instrument.snapshot()
+        assert snap["stats"]["analytics.composite_score"]["calls"] == 1
+        assert snap["counters"]["sheets.api"] == 2
+        assert run is not None and run.page == "Test"
+        assert set(run.by_category_ms) == {"repo", "analytics"}
+        # self times never exceed the wall time of the rerun
+        assert sum(run.by_category_ms.values()) <= run.duration_ms + 1e-6
+
+        out = instrument.export_jsonl(tmp_path / "profile.jsonl")
+        lines = [json.loads(x) for x in out.read_text().splitlines()]
+        assert {x["type"] for x in lines} == {"span", "page_run", "summary"}
+    finally:
+        instrument.enable(False)
+        instrument.reset()
+
+
+def test_debug_query_param_profiles_only_that_session(monkeypatch):
+    import sys
+    import threading
+    from types import SimpleNamespace
+
+    def fake_streamlit(query):
+        return SimpleNamespace(query_params=query, session_state={})
+
+    instrument.enable(False)
+    instrument.reset()
+    debug, plain = fake_streamlit({"debug": "1"}), fake_streamlit({})
+
+    def rerun(st):
+        monkeypatch.setitem(sys.modules, "streamlit", st)
+        instrument.begin_page("Test")
+        composite_score(_df())
+        return instrument.end_page(render_sidebar=False)
+
+    try:
+        assert rerun(debug) is not None
+        debug.query_params.clear()
+        assert rerun(debug) is not None  # remembered in the session, not the URL
+
+        other = []
+        t = threading.Thread(target=lambda: other.append(rerun(plain)))
+        t.start()
+        t.join()
+        assert other == [None] and not instrument.enabled()
+        assert instrument.snapshot()["stats"]["analytics.composite_score"]["calls"] == 2
+
+        assert len(debug.session_state[instrument.RUNS_STATE_KEY]) == 2
+        assert instrument.RUNS_STATE_KEY not in plain.session_state
+        runs = debug.session_state[instrument.RUNS_STATE_KEY]
+        assert runs[-1].span_ms["analytics.composite_score"] > 0
+
+        # A debug rerun that raises before end_page does not leak into the next session.
+        monkeypatch.setitem(sys.modules, "streamlit", debug)
+        instrument.begin_page("Test")
+        assert rerun(plain) is None
+
+        debug.query_params["debug"] = "0"
+        assert rerun(debug) is None
+    finally:
+        instrument.reset()
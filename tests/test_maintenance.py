@@ -0,0 +1,71 @@
+import random
+from datetime import datetime, timedelta
+
+from src import maintenance, snapshot
+from src.maintenance import DAY, Scheduler, Task
+from src.repo import init_db, upsert_day
+
+T0 = datetime(2025, 6, 2, 12, 0)
+
+
+def _scheduler(tasks, owner="a"):
+    return Scheduler(tasks, owner=owner, rng=random.Random(0))
+
+
+def test_shared_jobs_follow_a_jittered_schedule_kept_in_the_database():
+    init_db()
+    calls = []
+    task = Task("job", DAY, lambda: calls.append(1) or "done", jitter=0.1, first_delay=60.0)
+    sched = _scheduler([task])
+    assert sched.run_pending(T0) == []  # first run is scheduled 0-120 s out
+    assert sched.run_pending(T0 + timedelta(seconds=121)) == ["job"]
+    row = sched.status().set_index("task").loc["job"]
+    assert row["status"] == "ok" and row["detail"] == "done"
+    assert T0 + timedelta(days=0.9) < row["next_due"] < T0 + timedelta(days=1.1)
+
+    # A restarted (or second) process sees the same schedule.
+    other = _scheduler([task], owner="b")
+    assert other.run_pending(T0 + timedelta(hours=1)) == []
+    assert other.run_pending(T0 + timedelta(days=1.2)) == ["job"] and len(calls) == 2
+
+
+def test_the_lease_keeps_a_job_to_one_process_and_errors_are_recorded():
+    init_db()
+
+    def boom():
+        # While this runs, another process must not be able to take the job.
+        assert other.run_pending(T0 + timedelta(days=2)) == []
+        raise RuntimeError("disk full")
+
+    task = Task("job", DAY, boom, first_delay=0.0)
+    sched, other = _scheduler([task]), _scheduler([task], owner="b")
+    assert sched.run_pending(T0) == ["job"]
+    row = sched.status().set_index("task").loc["job"]
+    assert row["status"] == "error" and "disk full" in row["detail"] and row["owner"] == ""
+
+
+def test_requests_and_change_triggered_jobs(monkeypatch, tmp_path):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", tmp_path / "backups")
+    init_db()
+    warm = []
+    sched = _scheduler([
+        Task("warm", 0.0, lambda: warm.append(1), shared=False, when=lambda: len(warm) < 1),
+        Task("backup", 7 * DAY, maintenance._backup),
+    ])
+    assert sched.run_pending(T0) == ["warm"]
+    assert sched.run_pending(T0) == []
+    sched.request("backup")  # e.g. the "Run now" button
+    assert sched.run_pending(T0) == ["backup"]
+    assert len(snapshot.list_snapshots()) == 1
+
+
+def test_default_jobs_run_on_a_real_database(monkeypatch, tmp_path):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", tmp_path / "backups")
+    init_db()
+    upsert_day({"date": "2025-06-01", "water_ml": 2000})
+    sched = Scheduler(maintenance.default_tasks())
+    for name in sched.tasks:
+        sched.request(name)
+    assert sorted(sched.run_pending()) == ["backup", "checkpoint", "db-check", "sheets-archive", "warm"]
+    assert (sched.status()["status"] == "ok").all(), sched.status()
+    assert sched.run_pending() == []  # nothing changed, nothing due
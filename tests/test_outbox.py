@@ -0,0 +1,92 @@
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from src.db import get_engine
+from src.models import create_all
+from src.outbox import Outbox
+
+
+class FakeSink:
+    def __init__(self):
+        self.rows = {}
+        self.calls = []
+        self.fail = False
+        self.on_call = None
+
+    def upsert_day(self, payload):
+        self.calls.append(("upsert", payload["date"]))
+        if self.on_call:
+            self.on_call()
+        if self.fail:
+            raise RuntimeError("quota exceeded")
+        self.rows[payload["date"]] = {**self.rows.get(payload["date"], {}), **payload}
+
+    def delete_day(self, d):
+        self.calls.append(("delete", d))
+        return self.rows.pop(d, None) is not None
+
+
+def _outbox(sink):
+    create_all(get_engine())
+    return Outbox(sink, base_delay=10.0)
+
+
+def test_edits_to_same_date_coalesce_into_one_call():
+    sink = FakeSink()
+    ob = _outbox(sink)
+    d = date(2025, 10, 1)
+    ob.enqueue_upsert({"date": d, "sugar_intake_g": 10, "water_ml": 500})
+    ob.enqueue_upsert({"date": d, "water_ml": 2500})
+    ob.enqueue_upsert({"date": date(2025, 10, 2), "sugar_intake_g": 1})
+    ob.enqueue_delete(date(2025, 10, 2))
+    assert len(ob.pending()) == 2
+    assert ob.flush() == 2
+    assert sink.calls == [("upsert", d), ("delete", date(2025, 10, 2))]
+    assert sink.rows[d]["sugar_intake_g"] == 10 and sink.rows[d]["water_ml"] == 2500
+    assert ob.pending() == {}
+
+
+def test_failures_are_kept_and_retried_with_backoff():
+    sink = FakeSink()
+    sink.fail = True
+    ob = _outbox(sink)
+    d = date(2025, 10, 3)
+    ob.enqueue_upsert({"date": d, "sugar_intake_g": 5})
+    t0 = datetime.utcnow()
+    assert ob.flush(t0) == 0
+    edit = ob.pending()[d]
+    assert edit.attempts == 1 and "quota" in edit.last_error
+    assert ob.stats()["failing"] == 1
+    sink.fail = False
+    assert ob.flush(t0 + timedelta(seconds=1)) == 0  # still backing off
+    assert ob.flush(t0 + timedelta(seconds=11)) == 1
+    assert sink.rows[d]["sugar_intake_g"] == 5
+
+
+def test_edit_made_during_flush_is_not_lost():
+    sink = FakeSink()
+    ob = _outbox(sink)
+    d = date(2025, 10, 4)
+    ob.enqueue_upsert({"date": d, "sugar_intake_g": 1})
+    sink.on_call = lambda: (setattr(sink, "on_call", None), ob.enqueue_upsert({"date": d, "sugar_intake_g": 2}))
+    ob.flush()
+    assert ob.pending()[d].payload["sugar_intake_g"] == 2
+    ob.flush()
+    assert sink.rows[d]["sugar_intake_g"] == 2 and ob.pending() == {}
+
+
+def test_overlay_merges_pending_edits_into_remote_frame():
+    ob = _outbox(FakeSink())
+    remote = pd.DataFrame({
+        "date": pd.to_datetime(["2025-10-01", "2025-10-02", "2025-10-03"]),
+        "sugar_intake_g": [1, 2, 3],
+        "water_ml": [100, 200, 300],
+    })
+    ob.enqueue_upsert({"date": date(2025, 10, 2), "sugar_intake_g": 20})
+    ob.enqueue_delete(date(2025, 10, 3))
+    ob.enqueue_upsert({"date": date(2025, 10, 5), "sugar_intake_g": 50, "water_ml": 500})
+    out = ob.overlay(remote)
+    assert out["date"].dt.day.tolist() == [1, 2, 5]
+    assert out["sugar_intake_g"].tolist() == [1, 20, 50]
+    assert out["water_ml"].tolist() == [100, 200, 500]
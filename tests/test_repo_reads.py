@@ -0,0 +1,60 @@
+from datetime import date
+
+from src import instrument
+from src.repo import browse_days, get_month, init_db, recent_days, upsert_day
+
+
+def _day(d, **kw):
+    payload = {"date": d, "sugar_intake_g": 10, "water_ml": 2000, "fap_count": 0, "productive_hours": 4.0, "weight_kg": 70.0}
+    payload.update(kw)
+    upsert_day(payload)
+
+
+def test_get_month_returns_only_that_month_indexed_by_day():
+    init_db()
+    for d in (date(2025, 9, 30), date(2025, 10, 1), date(2025, 10, 31), date(2025, 11, 1)):
+        _day(d)
+    oct_ = get_month(2025, 10)
+    assert list(oct_.index) == [date(2025, 10, 1), date(2025, 10, 31)]
+    assert oct_.loc[date(2025, 10, 1), "water_ml"] == 2000
+
+
+def test_get_month_is_cached_until_a_write():
+    init_db()
+    _day(date(2025, 10, 2))
+    instrument.enable(True)
+    instrument.reset()
+    try:
+        first = get_month(2025, 10)
+        assert get_month(2025, 10) is first
+        assert instrument.snapshot()["counters"].get("repo.to_dataframe") == 1
+        _day(date(2025, 10, 3), sugar_intake_g=99)
+        again = get_month(2025, 10)
+        assert again is not first and again.loc[date(2025, 10, 3), "sugar_intake_g"] == 99
+    finally:
+        instrument.enable(False)
+        instrument.reset()
+
+
+def test_recent_days_are_the_latest_in_date_order():
+    init_db()
+    for day in range(1, 16):
+        _day(date(2025, 10, day))
+    out = recent_days(10)
+    assert out["date"].dt.day.tolist() == list(range(6, 16))
+
+
+def test_browse_days_pages_newest_first_with_filters():
+    init_db()
+    for day in range(1, 21):
+        _day(date(2025, 10, day), water_ml=1000 + 100 * day, notes="gym" if day % 4 == 0 else None)
+    seen, after = [], None
+    while True:
+        page = browse_days(after, limit=3, descending=True, ranges={"water_ml": (1500, None)})
+        seen += page.rows["date"].dt.day.tolist()
+        if page.next_after is None:
+            break
+        after = page.next_after
+    assert seen == list(range(20, 4, -1))
+    noted = browse_days(limit=10, has_notes=True, start=date(2025, 10, 5))
+    assert noted.rows["date"].dt.day.tolist() == [8, 12, 16, 20] and noted.next_after is None
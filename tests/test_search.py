@@ -0,0 +1,53 @@
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from src.db import get_engine
+from src.repo import delete_day, import_frame, init_db, search_notes, upsert_day
+
+
+def _day(d, notes):
+    upsert_day({"date": d, "sugar_intake_g": 10, "water_ml": 2000, "fap_count": 0, "productive_hours": 4.0, "notes": notes})
+
+
+def test_index_follows_upserts_and_deletes():
+    init_db()
+    _day(date(2025, 9, 1), "Gym in the morning, mild headache")
+    _day(date(2025, 9, 2), "headache all day")
+    _day(date(2025, 9, 3), "rest")
+    hits = search_notes("headache")
+    assert set(hits["date"]) == {date(2025, 9, 1), date(2025, 9, 2)}
+    assert "**headache**" in hits.set_index("date").loc[date(2025, 9, 2), "snippet"]
+
+    _day(date(2025, 9, 2), "felt fine")
+    delete_day(date(2025, 9, 1))
+    assert search_notes("headache").empty
+    assert list(search_notes("fel")["date"]) == [date(2025, 9, 2)]  # prefix match
+
+
+def test_range_filter_and_awkward_input():
+    init_db()
+    for i in range(10):
+        _day(date(2025, 9, 1) + timedelta(days=i), f'gym "session" {i}')
+    hits = search_notes('gym "sess', start=date(2025, 9, 3), end=date(2025, 9, 5))
+    assert sorted(hits["date"]) == [date(2025, 9, 3), date(2025, 9, 4), date(2025, 9, 5)]
+    assert search_notes('" - NEAR(').empty
+
+
+def test_existing_notes_are_indexed_and_search_stays_fast():
+    init_db()
+    n = 3000
+    notes = ["gym" if i % 50 == 0 else f"walk {i}" for i in range(n)]
+    start = date(2017, 1, 1)
+    import_frame(pd.DataFrame({
+        "date": [start + timedelta(days=i) for i in range(n)],
+        "sugar_intake_g": 10, "water_ml": 2000, "fap_count": 0, "productive_hours": 4.0, "notes": notes,
+    }))
+    with get_engine().begin() as conn:  # simulate a database created before the index
+        conn.exec_driver_sql("DROP TABLE notes_fts")
+    init_db()
+    t0 = time.perf_counter()
+    hits = search_notes("gym", limit=100)
+    assert len(hits) == n // 50
+    assert time.perf_counter() - t0 < 0.5
@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src import repo, seasonality
+from src.analytics import weekday_avg_productivity
+
+
+def _frame(n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": pd.date_range("2025-01-01", periods=n),
+        "productive_hours": rng.integers(0, 17, n) / 2.0,
+        "water_ml": rng.integers(500, 4000, n).astype(float),
+        "weight_kg": np.where(rng.random(n) < 0.3, np.nan, 70.0 + rng.random(n)),
+    })
+
+
+def test_profile_matches_groupby_for_every_kind():
+    df = _frame()
+    profile = seasonality.build(df)
+    keys = {"weekday": df["date"].dt.weekday, "day": df["date"].dt.day - 1, "month": df["date"].dt.month - 1}
+    for kind, key in keys.items():
+        ref = df.groupby(key)[["productive_hours", "weight_kg"]].agg(["mean", "std", "count"])
+        for m in ("productive_hours", "weight_kg"):
+            labels = [seasonality.BUCKETS[kind][i] for i in ref.index]
+            np.testing.assert_allclose(profile.matrix(kind).loc[m, labels], ref[(m, "mean")])
+            np.testing.assert_allclose(profile.matrix(kind, "std").loc[m, labels], ref[(m, "std")], equal_nan=True)
+            assert (profile.matrix(kind, "count").loc[m, labels].to_numpy() == ref[(m, "count")].to_numpy()).all()
+    t = profile.table("weekday", "water_ml")
+    assert list(t["bucket"]) == list(seasonality.BUCKETS["weekday"])
+    assert (t["lower"] < t["mean"]).all() and (t["mean"] < t["upper"]).all()
+
+
+def test_incremental_updates_match_a_rebuild():
+    df = _frame(20)
+    profile = seasonality.build(df.iloc[:15]).add(df.iloc[15:])
+    edited = df.iloc[[3]].assign(water_ml=9999.0)
+    profile.update(df.iloc[[3]], edited)
+    expected = seasonality.build(pd.concat([df.drop(index=3), edited]))
+    pd.testing.assert_frame_equal(profile.matrix("month"), expected.matrix("month"))
+
+
+def test_repo_keeps_the_stored_profile_in_sync():
+    repo.init_db()
+    start = date(2025, 3, 3)
+    for i in range(10):
+        repo.upsert_day({"date": start + timedelta(days=i), "water_ml": 1000 + 100 * i, "productive_hours": i % 4})
+    repo.upsert_day({"date": start + timedelta(days=9), "water_ml": 5000})  # re-edit the newest day
+    pd.testing.assert_frame_equal(repo.get_seasonality().matrix(), seasonality.build(repo.to_dataframe()).matrix())
+    repo.upsert_day({"date": start, "water_ml": 1})  # an older day: rebuild
+    repo.delete_day(start + timedelta(days=1))
+    got = repo.get_seasonality().matrix()
+    pd.testing.assert_frame_equal(got, seasonality.build(repo.to_dataframe()).matrix())
+
+
+def test_weekday_average_is_in_calendar_order():
+    out = weekday_avg_productivity(_frame(14))
+    assert list(out.index) == ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
@@ -0,0 +1,66 @@
+import subprocess
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import select, text
+
+from src import db, repo, shared
+from src.changes import latest_cursor
+from src.models import DailyMetrics
+
+
+def _seed(n=5):
+    repo.init_db()
+    for i in range(n):
+        repo.upsert_day({"date": date(2025, 1, 1) + timedelta(days=i), "water_ml": 1000 + i, "notes": f"n{i}"})
+
+
+def _from_sqlite() -> pd.DataFrame:
+    with db.session_scope() as s:
+        return repo._rows_frame(s.execute(select(DailyMetrics)).scalars())
+
+
+def test_reads_publish_a_snapshot_that_reads_back_zero_copy():
+    _seed()
+    ver = shared.version(latest_cursor())
+    assert shared.current() is None  # writes leave publishing to the next read
+    repo.warm_caches()
+    assert shared.current() == ver
+    shared.forget()  # as if another process
+    df = repo.to_dataframe()
+    pd.testing.assert_frame_equal(df, _from_sqlite())
+    assert not df["water_ml"].to_numpy().flags.writeable  # a view of the mapped file
+
+    df.loc[0, "water_ml"] = -1  # copy-on-write: the mapped frame is untouched
+    assert repo.to_dataframe()["water_ml"].iloc[0] == 1000
+    pd.testing.assert_frame_equal(repo.get_anomalies(), shared.load(ver, "anomalies"))
+
+
+def test_writes_from_elsewhere_make_the_snapshot_stale():
+    _seed()
+    with db.get_engine().begin() as conn:
+        conn.execute(text("UPDATE daily_metrics SET water_ml = 7 WHERE date = '2025-01-03'"))
+    df = repo.to_dataframe()
+    assert df["water_ml"].tolist()[2] == 7
+    assert shared.current() == shared.version(latest_cursor())  # republished by the reader
+
+
+def test_another_process_maps_the_published_snapshot():
+    _seed(3)
+    repo.to_dataframe()
+    code = (
+        "import sys; from pathlib import Path; sys.path.insert(0, sys.argv[1]);"
+        "from src import db, shared; db.DB_PATH = Path(sys.argv[2]);"
+        "df = shared.load(shared.current(), 'days'); print(len(df), df['notes'].iloc[-1])"
+    )
+    root = Path(__file__).resolve().parents[1]
+    out = subprocess.run([sys.executable, "-c", code, str(root), str(db.DB_PATH)], capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["3", "n2"]
+
+
+def test_disabled_by_env(monkeypatch):
+    monkeypatch.setenv("HABITS_SHARED_SNAPSHOT", "0")
+    _seed(2)
+    assert shared.current() is None and len(repo.to_dataframe()) == 2
@@ -0,0 +1,103 @@
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from src.sheets_repo import HEADERS, GoogleSheetRepo, SheetsConfig
+from src.sheets_sim import SimAPIError, SimClient, SimConfig
+
+TODAY = date(2025, 6, 15)
+START = date(2023, 1, 1)
+
+
+def _seeded(days=(TODAY - START).days + 1):
+    client = SimClient(SimConfig(read_quota_per_min=None, write_quota_per_min=None))
+    repo = GoogleSheetRepo(SheetsConfig("test"), client=client)
+    rows = [
+        repo._to_row({"date": START + timedelta(days=i), "water_ml": 1000 + i, "productive_hours": i % 8,
+                      "weight_kg": 70.0 if i % 3 else None})
+        for i in range(days)
+    ]
+    client.open_by_key("test").worksheet("DailyMetrics").load([HEADERS] + rows)
+    return repo, client
+
+
+def test_archive_moves_old_months_and_reads_stay_the_same():
+    repo, client = _seeded()
+    before = repo.to_dataframe()
+    result = repo.archive(TODAY)
+    assert result["years"] == [2023, 2024, 2025] and result["watermark"] == date(2025, 2, 1)
+    assert len(repo.ws.get_all_values()) - 1 == (TODAY - date(2025, 2, 1)).days + 1
+    pd.testing.assert_frame_equal(repo.to_dataframe(), before)
+    assert repo.archive(TODAY)["moved"] == 0  # nothing new until the month turns
+
+    summary = repo.summary().set_index("month")
+    assert len(summary) == 25 and summary.loc["2024-02", "days"] == 29
+    old = before[before["date"] < "2025-02-01"]
+    assert summary["water_ml_sum"].sum() == old["water_ml"].sum()
+    assert summary["weight_kg_n"].sum() == pd.to_numeric(old["weight_kg"], errors="coerce").count()
+
+    # A fresh process finds the partitions through the catalog.
+    other = GoogleSheetRepo(SheetsConfig("test"), client=client)
+    assert other.watermark == date(2025, 2, 1)
+    pd.testing.assert_frame_equal(other.to_dataframe(), before)
+
+
+def test_ranged_reads_touch_only_overlapping_partitions():
+    repo, client = _seeded()
+    repo.archive(TODAY)
+    client.reset_stats()
+    recent = repo.to_dataframe(date(2025, 5, 1), date(2025, 5, 31))
+    assert len(recent) == 31 and client.stats.calls["get_all_records"] == 1  # the hot sheet only
+    client.reset_stats()
+    assert len(repo.to_dataframe(date(2023, 12, 30), date(2024, 1, 2))) == 4
+    assert client.stats.calls["get_all_records"] == 2  # the 2023 and 2024 archives
+    client.reset_stats()
+    repo.to_dataframe(date(2023, 3, 1), date(2023, 3, 31))
+    assert client.stats.round_trips == 0  # archive frames are cached
+
+
+def test_writes_to_archived_days_go_to_their_year_and_update_the_summary():
+    repo, client = _seeded()
+    repo.archive(TODAY)
+    d = date(2024, 2, 10)
+    assert repo.upsert_day({"date": d, "water_ml": 5}) == "updated"
+    assert repo.get_day(d)["water_ml"] == 5 and repo.to_dataframe(d, d)["water_ml"].tolist() == [5]
+    assert d.isoformat() not in repo.ws.col_values(1)
+    month = repo.summary().set_index("month").loc["2024-02"]
+    assert month["water_ml_sum"] == repo.to_dataframe(date(2024, 2, 1), date(2024, 2, 29))["water_ml"].sum()
+    assert repo.delete_day(d) and repo.summary().set_index("month").loc["2024-02", "days"] == 28
+
+
+def test_an_interrupted_archive_run_is_finished_by_the_next_one():
+    repo, client = _seeded()
+    before = repo.to_dataframe()
+    # catalog + hot read, 6 calls to create and fill each of 3 archives, 2 to create the summary tab
+    client.backend.fail_next = [None] * 22 + [503]  # then the summary write fails
+    with pytest.raises(SimAPIError):
+        repo.archive(TODAY)
+    assert len(repo._archives[2024].get_all_values()) == 367
+    assert repo.watermark is None
+    pd.testing.assert_frame_equal(repo.to_dataframe(), before)
+    repo.archive(TODAY)
+    pd.testing.assert_frame_equal(repo.to_dataframe(), before)
+    archived = sum(len(ws.get_all_values()) - 1 for ws in repo._archives.values())
+    assert archived == len(before[before["date"] < "2025-02-01"])  # no duplicates from the retry
+
+
+@pytest.mark.parametrize("fail_at", ["update", "delete_rows"])
+def test_a_failed_hot_sheet_rewrite_loses_no_recent_rows(fail_at):
+    repo, client = _seeded()
+    before = repo.to_dataframe()
+    rows = len(repo.ws.get_all_values())
+    # 23 calls up to the summary write, then the hot sheet's update and delete_rows
+    client.backend.fail_next = [None] * (23 if fail_at == "update" else 24) + [503]
+    with pytest.raises(SimAPIError):
+        repo.archive(TODAY)
+    assert client.stats.errors == 1 and repo.watermark == date(2025, 2, 1)
+    assert len(repo.ws.get_all_values()) == rows  # overwritten in place or not at all
+    pd.testing.assert_frame_equal(repo.to_dataframe(), before)
+
+    assert repo.archive(TODAY)["watermark"] == date(2025, 2, 1)  # the next run tidies up
+    assert len(repo.ws.get_all_values()) - 1 == (TODAY - date(2025, 2, 1)).days + 1
+    pd.testing.assert_frame_equal(repo.to_dataframe(), before)
@@ -0,0 +1,61 @@
+from datetime import date
+
+import pytest
+
+from src.sheets_repo import GoogleSheetRepo, SheetsConfig
+from src.sheets_sim import SimAPIError, SimClient, SimConfig
+
+DAY = {"date": date(2025, 3, 1), "sugar_intake_g": 20, "water_ml": 2500, "fap_count": 0,
+       "productive_hours": 4.5, "weight_kg": 71.2, "notes": "gym"}
+
+
+def _repo(**cfg):
+    client = SimClient(SimConfig(**cfg))
+    return GoogleSheetRepo(SheetsConfig("test"), client=client), client
+
+
+def test_round_trip_through_the_sheets_repo_counts_calls():
+    repo, client = _repo()
+    assert repo.upsert_day(dict(DAY)) == "inserted"
+    assert repo.upsert_day(dict(DAY, water_ml=3000)) == "updated"
+    client.reset_stats()
+    assert repo.upsert_day(dict(DAY, water_ml=3000)) == "unchanged"
+    assert client.stats.writes == 0 and client.stats.round_trips == 2  # col_values + row_values
+
+    got = repo.get_day(DAY["date"])
+    assert got["water_ml"] == 3000 and got["weight_kg"] == 71.2 and got["notes"] == "gym"
+    df = repo.to_dataframe()
+    assert list(df["water_ml"]) == [3000] and df["productive_hours"].iloc[0] == 4.5
+    assert repo.delete_day(DAY["date"]) and repo.get_day(DAY["date"]) is None
+
+
+def test_latency_is_simulated_not_slept():
+    repo, client = _repo(latency_ms=200.0, per_cell_ms=0.0)
+    client.reset_stats()
+    repo.get_day(DAY["date"])  # one col_values call, no match
+    assert client.stats.simulated_ms == pytest.approx(200.0)
+
+
+def test_quota_answers_429_until_the_window_passes():
+    repo, client = _repo(read_quota_per_min=3)
+    client.backend.advance(60)  # forget the reads made while opening the sheet
+    for _ in range(3):
+        repo.get_day(DAY["date"])
+    with pytest.raises(SimAPIError) as exc:
+        repo.get_day(DAY["date"])
+    assert exc.value.code == 429 and client.stats.throttled == 1
+    client.backend.advance(60)
+    assert repo.get_day(DAY["date"]) is None
+
+
+def test_injected_errors_surface_and_leave_the_sheet_unchanged():
+    repo, client = _repo()
+    client.backend.fail_next = [None, 503]  # col_values succeeds, append_row fails
+    with pytest.raises(SimAPIError) as exc:
+        repo.upsert_day(dict(DAY))
+    assert exc.value.code == 503 and client.stats.errors == 1
+    assert repo.to_dataframe().empty
+
+    client = SimClient(SimConfig(error_rate=1.0, error_codes=(500,)))
+    with pytest.raises(SimAPIError):
+        GoogleSheetRepo(SheetsConfig("test"), client=client)
@@ -0,0 +1,56 @@
+from datetime import date
+
+import pytest
+
+from src import snapshot
+from src.repo import (
+    check_rollups,
+    create_snapshot,
+    get_day,
+    init_db,
+    restore_snapshot,
+    to_dataframe,
+    upsert_day,
+)
+
+
+def _day(d, **kw):
+    upsert_day({"date": d, "sugar_intake_g": 10, "water_ml": 2000, "fap_count": 0, "productive_hours": 4.0, **kw})
+
+
+def test_restore_brings_back_exactly_the_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", tmp_path / "backups")
+    init_db()
+    for day in range(1, 11):
+        _day(date(2025, 9, day))
+    snap = create_snapshot()
+    assert snapshot.list_snapshots() == [snap]
+
+    _day(date(2025, 9, 3), water_ml=100)
+    _day(date(2025, 9, 30))  # added after the snapshot: must disappear
+    restore_snapshot(snap)
+
+    df = to_dataframe()
+    assert df["date"].dt.day.tolist() == list(range(1, 11))
+    assert get_day(date(2025, 9, 3)).water_ml == 2000
+    _day(date(2025, 9, 11))  # still writable afterwards
+    assert len(to_dataframe()) == 11
+    assert check_rollups().empty
+
+
+def test_bad_snapshot_leaves_the_database_untouched(tmp_path):
+    init_db()
+    _day(date(2025, 9, 1))
+    junk = tmp_path / "habits-junk.db"
+    junk.write_bytes(b"not a database" * 100)
+    with pytest.raises(ValueError):
+        restore_snapshot(junk)
+    assert get_day(date(2025, 9, 1)) is not None
+
+
+def test_prune_keeps_the_newest(tmp_path):
+    for i in range(5):
+        (tmp_path / f"habits-2025010{i}-000000-000000.db").touch()
+    removed = snapshot.prune(keep=2, directory=tmp_path)
+    assert len(removed) == 3
+    assert [p.name[7:15] for p in snapshot.list_snapshots(tmp_path)] == ["20250104", "20250103"]
@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.repo import get_day, import_csv, import_csv_report, init_db
+from src.validation import validate_date, validate_frame, validate_payload, validate_ranges
+
+
+def test_validate_frame_reports_rows_columns_reasons():
+    df = pd.DataFrame([
+        {"date": "2025-09-22", "sugar_intake_g": 10, "water_ml": 2000, "fap_count": 0, "productive_hours": 4.0, "weight_kg": None},
+        {"date": "2026-01-01", "sugar_intake_g": 10, "water_ml": 9000, "fap_count": 0, "productive_hours": 4.0, "weight_kg": 70.0},
+        {"date": "not a date", "sugar_intake_g": "abc", "water_ml": 100, "fap_count": 0, "productive_hours": 30.0, "weight_kg": 70.0},
+    ])
+    report = validate_frame(df, last=date(2025, 12, 31))
+    assert not report.ok
+    assert report.valid.tolist() == [True, False, False]
+    assert report.bad_rows.tolist() == [1, 2]
+    got = set(zip(report.errors["row"], report.errors["column"]))
+    assert got == {(1, "date"), (1, "water_ml"), (2, "date"), (2, "sugar_intake_g"), (2, "productive_hours")}
+    assert report.first_message() == "No future dates beyond 2025-12-31 allowed."
+
+
+def test_single_row_wrappers_keep_messages():
+    assert validate_date(date(2025, 12, 31), last=date(2025, 12, 31)).ok
+    assert not validate_date(date(2026, 1, 1), last=date(2025, 12, 31)).ok
+    res = validate_ranges({"water_ml": 6000, "weight_kg": None})
+    assert not res.ok and res.message == "water_ml out of bounds [0, 5000]: 6000"
+    assert validate_ranges({"weight_kg": None, "notes": "x"}).ok
+
+
+def test_import_reports_rejected_rows(tmp_path: Path):
+    init_db()
+    csv = tmp_path / "seed.csv"
+    pd.DataFrame([
+        {"date": "2025-09-23", "sugar_intake_g": 10, "water_ml": 2000, "fap_count": 0, "productive_hours": 4.0, "weight_kg": ""},
+        {"date": "2025-09-24", "sugar_intake_g": 10, "water_ml": 2000, "fap_count": 99, "productive_hours": 4.0, "weight_kg": 70.0},
+    ]).to_csv(csv, index=False)
+    res = import_csv_report(csv, drop_conflicts=True)
+    assert res.imported == 1 and res.rejected == 1
+    assert res.report.errors["column"].tolist() == ["fap_count"]
+    with pytest.raises(ValueError, match="fap_count out of bounds"):
+        import_csv(csv, drop_conflicts=False)
+
+
+def test_import_with_a_repeated_date_keeps_the_last_row(tmp_path: Path):
+    init_db()
+    csv = tmp_path / "dupes.csv"
+    pd.DataFrame([
+        {"date": "2025-09-23", "sugar_intake_g": 10, "water_ml": 2000, "fap_count": 0, "productive_hours": 4.0},
+        {"date": "2025-09-24", "sugar_intake_g": 10, "water_ml": 2000, "fap_count": 0, "productive_hours": 4.0},
+        {"date": "2025-09-23", "sugar_intake_g": 30, "water_ml": 2500, "fap_count": 1, "productive_hours": 6.0},
+    ]).to_csv(csv, index=False)
+    assert import_csv(csv) == 3
+    row = get_day(date(2025, 9, 23))
+    assert (row.sugar_intake_g, row.water_ml, row.productive_hours) == (30, 2500, 6.0)
+
+
+def test_future_bound_follows_today_unless_configured(monkeypatch):
+    today = date.today()
+    assert validate_payload({"date": today, "water_ml": 2000}).ok
+    res = validate_payload({"date": today + timedelta(days=1)})
+    assert not res.ok and res.message == f"No future dates beyond {today.isoformat()} allowed."
+    monkeypatch.setenv("HABITS_LAST_DAY", "2030-06-30")
+    assert validate_date(today + timedelta(days=1)).ok
+    assert not validate_date(date(2030, 7, 1)).ok
+
+
+def test_a_time_on_the_last_day_is_not_in_the_future():
+    df = pd.DataFrame({"date": ["2025-12-31 08:00", "2025-12-31 23:59", "2026-01-01 00:00"]})
+    report = validate_frame(df, last=date(2025, 12, 31))
+    assert report.valid.tolist() == [True, True, False]
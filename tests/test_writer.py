@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pytest
+
+from src.models import DailyMetrics
+from src.repo import init_db, to_dataframe, upsert_day, writer_stats
+from src.writer import Writer
+
+
+def test_queued_jobs_share_one_commit_and_get_their_own_results():
+    init_db()
+    w = Writer(linger=0.05)
+    gate = threading.Event()
+    first = w.submit(lambda s: gate.wait(5))
+    futures = [w.submit(lambda s, i=i: i * 10) for i in range(5)]
+    gate.set()
+    assert first.result(5) is True
+    assert [f.result(5) for f in futures] == [0, 10, 20, 30, 40]
+    assert w.stats()["batches"] < 6
+    w.stop()
+
+
+def test_a_failing_job_does_not_sink_its_batch():
+    init_db()
+    w = Writer(linger=0.05)
+    gate = threading.Event()
+    w.submit(lambda s: gate.wait(5))
+
+    def add(d):
+        def job(s):
+            s.add(DailyMetrics(date=d, created_at=d, updated_at=d))
+            return d
+        return job
+
+    def boom(s):
+        raise RuntimeError("bad row")
+
+    ok = [w.submit(add(date(2025, 9, 1))), w.submit(add(date(2025, 9, 2)))]
+    bad = w.submit(boom)
+    gate.set()
+    assert [f.result(5) for f in ok] == [date(2025, 9, 1), date(2025, 9, 2)]
+    with pytest.raises(RuntimeError, match="bad row"):
+        bad.result(5)
+    assert len(to_dataframe()) == 2
+    w.stop()
+
+
+def test_concurrent_sessions_all_land():
+    init_db()
+
+    def session(k):
+        for i in range(10):
+            d = date(2025, 9, 1) + timedelta(days=k * 10 + i)
+            upsert_day({"date": d, "sugar_intake_g": k, "water_ml": 2000, "fap_count": 0, "productive_hours": 4.0})
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(session, range(8)))
+    assert len(to_dataframe()) == 80
+    assert writer_stats()["jobs"] >= 80